@@ -1,24 +1,82 @@
-from openai import OpenAI
 import os
 from dotenv import load_dotenv
-from quart import Quart, request, jsonify
+from quart import Quart, Response, request, jsonify, websocket
 from datetime import datetime
 import argparse
 from injective_functions.factory import InjectiveClientFactory
+from injective_functions.utils.indexer_requests import close_http_session
+from injective_functions.utils.tx_tracker import tx_tracker
+from injective_functions.utils.signing import signing_executor
+from injective_functions.utils.execution import execution_engine
 from injective_functions.utils.function_helper import (
     FunctionSchemaLoader,
     FunctionExecutor,
+    InjectiveFunctionMapper,
 )
+from app.result_compaction import ResultCompactor
+from app.response_templates import ResponsePolicy, render_tx_status
+from app.intent_parser import IntentParser
+from app.query_cache import QueryCache, make_key as make_query_key
+from app.prefetch import Prefetcher
+from app.streaming import FunctionCallAccumulator, stream_chat_completion
+from app.completion_cache import (
+    CompletionCache,
+    fingerprint,
+    is_cacheable_answer,
+    is_cacheable_question,
+)
+from app.metrics import metrics
+from app.events import events
+from app.fanout import DEFAULT_CONCURRENCY, fan_out, resolve_targets
+from app.scheduler import AgentUnavailable, Scheduler
+from app.warmup import Readiness, warm_up
 import json
 import asyncio
+import hmac
 from hypercorn.config import Config
 from hypercorn.asyncio import serve
-import aiohttp
 
 # Initialize Quart app (async version of Flask)
 app = Quart(__name__)
 
 
+# Bump SYSTEM_PROMPT_VERSION whenever the prompt changes, cached answers are keyed on it
+SYSTEM_PROMPT_VERSION = "1"
+SYSTEM_PROMPT = """You are a helpful AI assistant on Injective Chain. 
+                    You will be answering all things related to injective chain, and help out with
+                    on-chain functions.
+                    
+                    When handling market IDs, always use these standardized formats:
+                    - For BTC perpetual: "BTC/USDT PERP" maps to "btcusdt-perp"
+                    - For ETH perpetual: "ETH/USDT PERP" maps to "ethusdt-perp"
+                    
+                    When users mention markets:
+                    1. If they use casual terms like "Bitcoin perpetual" or "BTC perp", interpret it as "BTC/USDT PERP"
+                    2. If they mention "Ethereum futures" or "ETH perpetual", interpret it as "ETH/USDT PERP"
+                    3. Always use the standardized format in your responses
+                    
+                    Before performing any action:
+                    1. Describe what you're about to do
+                    2. Ask for explicit confirmation
+                    3. Only proceed after receiving a "yes"
+                    
+                    When making function calls:
+                    1. Convert the standardized format (e.g., "BTC/USDT PERP") to the internal format (e.g., "btcusdt-perp")
+                    2. When displaying results to users, convert back to the standard format
+                    3. Always confirm before executing any functions
+                    
+                    For general questions, provide informative responses.
+                    When users want to perform actions, describe the action and ask for confirmation but for fetching data you dont have to ask for confirmation."""
+
+
+class AgentKeyMismatch(PermissionError):
+    """The agent_key sent for an agent_id isn't the key the agent was created with"""
+
+
+def _key_bytes(private_key) -> bytes:
+    return str(private_key or "").lower().removeprefix("0x").encode()
+
+
 class InjectiveChatAgent:
     def __init__(self):
         # Load environment variables
@@ -31,8 +89,8 @@ class InjectiveChatAgent:
                 "No OpenAI API key found. Please set the OPENAI_API_KEY environment variable."
             )
 
-        # Initialize OpenAI client
-        self.client = OpenAI(api_key=self.api_key)
+        # The OpenAI SDK takes most of the import time, create the client on first use
+        self._client = None
 
         # Initialize conversation histories
         self.conversations = {}
@@ -49,22 +107,116 @@ class InjectiveChatAgent:
             "./injective_functions/utils/utils_schema.json",
         ]
         self.function_schemas = FunctionSchemaLoader.load_schemas(schema_paths)
+        # Large function results are summarized before they enter the conversation
+        self.result_compactor = ResultCompactor(
+            token_budget=int(os.getenv("RESULT_TOKEN_BUDGET", "1500"))
+        )
+        # Simple read results are rendered locally instead of by a second completion
+        self.response_policy = ResponsePolicy.from_env()
+        # Frequent commands like "balance" or "BTC perp mid price" skip the model
+        self.intent_parser = IntentParser()
+        self.fast_path_min_confidence = float(
+            os.getenv("FAST_PATH_MIN_CONFIDENCE", "0.9")
+        )
+        # Answers to general questions are reused until the prompt or tools change
+        self.completion_cache = CompletionCache.from_env()
+        self.tools_fingerprint = fingerprint(self.function_schemas)
+        # Read results shared between prefetches and tool calls
+        self.query_cache = QueryCache.from_env()
+        self.prefetcher = Prefetcher(self.execute_function)
+
+    @property
+    def client(self):
+        """OpenAI client, imported and created on first use (or by the warm-up)"""
+        if self._client is None:
+            from openai import OpenAI
+
+            self._client = OpenAI(api_key=self.api_key)
+        return self._client
+
+    def agents_for_address(self, address: str) -> list:
+        return [
+            agent_id
+            for agent_id, clients in self.agents.items()
+            if clients["bank"].chain_client.address.to_acc_bech32() == address
+        ]
+
+    def forget_reads_after_tx(self, job) -> None:
+        """Drop cached reads of the agents whose tx just landed, whoever sent it
+        (chat, executions, schedules)"""
+        for agent_id in self.agents_for_address(job.owner):
+            self.query_cache.invalidate(agent_id)
+
+    def publish_tx_event(self, job) -> None:
+        """Push a finished tx job to the WebSocket connections of its agents"""
+        for agent_id in self.agents_for_address(job.owner):
+            events.publish(
+                agent_id,
+                {
+                    "type": "event",
+                    "event": "tx_status",
+                    "message": render_tx_status({}, job.to_dict()),
+                    "job": job.to_dict(),
+                },
+            )
+
+    def publish_schedule_run(self, schedule) -> None:
+        """Push the outcome of a scheduled run to the agent's WebSocket connections"""
+        events.publish(
+            schedule.agent_id,
+            {
+                "type": "event",
+                "event": "schedule_run",
+                "message": f"Scheduled {schedule.function} ({schedule.spec}): "
+                f"{schedule.last_status}",
+                "schedule": schedule.to_dict(),
+            },
+        )
+
+    async def prepare_scheduled_agent(self, agent_id: str, environment: str) -> None:
+        """Schedules only run for agents initialized with their own key"""
+        if agent_id not in self.agents:
+            raise AgentUnavailable(
+                f"Agent {agent_id} is not initialized; the schedule resumes once it "
+                "is (a chat with its key or WARMUP_AGENTS)"
+            )
+
+    def check_agent_key(self, agent_id: str, private_key: str) -> None:
+        """An initialized agent only answers to the key it was created with"""
+        clients = self.agents.get(agent_id)
+        if clients is None:
+            return
+        known = clients["bank"].chain_client.private_key
+        if not hmac.compare_digest(_key_bytes(known), _key_bytes(private_key)):
+            raise AgentKeyMismatch(f"agent_key does not match agent {agent_id}")
 
     async def initialize_agent(
         self, agent_id: str, private_key: str, environment: str = "mainnet"
     ) -> None:
         """Initialize Injective clients if they don't exist"""
+        self.check_agent_key(agent_id, private_key)
         if agent_id not in self.agents:
             clients = await InjectiveClientFactory.create_all(
                 private_key=private_key, network_type=environment
             )
+            if os.getenv("ACCOUNT_STATE_CACHE", "false").lower() == "true":
+                # all modules share one chain client, so one cache serves them all
+                subaccounts = os.getenv("ACCOUNT_STATE_SUBACCOUNTS", "0").split(",")
+                clients["bank"].chain_client.enable_account_state(
+                    subaccount_indices=[int(i) for i in subaccounts if i.strip()]
+                )
             self.agents[agent_id] = clients
+            scheduler.agent_ready(agent_id)
 
     async def execute_function(
         self, function_name: str, arguments: dict, agent_id: str
     ) -> dict:
         """Execute the appropriate Injective function with error handling"""
         try:
+            # Paging through stored results is served by the agent itself
+            if function_name == "fetch_result_page":
+                return self.result_compactor.store.page(**arguments)
+
             # Get the client dictionary for this agent
             clients = self.agents.get(agent_id)
             if not clients:
@@ -72,9 +224,20 @@ class InjectiveChatAgent:
                     "error": "Agent not initialized. Please provide valid credentials."
                 }
 
-            return await FunctionExecutor.execute_function(
-                clients=clients, function_name=function_name, arguments=arguments
-            )
+            async def run():
+                return await FunctionExecutor.execute_function(
+                    clients=clients, function_name=function_name, arguments=arguments
+                )
+
+            # Reads are shared with in-flight/prefetched calls, writes invalidate them
+            if InjectiveFunctionMapper.is_read_only(function_name):
+                return await self.query_cache.get_or_fetch(
+                    make_query_key(agent_id, function_name, arguments), run
+                )
+            try:
+                return await run()
+            finally:
+                self.query_cache.invalidate(agent_id)
 
         except Exception as e:
             return {
@@ -83,6 +246,100 @@ class InjectiveChatAgent:
                 "details": {"function": function_name, "arguments": arguments},
             }
 
+    async def complete_function_call(
+        self,
+        session_id,
+        function_name,
+        function_args,
+        function_response,
+        plain_lookup=False,
+    ):
+        """Record a function call and its result, then answer the user.
+
+        plain_lookup marks a message that only asked for the result (the intent
+        parser matched it), which may then be rendered without the model.
+        """
+        # Add function call and response to conversation
+        self.conversations[session_id].append(
+            {
+                "role": "assistant",
+                "content": None,
+                "function_call": {
+                    "name": function_name,
+                    "arguments": json.dumps(function_args),
+                },
+            }
+        )
+
+        self.conversations[session_id].append(
+            {
+                "role": "function",
+                "name": function_name,
+                "content": json.dumps(
+                    self.result_compactor.compact(function_name, function_response),
+                    default=str,
+                ),
+            }
+        )
+
+        # Get final response, locally if the policy allows it
+        final_response = self.response_policy.render(
+            function_name, function_args, function_response, plain_lookup
+        )
+        if final_response is not None:
+            metrics.increment("completions_avoided")
+        else:
+            second_response = await asyncio.to_thread(
+                self.client.chat.completions.create,
+                model="gpt-4-turbo-preview",
+                messages=self.conversations[session_id],
+                max_tokens=2000,
+                temperature=0.7,
+            )
+            metrics.increment("completions_requested")
+            final_response = second_response.choices[0].message.content.strip()
+        self.conversations[session_id].append(
+            {"role": "assistant", "content": final_response}
+        )
+
+        return {
+            "response": final_response,
+            "function_call": {
+                "name": function_name,
+                "result": function_response,
+            },
+            "session_id": session_id,
+        }
+
+    async def try_fast_path(self, message, session_id, agent_id):
+        """Answer common read-only commands without the first completion.
+
+        Returns None when the message isn't recognised or the call failed, in
+        which case the model handles the message as usual.
+        """
+        intent = self.intent_parser.parse(message)
+        if intent is None or intent.confidence < self.fast_path_min_confidence:
+            return None
+        if not InjectiveFunctionMapper.is_read_only(intent.function_name):
+            return None
+        function_response = await self.execute_function(
+            intent.function_name, intent.arguments, agent_id
+        )
+        if not (
+            isinstance(function_response, dict)
+            and function_response.get("success") is True
+        ):
+            metrics.increment("fast_path_fallbacks")
+            return None
+        metrics.increment("fast_path_hits")
+        return await self.complete_function_call(
+            session_id,
+            intent.function_name,
+            intent.arguments,
+            function_response,
+            plain_lookup=True,
+        )
+
     async def get_response(
         self,
         message,
@@ -90,8 +347,12 @@ class InjectiveChatAgent:
         private_key=None,
         agent_id=None,
         environment="mainnet",
+        on_delta=None,
     ):
-        """Get response from OpenAI API."""
+        """Get response from OpenAI API.
+
+        on_delta, if given, is awaited with each streamed piece of answer text.
+        """
         await self.initialize_agent(
             agent_id=agent_id, private_key=private_key, environment=environment
         )
@@ -104,111 +365,121 @@ class InjectiveChatAgent:
             # Add user message to conversation history
             self.conversations[session_id].append({"role": "user", "content": message})
 
-            # Get response from OpenAI
-            response = await asyncio.to_thread(
-                self.client.chat.completions.create,
-                model="gpt-4o",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": """You are a helpful AI assistant on Injective Chain. 
-                    You will be answering all things related to injective chain, and help out with
-                    on-chain functions.
-                    
-                    When handling market IDs, always use these standardized formats:
-                    - For BTC perpetual: "BTC/USDT PERP" maps to "btcusdt-perp"
-                    - For ETH perpetual: "ETH/USDT PERP" maps to "ethusdt-perp"
-                    
-                    When users mention markets:
-                    1. If they use casual terms like "Bitcoin perpetual" or "BTC perp", interpret it as "BTC/USDT PERP"
-                    2. If they mention "Ethereum futures" or "ETH perpetual", interpret it as "ETH/USDT PERP"
-                    3. Always use the standardized format in your responses
-                    
-                    Before performing any action:
-                    1. Describe what you're about to do
-                    2. Ask for explicit confirmation
-                    3. Only proceed after receiving a "yes"
-                    
-                    When making function calls:
-                    1. Convert the standardized format (e.g., "BTC/USDT PERP") to the internal format (e.g., "btcusdt-perp")
-                    2. When displaying results to users, convert back to the standard format
-                    3. Always confirm before executing any functions
-                    
-                    For general questions, provide informative responses.
-                    When users want to perform actions, describe the action and ask for confirmation but for fetching data you dont have to ask for confirmation.""",
-                    }
-                ]
-                + self.conversations[session_id],
-                functions=self.function_schemas,
-                function_call="auto",
-                max_tokens=2000,
-                temperature=0.7,
-            )
+            fast_response = await self.try_fast_path(message, session_id, agent_id)
+            if fast_response is not None:
+                return fast_response
 
-            response_message = response.choices[0].message
-            print(response_message)
-            # Handle function calling
-            if (
-                hasattr(response_message, "function_call")
-                and response_message.function_call
+            # General questions opening a conversation may already have an
+            # answer on disk; anything later could depend on the earlier turns
+            cache_key = None
+            if len(self.conversations[session_id]) == 1 and is_cacheable_question(
+                message
             ):
-                # Extract function details
-                function_name = response_message.function_call.name
-                function_args = json.loads(response_message.function_call.arguments)
-                # Execute the function
-                function_response = await self.execute_function(
-                    function_name, function_args, agent_id
+                cache_key = self.completion_cache.make_key(
+                    message, SYSTEM_PROMPT_VERSION, self.tools_fingerprint
                 )
-
-                # Add function call and response to conversation
-                self.conversations[session_id].append(
-                    {
-                        "role": "assistant",
-                        "content": None,
-                        "function_call": {
-                            "name": function_name,
-                            "arguments": json.dumps(function_args),
-                        },
+                cached_answer = self.completion_cache.get(cache_key)
+                if cached_answer is not None:
+                    metrics.increment("completion_cache_hits")
+                    self.conversations[session_id].append(
+                        {"role": "assistant", "content": cached_answer}
+                    )
+                    return {
+                        "response": cached_answer,
+                        "function_call": None,
+                        "session_id": session_id,
                     }
-                )
 
-                self.conversations[session_id].append(
-                    {
-                        "role": "function",
-                        "name": function_name,
-                        "content": json.dumps(function_response),
-                    }
-                )
+            # Warm the query cache with likely reads while the model thinks
+            self.prefetcher.start(
+                message, self.conversations[session_id][:-1], agent_id
+            )
 
-                # Get final response
-                second_response = await asyncio.to_thread(
-                    self.client.chat.completions.create,
-                    model="gpt-4-turbo-preview",
-                    messages=self.conversations[session_id],
+            # Get response from OpenAI, streamed so read-only calls can start early
+            accumulator = FunctionCallAccumulator()
+            content_parts = []
+            early_call = None
+            try:
+                async for chunk in stream_chat_completion(
+                    self.client,
+                    model="gpt-4o",
+                    messages=[
+                        {
+                            "role": "system",
+                            "content": SYSTEM_PROMPT,
+                        }
+                    ]
+                    + self.conversations[session_id],
+                    functions=self.function_schemas,
+                    function_call="auto",
                     max_tokens=2000,
                     temperature=0.7,
+                ):
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta
+                    if delta.content:
+                        content_parts.append(delta.content)
+                        if on_delta is not None:
+                            await on_delta(delta.content)
+                    if not delta.function_call:
+                        continue
+                    if (
+                        accumulator.feed(delta.function_call)
+                        and early_call is None
+                        and InjectiveFunctionMapper.is_read_only(accumulator.name)
+                    ):
+                        # Write functions still wait for the full completion
+                        metrics.increment("early_function_calls")
+                        early_call = (
+                            accumulator.arguments,
+                            asyncio.create_task(
+                                self.execute_function(
+                                    accumulator.name, accumulator.arguments, agent_id
+                                )
+                            ),
+                        )
+            except Exception:
+                if early_call is not None:
+                    early_call[1].cancel()
+                raise
+
+            metrics.increment("completions_requested")
+            # Handle function calling
+            if accumulator.started:
+                # Extract function details
+                function_name = accumulator.name
+                function_args = accumulator.final_arguments()
+                metrics.increment("function_calls")
+                # Execute the function, unless it already ran during the stream
+                if early_call is not None and early_call[0] == function_args:
+                    function_response = await early_call[1]
+                else:
+                    if early_call is not None:
+                        early_call[1].cancel()
+                    function_response = await self.execute_function(
+                        function_name, function_args, agent_id
+                    )
+                # the message may ask more than the result shows, unless the
+                # intent parser recognises it as a plain lookup of this function
+                intent = self.intent_parser.parse(message)
+                return await self.complete_function_call(
+                    session_id,
+                    function_name,
+                    function_args,
+                    function_response,
+                    plain_lookup=intent is not None
+                    and intent.function_name == function_name,
                 )
 
-                final_response = second_response.choices[0].message.content.strip()
-                self.conversations[session_id].append(
-                    {"role": "assistant", "content": final_response}
-                )
-
-                return {
-                    "response": final_response,
-                    "function_call": {
-                        "name": function_name,
-                        "result": function_response,
-                    },
-                    "session_id": session_id,
-                }
-
             # Handle regular response
-            bot_message = response_message.content
+            bot_message = "".join(content_parts)
             if bot_message:
                 self.conversations[session_id].append(
                     {"role": "assistant", "content": bot_message}
                 )
+                if cache_key is not None and is_cacheable_answer(bot_message):
+                    self.completion_cache.put(cache_key, message, bot_message)
 
                 return {
                     "response": bot_message,
@@ -247,6 +518,11 @@ class InjectiveChatAgent:
 
 # Initialize chat agent
 agent = InjectiveChatAgent()
+tx_tracker.add_listener(agent.forget_reads_after_tx)
+tx_tracker.add_listener(agent.publish_tx_event)
+scheduler = Scheduler.from_env(agent.execute_function, agent.prepare_scheduled_agent)
+scheduler.add_listener(agent.publish_schedule_run)
+readiness = Readiness()
 
 
 @app.route("/ping", methods=["GET"])
@@ -257,6 +533,33 @@ async def ping():
     )
 
 
+@app.before_serving
+async def start_warm_up():
+    """Warm registries and agent clients in the background, tracked by /ready"""
+    app.warm_up_task = asyncio.create_task(warm_up(agent, readiness))
+    scheduler.start()
+
+
+@app.after_serving
+async def shutdown():
+    await close_http_session()
+    signing_executor.shutdown()
+    execution_engine.shutdown()
+    await scheduler.stop()
+
+
+@app.route("/ready", methods=["GET"])
+async def ready():
+    """Readiness check, 503 until the warm-up has finished"""
+    return jsonify(readiness.snapshot()), 200 if readiness.ready else 503
+
+
+@app.route("/metrics", methods=["GET"])
+async def metrics_endpoint():
+    """Request and LLM usage counters"""
+    return jsonify(metrics.snapshot())
+
+
 @app.route("/chat", methods=["POST"])
 async def chat_endpoint():
     """Main chat endpoint"""
@@ -280,11 +583,14 @@ async def chat_endpoint():
         session_id = data.get("session_id", "default")
         private_key = data.get("agent_key", "default")
         agent_id = data.get("agent_id", "default")
+        environment = data.get("environment", "mainnet")
         response = await agent.get_response(
-            data["message"], session_id, private_key, agent_id
+            data["message"], session_id, private_key, agent_id, environment
         )
 
         return jsonify(response)
+    except AgentKeyMismatch as e:
+        return jsonify({"error": str(e)}), 403
     except Exception as e:
         return (
             jsonify(
@@ -298,6 +604,233 @@ async def chat_endpoint():
         )
 
 
+@app.websocket("/ws")
+async def chat_socket():
+    """Persistent chat session.
+
+    The first frame binds the connection:
+        {"type": "bind", "session_id", "agent_id", "agent_key", "environment"}
+    after which the client only sends {"type": "chat", "id", "message"} (or
+    {"type": "ping"}). Answers come back as "delta" frames followed by a
+    "response" frame carrying the same id; several chats can be in flight at
+    once. Events published for the agent (e.g. tx confirmations) are pushed
+    as {"type": "event", ...} at any time.
+    """
+    try:
+        bind = json.loads(await websocket.receive())
+    except ValueError:
+        bind = {}
+    if (
+        not isinstance(bind, dict)
+        or bind.get("type") != "bind"
+        or not bind.get("agent_key")
+    ):
+        await websocket.send(
+            json.dumps({"type": "error", "error": "First frame must bind an agent"})
+        )
+        return
+
+    session_id = bind.get("session_id", "default")
+    agent_id = bind.get("agent_id", "default")
+    private_key = bind["agent_key"]
+    environment = bind.get("environment", "mainnet")
+    try:
+        await agent.initialize_agent(agent_id, private_key, environment)
+    except Exception as e:
+        await websocket.send(json.dumps({"type": "error", "error": str(e)}))
+        return
+
+    # responses and pushed events share one outbound queue per connection
+    outbound = events.subscribe(agent_id)
+    metrics.increment("ws_connections")
+
+    async def send_outbound():
+        while True:
+            frame = await outbound.get()
+            await websocket.send(json.dumps(frame, default=str))
+
+    async def handle_chat(frame):
+        message_id = frame.get("id")
+
+        async def on_delta(text):
+            await outbound.put({"type": "delta", "id": message_id, "content": text})
+
+        response = await agent.get_response(
+            frame.get("message", ""),
+            session_id,
+            private_key,
+            agent_id,
+            environment,
+            on_delta=on_delta,
+        )
+        await outbound.put({"type": "response", "id": message_id, **response})
+
+    sender = asyncio.create_task(send_outbound())
+    in_flight = set()
+    await outbound.put({"type": "bound", "session_id": session_id})
+    try:
+        while True:
+            try:
+                frame = json.loads(await websocket.receive())
+            except ValueError:
+                frame = None
+            if not isinstance(frame, dict):
+                await outbound.put(
+                    {"type": "error", "error": "Frames must be JSON objects"}
+                )
+                continue
+            if frame.get("type") == "chat":
+                metrics.increment("ws_messages")
+                task = asyncio.create_task(handle_chat(frame))
+                in_flight.add(task)
+                task.add_done_callback(in_flight.discard)
+            elif frame.get("type") == "ping":
+                await outbound.put({"type": "pong", "id": frame.get("id")})
+            else:
+                await outbound.put(
+                    {
+                        "type": "error",
+                        "error": f"Unknown frame type {frame.get('type')}",
+                    }
+                )
+    finally:
+        events.unsubscribe(agent_id, outbound)
+        for task in in_flight:
+            task.cancel()
+        sender.cancel()
+
+
+@app.route("/tx/<job_id>", methods=["GET"])
+async def tx_status_endpoint(job_id):
+    """Status of a broadcast transaction; ?wait=N waits up to N seconds for it"""
+    try:
+        wait = float(request.args.get("wait", 0))
+    except ValueError:
+        wait = -1
+    if not wait >= 0:
+        return jsonify({"error": "wait must be a number of seconds"}), 400
+    wait = min(wait, 30)
+    job = (
+        await tx_tracker.wait(job_id, timeout=wait) if wait else tx_tracker.get(job_id)
+    )
+    if job is None:
+        return jsonify({"error": f"No transaction job {job_id}"}), 404
+    return jsonify(job.to_dict())
+
+
+@app.route("/fanout", methods=["POST"])
+async def fanout_endpoint():
+    """Run one function for many agents, streaming NDJSON results as they finish.
+
+    Body: {"function", "arguments", "agents": [{"agent_id", "agent_key",
+    "environment"}], "environment", "concurrency"}
+    """
+    data = await request.get_json() or {}
+    function_name = data.get("function")
+    if function_name == "fetch_result_page" or not (
+        InjectiveFunctionMapper.validate_function(function_name)
+    ):
+        return jsonify({"error": f"Unknown function {function_name}"}), 400
+    try:
+        targets = resolve_targets(data.get("agents", []), data.get("environment"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        concurrency = int(data.get("concurrency", DEFAULT_CONCURRENCY))
+    except (TypeError, ValueError):
+        concurrency = 0
+    if concurrency < 1:
+        return jsonify({"error": "concurrency must be a positive integer"}), 400
+    try:
+        for target in targets:
+            if not target.get("error"):
+                agent.check_agent_key(target["agent_id"], target["private_key"])
+    except AgentKeyMismatch as e:
+        return jsonify({"error": str(e)}), 403
+    metrics.increment("fanout_requests")
+
+    async def stream():
+        async for record in fan_out(
+            agent,
+            targets,
+            function_name,
+            data.get("arguments") or {},
+            concurrency,
+        ):
+            yield json.dumps(record, default=str) + "\n"
+
+    return Response(stream(), mimetype="application/x-ndjson")
+
+
+@app.route("/schedules", methods=["POST"])
+async def create_schedule_endpoint():
+    """Call a function for an agent on a recurring schedule.
+
+    Body: {"function", "arguments", "schedule": cron spec or "@every 10m",
+    "agent": {"agent_id", "agent_key", "environment"},
+    "environment", "jitter_seconds", "missed_policy"}
+    """
+    data = await request.get_json() or {}
+    function_name = data.get("function")
+    if function_name == "fetch_result_page" or not (
+        InjectiveFunctionMapper.validate_function(function_name)
+    ):
+        return jsonify({"error": f"Unknown function {function_name}"}), 400
+    try:
+        target = resolve_targets([data.get("agent")], data.get("environment"))[0]
+        if target.get("error"):
+            raise ValueError(target["error"])
+        # keys are only kept in memory, never stored with the schedule
+        await agent.initialize_agent(
+            target["agent_id"], target["private_key"], target["environment"]
+        )
+        schedule = scheduler.add(
+            target["agent_id"],
+            target["environment"],
+            function_name,
+            data.get("arguments") or {},
+            data.get("schedule", ""),
+            float(data.get("jitter_seconds", 0)),
+            data.get("missed_policy", "run_once"),
+        )
+    except AgentKeyMismatch as e:
+        return jsonify({"error": str(e)}), 403
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(schedule.to_dict()), 201
+
+
+@app.route("/schedules", methods=["GET"])
+async def list_schedules_endpoint():
+    """Schedules, optionally only those of ?agent_id="""
+    schedules = scheduler.list(request.args.get("agent_id"))
+    return jsonify({"schedules": [schedule.to_dict() for schedule in schedules]})
+
+
+@app.route("/schedules/<schedule_id>", methods=["GET", "DELETE"])
+async def schedule_endpoint(schedule_id):
+    """Get or delete one schedule"""
+    schedule = (
+        scheduler.remove(schedule_id)
+        if request.method == "DELETE"
+        else scheduler.get(schedule_id)
+    )
+    if schedule is None:
+        return jsonify({"error": f"No schedule {schedule_id}"}), 404
+    return jsonify(schedule.to_dict())
+
+
+@app.route("/schedules/<schedule_id>/<action>", methods=["POST"])
+async def pause_schedule_endpoint(schedule_id, action):
+    """Pause or resume a schedule"""
+    if action not in ("pause", "resume"):
+        return jsonify({"error": f"Unknown action {action}"}), 404
+    schedule = scheduler.set_enabled(schedule_id, action == "resume")
+    if schedule is None:
+        return jsonify({"error": f"No schedule {schedule_id}"}), 404
+    return jsonify(schedule.to_dict())
+
+
 @app.route("/history", methods=["GET"])
 async def history_endpoint():
     """Get chat history endpoint"""
@@ -3,7 +3,6 @@ from typing import Dict, Literal, Optional
 from datetime import datetime
 import os
 import yaml
-from pyinjective.wallet import PrivateKey
 
 NetworkType = Literal["mainnet", "testnet"]
 
@@ -44,6 +43,9 @@ class AgentManager:
         if name in self.agents:
             raise ValueError(f"Agent '{name}' already exists")
 
+        # pyinjective is slow to import and only needed here
+        from pyinjective.wallet import PrivateKey
+
         # Generate new private key
         private_key = str(secrets.token_hex(32))
         inj_pub_key = (
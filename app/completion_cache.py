@@ -0,0 +1,204 @@
+"""On-disk cache of model answers to context-free informational questions."""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, List, Optional
+
+DEFAULT_PATH = ".cache/completions.sqlite3"
+DEFAULT_TTL_SECONDS = 24 * 3600
+DEFAULT_MAX_ENTRIES = 2000
+
+CONFIRMATIONS = {
+    "yes",
+    "y",
+    "yeah",
+    "yep",
+    "no",
+    "n",
+    "nope",
+    "ok",
+    "okay",
+    "sure",
+    "confirm",
+    "confirmed",
+    "proceed",
+    "cancel",
+    "stop",
+    "go",
+    "do it",
+}
+# words that make an answer depend on the account or on previous turns
+CONTEXT_WORDS = {
+    "i",
+    "im",
+    "me",
+    "my",
+    "mine",
+    "we",
+    "our",
+    "us",
+    "it",
+    "that",
+    "this",
+    "those",
+    "these",
+    "above",
+    "again",
+    "previous",
+}
+# requests to act, which must always reach the model and its tools
+ACTION_WORDS = {
+    "buy",
+    "sell",
+    "long",
+    "short",
+    "send",
+    "transfer",
+    "place",
+    "cancel",
+    "close",
+    "open",
+    "stake",
+    "unstake",
+    "delegate",
+    "undelegate",
+    "withdraw",
+    "deposit",
+    "swap",
+    "bid",
+    "mint",
+    "burn",
+    "create",
+    "execute",
+    "start",
+    "schedule",
+}
+# openings of follow-ups to an earlier answer
+FOLLOW_UP_WORDS = {"and", "but", "so", "also", "then", "why", "what about"}
+ADDRESS_PATTERN = re.compile(r"\b(inj1[0-9a-z]{38}|0x[0-9a-fA-F]{8,})")
+
+
+def normalize_message(message: str) -> str:
+    text = message.lower().replace("’", "'").replace("'", "")
+    text = re.sub(r"[^\w\s/-]", " ", text)
+    return " ".join(text.split())
+
+
+def fingerprint(payload: Any) -> str:
+    """Stable short hash of a JSON-serializable value (e.g. the tool schemas)"""
+    text = json.dumps(payload, sort_keys=True, default=str)
+    return hashlib.sha256(text.encode()).hexdigest()[:16]
+
+
+def is_cacheable_question(message: str) -> bool:
+    normalized = normalize_message(message)
+    words = normalized.split()
+    if len(words) < 3 or normalized in CONFIRMATIONS:
+        return False
+    if ADDRESS_PATTERN.search(message):
+        return False
+    if words[0] in FOLLOW_UP_WORDS or " ".join(words[:2]) in FOLLOW_UP_WORDS:
+        return False
+    return not any(word in CONTEXT_WORDS or word in ACTION_WORDS for word in words)
+
+
+def is_cacheable_answer(answer: Optional[str]) -> bool:
+    return bool(answer) and not ADDRESS_PATTERN.search(answer)
+
+
+class CompletionCache:
+    """sqlite backed cache with a TTL and an LRU size limit"""
+
+    def __init__(
+        self,
+        path: str = DEFAULT_PATH,
+        ttl_seconds: int = DEFAULT_TTL_SECONDS,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ) -> None:
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("""CREATE TABLE IF NOT EXISTS completions (
+                key TEXT PRIMARY KEY,
+                message TEXT NOT NULL,
+                answer TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used_at REAL NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0
+            )""")
+        self._db.commit()
+
+    @classmethod
+    def from_env(cls) -> "CompletionCache":
+        return cls(
+            os.getenv("COMPLETION_CACHE_PATH", DEFAULT_PATH),
+            int(os.getenv("COMPLETION_CACHE_TTL", str(DEFAULT_TTL_SECONDS))),
+            int(os.getenv("COMPLETION_CACHE_MAX_ENTRIES", str(DEFAULT_MAX_ENTRIES))),
+        )
+
+    @staticmethod
+    def make_key(message: str, prompt_version: str, tools_fingerprint: str) -> str:
+        parts: List[str] = [
+            normalize_message(message),
+            prompt_version,
+            tools_fingerprint,
+        ]
+        return hashlib.sha256("\x1f".join(parts).encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT answer, created_at FROM completions WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            answer, created_at = row
+            if now - created_at > self.ttl_seconds:
+                self._db.execute("DELETE FROM completions WHERE key = ?", (key,))
+                self._db.commit()
+                return None
+            self._db.execute(
+                "UPDATE completions SET last_used_at = ?, hits = hits + 1 WHERE key = ?",
+                (now, key),
+            )
+            self._db.commit()
+            return answer
+
+    def put(self, key: str, message: str, answer: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO completions "
+                "(key, message, answer, created_at, last_used_at, hits) "
+                "VALUES (?, ?, ?, ?, ?, 0)",
+                (key, normalize_message(message), answer, now, now),
+            )
+            self._db.execute(
+                "DELETE FROM completions WHERE created_at < ?",
+                (now - self.ttl_seconds,),
+            )
+            self._db.execute(
+                "DELETE FROM completions WHERE key NOT IN "
+                "(SELECT key FROM completions ORDER BY last_used_at DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+            self._db.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM completions")
+            self._db.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM completions").fetchone()[0]
@@ -0,0 +1,40 @@
+"""In-process pub/sub pushing server events to an agent's WebSocket connections."""
+
+import asyncio
+from collections import defaultdict
+from typing import Dict, Set
+
+MAX_QUEUED_EVENTS = 256
+
+
+class EventHub:
+    def __init__(self) -> None:
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = defaultdict(set)
+
+    def subscribe(self, agent_id: str) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=MAX_QUEUED_EVENTS)
+        self._subscribers[agent_id].add(queue)
+        return queue
+
+    def unsubscribe(self, agent_id: str, queue: asyncio.Queue) -> None:
+        subscribers = self._subscribers.get(agent_id)
+        if subscribers is None:
+            return
+        subscribers.discard(queue)
+        if not subscribers:
+            del self._subscribers[agent_id]
+
+    def publish(self, agent_id: str, event: Dict) -> int:
+        """Queue an event for every connection of the agent; returns how many got it"""
+        delivered = 0
+        for queue in list(self._subscribers.get(agent_id, ())):
+            try:
+                queue.put_nowait(event)
+                delivered += 1
+            except asyncio.QueueFull:
+                # a stalled client shouldn't hold up the publisher
+                print(f"Dropping event for {agent_id}: subscriber queue is full")
+        return delivered
+
+
+events = EventHub()
@@ -0,0 +1,105 @@
+"""Run one function call for many agents at once (the /fanout endpoint)."""
+
+import asyncio
+import os
+import time
+from typing import AsyncIterator, Dict, List
+
+DEFAULT_CONCURRENCY = int(os.getenv("FANOUT_CONCURRENCY", "16"))
+MAX_CONCURRENCY = 128
+
+
+def resolve_targets(agents: List[Dict], environment: str = None) -> List[Dict]:
+    """Turn the request's agents into [{agent_id, private_key, environment, name}].
+
+    Each item carries its own credentials, {"agent_id", "agent_key",
+    "environment"}, the same as a /chat request; keys are never looked up
+    on the server. Items without a key are kept with an "error" so they show
+    up in the results.
+    """
+    if not isinstance(agents, list):
+        raise ValueError('"agents" must be a list of {"agent_id", "agent_key"}')
+    targets = []
+    for entry in agents:
+        if not isinstance(entry, dict):
+            targets.append(
+                {
+                    "name": None,
+                    "agent_id": entry,
+                    "error": "Agents must be given as {agent_id, agent_key}",
+                }
+            )
+            continue
+        target = {
+            "name": entry.get("name"),
+            "agent_id": entry.get("agent_id"),
+            "private_key": entry.get("agent_key"),
+            "environment": entry.get("environment", environment or "mainnet"),
+        }
+        if not target["agent_id"] or not target["private_key"]:
+            target["error"] = "No agent_id or agent_key"
+        targets.append(target)
+    return targets
+
+
+async def fan_out(
+    chat_agent,
+    targets: List[Dict],
+    function_name: str,
+    arguments: dict,
+    concurrency: int = DEFAULT_CONCURRENCY,
+) -> AsyncIterator[Dict]:
+    """Yield one result record per target as calls finish, then a summary"""
+    semaphore = asyncio.Semaphore(max(1, min(concurrency, MAX_CONCURRENCY)))
+    started = time.monotonic()
+
+    async def run(target: Dict) -> Dict:
+        record = {
+            "type": "result",
+            "agent_id": target.get("agent_id"),
+            "name": target.get("name"),
+        }
+        if target.get("error") or not target.get("private_key"):
+            return {
+                **record,
+                "success": False,
+                "error": target.get("error", "No agent key"),
+            }
+        async with semaphore:
+            call_started = time.monotonic()
+            try:
+                await chat_agent.initialize_agent(
+                    target["agent_id"], target["private_key"], target["environment"]
+                )
+                result = await chat_agent.execute_function(
+                    function_name, dict(arguments), target["agent_id"]
+                )
+            except Exception as e:
+                result = {"success": False, "error": str(e)}
+        return {
+            **record,
+            "success": bool(result.get("success", "error" not in result)),
+            "seconds": round(time.monotonic() - call_started, 3),
+            **result,
+        }
+
+    tasks = [asyncio.create_task(run(target)) for target in targets]
+    succeeded = 0
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            record = await next_done
+            succeeded += record["success"]
+            yield record
+    finally:
+        # the client went away mid-stream, don't keep working for it
+        for task in tasks:
+            task.cancel()
+
+    yield {
+        "type": "summary",
+        "function": function_name,
+        "total": len(targets),
+        "succeeded": succeeded,
+        "failed": len(targets) - succeeded,
+        "seconds": round(time.monotonic() - started, 3),
+    }
@@ -0,0 +1,233 @@
+"""Deterministic parser mapping frequent read-only chat commands to function calls."""
+
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from injective_functions.utils.indexer_requests import extract_market_info
+
+FILLER_WORDS = {
+    "a",
+    "all",
+    "an",
+    "are",
+    "can",
+    "check",
+    "current",
+    "currently",
+    "display",
+    "do",
+    "fetch",
+    "for",
+    "get",
+    "give",
+    "have",
+    "how",
+    "i",
+    "in",
+    "is",
+    "list",
+    "me",
+    "much",
+    "my",
+    "now",
+    "of",
+    "on",
+    "please",
+    "pls",
+    "see",
+    "show",
+    "tell",
+    "the",
+    "what",
+    "whats",
+    "you",
+}
+PERP_WORDS = {"perp", "perps", "perpetual", "future", "futures", "swap"}
+BALANCE_WORDS = {"balance", "balances"}
+ORDER_WORDS = {"order", "orders"}
+QUOTE_ASSETS = {"USDT", "USDC", "INJ"}
+PRICE_WORDS = {"price", "mid", "midprice", "tob", "quote"}
+# "BTC" could be the spot or the perp market, below the default fast path threshold
+IMPLICIT_MARKET_CONFIDENCE = 0.8
+KEYWORDS = (
+    BALANCE_WORDS
+    | ORDER_WORDS
+    | PRICE_WORDS
+    | {
+        "spendable",
+        "deposit",
+        "deposits",
+        "subaccount",
+        "open",
+        "auction",
+        "latest",
+        "spot",
+        "bank",
+        "wallet",
+    }
+)
+
+
+@dataclass
+class Intent:
+    function_name: str
+    arguments: Dict = field(default_factory=dict)
+    # 1.0 when everything was explicit, lower when a default had to be assumed
+    confidence: float = 1.0
+
+
+def _tokenize(message: str) -> List[str]:
+    text = message.lower().replace("'", "")
+    text = re.sub(r"[?!.,;:]", " ", text)
+    return [token for token in text.split() if token not in FILLER_WORDS]
+
+
+def parse_market(tokens: List[str]) -> Optional[Dict]:
+    """Turn 1-3 market tokens (e.g. ['btc', 'perp']) into the internal market format"""
+    if not tokens or len(tokens) > 3:
+        return None
+    is_spot = "spot" in tokens
+    is_perp = any(token in PERP_WORDS for token in tokens)
+    core = [t for t in tokens if t != "spot" and t not in PERP_WORDS]
+    if not core or len(core) > 2 or any(t in KEYWORDS for t in core):
+        return None
+    symbol = "/".join(core)
+    if len(core) == 1 and "/" not in symbol and "-" not in symbol:
+        # a lone quote asset like "inj" would otherwise parse as an empty base
+        candidates = (symbol, f"{symbol}/usdt")
+    else:
+        candidates = (symbol,)
+    for candidate in candidates:
+        try:
+            base, quote, market_type = extract_market_info(candidate)
+            break
+        except ValueError:
+            continue
+    else:
+        return None
+    if quote not in QUOTE_ASSETS:
+        return None
+    is_perp = is_perp or market_type == "PERP"
+    if is_spot and is_perp:
+        return None
+    # bare symbols ("ETH") default to the perpetual market, like the system prompt
+    is_derivative = not is_spot
+    market_id = f"{base}{quote}".lower() + ("-perp" if is_derivative else "")
+    return {
+        "market_id": market_id,
+        "is_derivative": is_derivative,
+        "explicit": is_spot or is_perp,
+    }
+
+
+def _subaccount(tokens: List[str]) -> Optional[int]:
+    """Parse an optional trailing 'subaccount N'; returns None if tokens don't fit"""
+    if not tokens:
+        return 0
+    if len(tokens) == 2 and tokens[0] == "subaccount" and tokens[1].isdigit():
+        return int(tokens[1])
+    return None
+
+
+class IntentParser:
+    """Maps a chat message to a read-only function call, or None"""
+
+    def parse(self, message: str) -> Optional[Intent]:
+        if not message or len(message) > 120:
+            return None
+        tokens = _tokenize(message)
+        if not tokens:
+            return None
+        for rule in (
+            self._balances,
+            self._deposits,
+            self._auction,
+            self._mid_price,
+            self._open_orders,
+        ):
+            intent = rule(tokens)
+            if intent is not None:
+                return intent
+        return None
+
+    def _balances(self, tokens: List[str]) -> Optional[Intent]:
+        if tokens[-1] not in BALANCE_WORDS:
+            return None
+        rest = tokens[:-1]
+        if rest in ([], ["bank"], ["wallet"]):
+            return Intent("query_balances")
+        if rest == ["spendable"]:
+            return Intent("query_spendable_balances")
+        return None
+
+    def _deposits(self, tokens: List[str]) -> Optional[Intent]:
+        if "deposits" not in tokens and "deposit" not in tokens:
+            return None
+        position = tokens.index("deposits" if "deposits" in tokens else "deposit")
+        before, after = tokens[:position], tokens[position + 1 :]
+        if before == ["subaccount"]:
+            before = []
+        if before:
+            return None
+        subaccount_idx = _subaccount(after)
+        if subaccount_idx is None:
+            return None
+        return Intent("get_subaccount_deposits", {"subaccount_idx": subaccount_idx})
+
+    def _auction(self, tokens: List[str]) -> Optional[Intent]:
+        if tokens in (["auction"], ["latest", "auction"]):
+            return Intent("fetch_latest_auction")
+        return None
+
+    def _mid_price(self, tokens: List[str]) -> Optional[Intent]:
+        price_tokens = [t for t in tokens if t in PRICE_WORDS]
+        if not price_tokens or "price" not in tokens and "tob" not in tokens:
+            return None
+        market_tokens = [t for t in tokens if t not in PRICE_WORDS]
+        # price words have to be contiguous, at the start or the end
+        n = len(price_tokens)
+        if tokens[:n] != price_tokens and tokens[-n:] != price_tokens:
+            return None
+        market = parse_market(market_tokens)
+        if market is None:
+            return None
+        function_name = (
+            "get_mid_price_and_tob_derivatives_market"
+            if market["is_derivative"]
+            else "get_mid_price_and_tob_spot_market"
+        )
+        return Intent(
+            function_name,
+            {"market_id": market["market_id"]},
+            1.0 if market["explicit"] else IMPLICIT_MARKET_CONFIDENCE,
+        )
+
+    def _open_orders(self, tokens: List[str]) -> Optional[Intent]:
+        if not any(t in ORDER_WORDS for t in tokens):
+            return None
+        order_tokens = [t for t in tokens if t in ORDER_WORDS or t == "open"]
+        n = len(order_tokens)
+        if tokens[:n] == order_tokens:
+            rest = tokens[n:]
+        elif tokens[-n:] == order_tokens:
+            rest = tokens[:-n]
+        else:
+            return None
+        subaccount_idx = 0
+        if len(rest) > 2 and rest[-2] == "subaccount":
+            subaccount_idx = _subaccount(rest[-2:])
+            rest = rest[:-2]
+        market = parse_market(rest)
+        if market is None or subaccount_idx is None:
+            return None
+        function_name = (
+            "trader_derivative_orders"
+            if market["is_derivative"]
+            else "trader_spot_orders"
+        )
+        return Intent(
+            function_name,
+            {"market_id": market["market_id"], "subaccount_idx": subaccount_idx},
+            1.0 if market["explicit"] else IMPLICIT_MARKET_CONFIDENCE,
+        )
@@ -0,0 +1,31 @@
+import threading
+import time
+from collections import defaultdict
+from typing import Dict
+
+
+class Metrics:
+    """Process wide counters exposed on the /metrics endpoint"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counters: Dict[str, int] = defaultdict(int)
+        self.started_at = time.time()
+
+    def increment(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            self._counters[name] += value
+
+    def get(self, name: str) -> int:
+        return self._counters.get(name, 0)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            counters = dict(self._counters)
+        return {
+            "uptime_seconds": int(time.time() - self.started_at),
+            "counters": counters,
+        }
+
+
+metrics = Metrics()
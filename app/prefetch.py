@@ -0,0 +1,142 @@
+"""Speculative reads started while the first completion is running."""
+
+import asyncio
+import json
+import re
+from typing import Awaitable, Callable, Dict, List, Tuple
+
+from app.intent_parser import PERP_WORDS, QUOTE_ASSETS, parse_market
+from app.metrics import metrics
+
+MAX_PREFETCHES = 4
+HISTORY_WINDOW = 6
+
+TRADE_WORDS = {
+    "buy",
+    "sell",
+    "long",
+    "short",
+    "order",
+    "orders",
+    "trade",
+    "position",
+    "positions",
+    "close",
+    "limit",
+    "market",
+    "leverage",
+    "margin",
+    "cancel",
+}
+TRANSFER_WORDS = {
+    "send",
+    "transfer",
+    "deposit",
+    "withdraw",
+    "bid",
+    "stake",
+    "delegate",
+    "balance",
+    "balances",
+    "funds",
+}
+ACCOUNT_WORDS = {"account", "portfolio", "positions", "overview", "snapshot"}
+
+Call = Tuple[str, Dict]
+
+
+def _mentioned_markets(message: str) -> List[Dict]:
+    """Markets named explicitly: 'BTC perp', 'eth/usdt', 'INJ' (upper case)"""
+    raw_tokens = re.sub(r"[?!.,;:]", " ", message).split()
+    tokens = [token.lower() for token in raw_tokens]
+    markets = []
+    for i, token in enumerate(tokens):
+        following = tokens[i + 1] if i + 1 < len(tokens) else ""
+        if following in PERP_WORDS or following == "spot":
+            candidate = [token, following]
+        elif "/" in token or token.endswith(tuple(q.lower() for q in QUOTE_ASSETS)):
+            candidate = [token]
+        elif raw_tokens[i].isupper() and len(raw_tokens[i]) >= 2:
+            candidate = [token]
+        else:
+            continue
+        market = parse_market(candidate)
+        if market is not None and market not in markets:
+            markets.append(market)
+    return markets
+
+
+def _recent_calls(history: List[Dict]) -> List[Call]:
+    calls = []
+    for entry in history[-HISTORY_WINDOW:]:
+        function_call = entry.get("function_call")
+        if entry.get("role") == "assistant" and function_call:
+            try:
+                arguments = json.loads(function_call.get("arguments") or "{}")
+            except ValueError:
+                continue
+            calls.append((function_call.get("name"), arguments))
+    return calls
+
+
+def plan_prefetch(message: str, history: List[Dict]) -> List[Call]:
+    """Pick read-only calls the coming function call is likely to need"""
+    words = set(re.sub(r"[^\w\s]", " ", message.lower()).split())
+    recent = _recent_calls(history)
+    markets = _mentioned_markets(message)
+    if not markets and words & TRADE_WORDS:
+        # "close it", "buy more": assume the market from the last tool call
+        for _, arguments in reversed(recent):
+            market = (
+                parse_market([arguments["market_id"]])
+                if isinstance(arguments.get("market_id"), str)
+                else None
+            )
+            if market is not None:
+                markets.append(market)
+                break
+
+    calls: List[Call] = []
+    if words & ACCOUNT_WORDS:
+        calls.append(("get_account_snapshot", {}))
+    if words & TRADE_WORDS:
+        calls.append(("get_subaccount_deposits", {"subaccount_idx": 0}))
+    if words & TRANSFER_WORDS:
+        calls.append(("query_balances", {}))
+    for market in markets:
+        function_name = (
+            "get_mid_price_and_tob_derivatives_market"
+            if market["is_derivative"]
+            else "get_mid_price_and_tob_spot_market"
+        )
+        calls.append((function_name, {"market_id": market["market_id"]}))
+    unique = []
+    for call in calls:
+        if call not in unique:
+            unique.append(call)
+    return unique[:MAX_PREFETCHES]
+
+
+class Prefetcher:
+    """Runs planned reads in the background and forgets about them"""
+
+    def __init__(self, execute: Callable[[str, Dict, str], Awaitable[Dict]]) -> None:
+        self.execute = execute
+        self._tasks = set()
+
+    def start(self, message: str, history: List[Dict], agent_id: str) -> int:
+        calls = plan_prefetch(message, history)
+        for function_name, arguments in calls:
+            task = asyncio.create_task(self._run(function_name, arguments, agent_id))
+            # keep a reference so the task isn't garbage collected mid-flight
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        if calls:
+            metrics.increment("prefetch_started", len(calls))
+        return len(calls)
+
+    async def _run(self, function_name: str, arguments: Dict, agent_id: str) -> None:
+        try:
+            await self.execute(function_name, arguments, agent_id)
+        except Exception as e:
+            print(f"Prefetch of {function_name} failed: {e}")
@@ -0,0 +1,146 @@
+"""Short lived, per agent cache of read-only function results."""
+
+import asyncio
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from app.metrics import metrics
+
+DEFAULT_TTL_SECONDS = 5.0
+DEFAULT_MAX_ENTRIES = 4096
+# prices move faster than balances
+TTL_OVERRIDES = {
+    "get_mid_price_and_tob_derivatives_market": 2.0,
+    "get_mid_price_and_tob_spot_market": 2.0,
+    "get_derivatives_orderbook": 2.0,
+    "get_spot_orderbook": 2.0,
+    # tx status changes from pending to final, always ask the tracker
+    "get_tx_status": 0.0,
+    # executions progress in the background
+    "get_execution_status": 0.0,
+    "list_executions": 0.0,
+}
+
+CacheKey = Tuple[str, str, str]
+
+
+def make_key(agent_id: str, function_name: str, arguments: Dict) -> CacheKey:
+    return (agent_id, function_name, json.dumps(arguments, sort_keys=True, default=str))
+
+
+class QueryCache:
+    def __init__(
+        self,
+        default_ttl: float = DEFAULT_TTL_SECONDS,
+        ttl_overrides: Dict[str, float] = None,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ) -> None:
+        self.default_ttl = default_ttl
+        self.ttl_overrides = dict(
+            TTL_OVERRIDES if ttl_overrides is None else ttl_overrides
+        )
+        self.max_entries = max_entries
+        # least recently used first
+        self._entries: "OrderedDict[CacheKey, Tuple[float, Any]]" = OrderedDict()
+        self._in_flight: Dict[CacheKey, "asyncio.Future"] = {}
+        self._next_sweep = 0.0
+
+    @classmethod
+    def from_env(cls) -> "QueryCache":
+        return cls(
+            float(os.getenv("QUERY_CACHE_TTL", str(DEFAULT_TTL_SECONDS))),
+            max_entries=int(
+                os.getenv("QUERY_CACHE_MAX_ENTRIES", str(DEFAULT_MAX_ENTRIES))
+            ),
+        )
+
+    def ttl_for(self, function_name: str) -> float:
+        return min(
+            self.ttl_overrides.get(function_name, self.default_ttl), self.default_ttl
+        )
+
+    def peek(self, key: CacheKey) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if time.monotonic() > expires_at:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _store(self, key: CacheKey, value: Any) -> None:
+        ttl = self.ttl_for(key[1])
+        if ttl <= 0:
+            return
+        now = time.monotonic()
+        if now >= self._next_sweep:
+            # keys that are never read again would otherwise stay forever
+            for stale in [
+                k for k, (expires_at, _) in self._entries.items() if now > expires_at
+            ]:
+                del self._entries[stale]
+            self._next_sweep = now + self.default_ttl
+        self._entries[key] = (now + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get_or_fetch(
+        self, key: CacheKey, fetch: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """Return a cached result, join an in-flight call, or run fetch()"""
+        cached = self.peek(key)
+        if cached is not None:
+            metrics.increment("query_cache_hits")
+            return cached
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            metrics.increment("query_cache_joined")
+            try:
+                return await asyncio.shield(in_flight)
+            except asyncio.CancelledError:
+                # the call we joined was cancelled, not us: run it ourselves
+                if not in_flight.cancelled() or asyncio.current_task().cancelling():
+                    raise
+                return await self.get_or_fetch(key, fetch)
+
+        metrics.increment("query_cache_misses")
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            result = await fetch()
+        except Exception as e:
+            future.set_exception(e)
+            # nobody else may be waiting, don't warn about an unretrieved exception
+            future.exception()
+            raise
+        except BaseException:
+            # cancelled: release the joiners instead of leaving them waiting
+            future.cancel()
+            raise
+        else:
+            future.set_result(result)
+            # only successful reads are worth keeping
+            if (
+                self._in_flight.get(key) is future
+                and isinstance(result, dict)
+                and result.get("success") is True
+            ):
+                self._store(key, result)
+            return result
+        finally:
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+
+    def invalidate(self, agent_id: str) -> None:
+        """Drop everything cached for an agent, e.g. after it sent a transaction"""
+        for key in [k for k in self._entries if k[0] == agent_id]:
+            del self._entries[key]
+        # in-flight reads may predate the write, don't let them repopulate
+        for key in [k for k in self._in_flight if k[0] == agent_id]:
+            del self._in_flight[key]
@@ -0,0 +1,172 @@
+"""Template answers for simple read results, skipping the second completion."""
+
+import os
+from typing import Any, Callable, Dict, Optional
+
+from injective_functions.utils.function_helper import InjectiveFunctionMapper
+from injective_functions.utils.indexer_requests import normalize_ticker
+
+# well known denoms rendered with their symbol
+DENOM_SYMBOLS = {
+    "inj": "INJ",
+    "peggy0xdAC17F958D2ee523a2206206994597C13D831ec7": "USDT",
+    "peggy0x2260FAC5E5542a773Aa44fBCfeDf7C193bc2C599": "WBTC",
+    "peggy0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2": "WETH",
+}
+
+
+def denom_label(denom: str) -> str:
+    return DENOM_SYMBOLS.get(denom, denom)
+
+
+def market_label(market_id: str) -> str:
+    """Display name for a market argument, e.g. 'btcusdt-perp' -> 'BTC/USDT PERP'"""
+    if not market_id or market_id.startswith("0x"):
+        return market_id
+    try:
+        return normalize_ticker(market_id)
+    except ValueError:
+        return market_id
+
+
+def render_balances(arguments: Dict, result: Dict) -> str:
+    if not result:
+        return "There are no balances on this account."
+    lines = [f"- {amount} {denom_label(denom)}" for denom, amount in result.items()]
+    return "Here are your balances:\n" + "\n".join(lines)
+
+
+def render_spendable_balances(arguments: Dict, result: Dict) -> str:
+    if not result:
+        return "There are no spendable balances on this account."
+    lines = [f"- {amount} {denom_label(denom)}" for denom, amount in result.items()]
+    return "Here are your spendable balances:\n" + "\n".join(lines)
+
+
+def render_deposits(arguments: Dict, result: Dict) -> str:
+    subaccount = arguments.get("subaccount_idx", 0)
+    if not result:
+        return f"Subaccount {subaccount} has no deposits."
+    lines = [
+        f"- {denom_label(denom)}: {deposit['available_balance']} available, "
+        f"{deposit['total_balance']} total"
+        for denom, deposit in result.items()
+    ]
+    return f"Deposits in subaccount {subaccount}:\n" + "\n".join(lines)
+
+
+def render_mid_price_and_tob(arguments: Dict, result: Dict) -> Optional[str]:
+    mid = result.get("midPrice")
+    if not mid:
+        return None
+    market = market_label(arguments.get("market_id", ""))
+    text = f"The mid price of {market} is {mid}."
+    bid, ask = result.get("bestBuyPrice"), result.get("bestSellPrice")
+    if bid and ask:
+        text += f" Best bid is {bid} and best ask is {ask}."
+    return text
+
+
+def render_latest_auction(arguments: Dict, result: Dict) -> str:
+    text = f"The latest auction is round {result.get('round')}."
+    if result.get("winner"):
+        text += f" The current highest bid is {result.get('winnerBidAmount')} by {result['winner']}."
+    return text
+
+
+def render_tx_status(arguments: Dict, result: Dict) -> str:
+    tx_hash = result.get("tx_hash")
+    status = result.get("status")
+    if status == "pending":
+        return f"Transaction {tx_hash} is still pending."
+    if status == "confirmed":
+        return (
+            f"Transaction {tx_hash} was confirmed at height {result.get('height')}, "
+            f"using {result.get('gas_used')} gas."
+        )
+    if status == "timeout":
+        return f"Transaction {tx_hash} was not found on chain before the timeout."
+    return f"Transaction {tx_hash} failed: {result.get('raw_log') or 'unknown error'}"
+
+
+TEMPLATES: Dict[str, Callable[[Dict, Any], Optional[str]]] = {
+    "query_balances": render_balances,
+    "query_spendable_balances": render_spendable_balances,
+    "get_subaccount_deposits": render_deposits,
+    "get_mid_price_and_tob_derivatives_market": render_mid_price_and_tob,
+    "get_mid_price_and_tob_spot_market": render_mid_price_and_tob,
+    "fetch_latest_auction": render_latest_auction,
+    "get_tx_status": render_tx_status,
+}
+
+
+class ResponsePolicy:
+    """Decides whether a function result is rendered locally or by the model.
+
+    Modes per function:
+      "auto"  - render locally when a template exists, the call succeeded and
+                the message was a plain lookup (one the intent parser matched),
+                so questions that need reasoning about the result still get it
+      "local" - always render locally (errors get a generic message)
+      "llm"   - always ask the model
+    Write functions always go to the model.
+    """
+
+    MODES = ("auto", "local", "llm")
+
+    def __init__(
+        self,
+        default_mode: str = "auto",
+        overrides: Dict[str, str] = None,
+        templates: Dict[str, Callable[[Dict, Any], Optional[str]]] = None,
+    ) -> None:
+        if default_mode not in self.MODES:
+            raise ValueError(f"Unknown response mode {default_mode}")
+        self.default_mode = default_mode
+        self.overrides = dict(overrides or {})
+        self.templates = dict(TEMPLATES if templates is None else templates)
+
+    @classmethod
+    def from_env(cls) -> "ResponsePolicy":
+        """Build from RESPONSE_RENDER_MODE and RESPONSE_RENDER_OVERRIDES (fn=mode,fn=mode)"""
+        overrides = {}
+        for item in os.getenv("RESPONSE_RENDER_OVERRIDES", "").split(","):
+            if "=" in item:
+                name, mode = item.split("=", 1)
+                if mode.strip() in cls.MODES:
+                    overrides[name.strip()] = mode.strip()
+        return cls(os.getenv("RESPONSE_RENDER_MODE", "auto"), overrides)
+
+    def mode_for(self, function_name: str) -> str:
+        return self.overrides.get(function_name, self.default_mode)
+
+    def render(
+        self,
+        function_name: str,
+        arguments: Dict,
+        response: Any,
+        plain_lookup: bool = False,
+    ) -> Optional[str]:
+        """Return a locally rendered answer, or None if the model should answer"""
+        if not InjectiveFunctionMapper.is_read_only(function_name):
+            return None
+        mode = self.mode_for(function_name)
+        template = self.templates.get(function_name)
+        if mode == "llm" or template is None:
+            return None
+        if mode == "auto" and not plain_lookup:
+            return None
+
+        succeeded = isinstance(response, dict) and response.get("success") is True
+        if not succeeded:
+            if mode == "local":
+                error = (
+                    response.get("error") if isinstance(response, dict) else response
+                )
+                return f"I couldn't complete {function_name}: {error}"
+            return None
+        try:
+            return template(arguments, response.get("result"))
+        except (AttributeError, KeyError, TypeError):
+            # unexpected result shape, let the model deal with it
+            return None
@@ -0,0 +1,263 @@
+"""Shrinks function results to a token budget before they reach the LLM."""
+
+import json
+import time
+import uuid
+from collections import OrderedDict
+from decimal import Decimal, InvalidOperation
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+DEFAULT_TOKEN_BUDGET = 1500
+DEFAULT_LIST_ITEMS = 10
+MAX_STRING_CHARS = 200
+
+
+def estimate_tokens(payload: Any) -> int:
+    """Cheap token estimate (~4 chars per token for JSON)"""
+    text = payload if isinstance(payload, str) else json.dumps(payload, default=str)
+    return len(text) // 4 + 1
+
+
+def _to_decimal(value: Any) -> Optional[Decimal]:
+    try:
+        return Decimal(str(value))
+    except (InvalidOperation, ValueError, TypeError):
+        return None
+
+
+def _truncate(value: Any, max_items: int) -> Any:
+    """Recursively cap lists/dicts at max_items, recording what was dropped"""
+    if isinstance(value, list):
+        items = [_truncate(item, max_items) for item in value[:max_items]]
+        if len(value) > max_items:
+            items.append({"_omitted": len(value) - max_items, "_total": len(value)})
+        return items
+    if isinstance(value, dict):
+        keys = list(value.keys())
+        compacted = {key: _truncate(value[key], max_items) for key in keys[:max_items]}
+        if len(keys) > max_items:
+            compacted["_omitted_keys"] = len(keys) - max_items
+        return compacted
+    if isinstance(value, str) and len(value) > MAX_STRING_CHARS:
+        return value[:MAX_STRING_CHARS] + "..."
+    return value
+
+
+# ----------------------------------------------------------------------
+# per-function projections: take the "result" field, return a compact view
+# ----------------------------------------------------------------------
+def _levels_summary(levels: List[Dict], top_n: int) -> Dict:
+    quantities = [
+        _to_decimal(level.get("q", level.get("quantity"))) for level in levels
+    ]
+    return {
+        "levels": len(levels),
+        "total_quantity": str(
+            sum((q for q in quantities if q is not None), Decimal(0))
+        ),
+        "top": levels[:top_n],
+    }
+
+
+def project_orderbook(result: Dict, top_n: int = 5) -> Dict:
+    buys = result.get("buysPriceLevel", result.get("buys", []))
+    sells = result.get("sellsPriceLevel", result.get("sells", []))
+    projected = {
+        "bids": _levels_summary(buys, top_n),
+        "asks": _levels_summary(sells, top_n),
+    }
+    best_bid = _to_decimal(buys[0].get("p", buys[0].get("price"))) if buys else None
+    best_ask = _to_decimal(sells[0].get("p", sells[0].get("price"))) if sells else None
+    if best_bid is not None and best_ask is not None:
+        projected["best_bid"] = str(best_bid)
+        projected["best_ask"] = str(best_ask)
+        projected["spread"] = str(best_ask - best_bid)
+    return projected
+
+
+def project_trade_records(result: Dict, last_n: int = 10) -> Dict:
+    records: List[Dict] = []
+    for market in result.get("tradeRecords", []):
+        records.extend(market.get("latestTradeRecords", []))
+    prices = [_to_decimal(r.get("price")) for r in records]
+    quantities = [_to_decimal(r.get("quantity")) for r in records]
+    pairs = [
+        (p, q) for p, q in zip(prices, quantities) if p is not None and q is not None
+    ]
+    projected: Dict[str, Any] = {"count": len(records)}
+    if pairs:
+        volume = sum((q for _, q in pairs), Decimal(0))
+        notional = sum((p * q for p, q in pairs), Decimal(0))
+        projected.update(
+            {
+                "first_timestamp": records[0].get("timestamp"),
+                "last_timestamp": records[-1].get("timestamp"),
+                "low": str(min(p for p, _ in pairs)),
+                "high": str(max(p for p, _ in pairs)),
+                "last_price": str(pairs[-1][0]),
+                "volume": str(volume),
+                "vwap": str(notional / volume) if volume else None,
+            }
+        )
+    projected["latest"] = records[-last_n:]
+    return projected
+
+
+def project_auctions(result: List, last_n: int = 3) -> Dict:
+    return {"count": len(result), "latest": result[-last_n:]}
+
+
+def project_bids(result: List, top_n: int = 5) -> Dict:
+    ranked = sorted(
+        result,
+        key=lambda bid: _to_decimal(bid.get("amount")) or Decimal(0),
+        reverse=True,
+    )
+    return {"count": len(result), "highest": ranked[:top_n]}
+
+
+def project_denom_map(result: Dict, top_n: int = 25) -> Dict:
+    keys = list(result.keys())
+    projected = {key: result[key] for key in keys[:top_n]}
+    if len(keys) > top_n:
+        projected["_omitted_keys"] = len(keys) - top_n
+    return projected
+
+
+def project_orders(result: Dict, top_n: int = 10) -> Dict:
+    projected: Dict[str, Any] = {}
+    for key, value in result.items():
+        if isinstance(value, list):
+            projected[key] = {"count": len(value), "items": value[:top_n]}
+        else:
+            projected[key] = value
+    return projected
+
+
+PROJECTIONS: Dict[str, Callable[[Any], Any]] = {
+    "get_derivatives_orderbook": project_orderbook,
+    "get_spot_orderbook": project_orderbook,
+    "get_historical_orders": project_trade_records,
+    "fetch_auctions": project_auctions,
+    "fetch_auction_bids": project_bids,
+    "query_total_supply": project_denom_map,
+    "get_subaccount_orders": project_orders,
+    "trader_derivative_orders": project_orders,
+    "trader_spot_orders": project_orders,
+}
+
+
+class ResultStore:
+    """Bounded, TTL'd store of full function payloads keyed by handle"""
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: int = 3600) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    def put(self, payload: Any) -> str:
+        handle = f"res_{uuid.uuid4().hex[:12]}"
+        self._entries[handle] = (time.time(), payload)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return handle
+
+    def get(self, handle: str) -> Optional[Any]:
+        entry = self._entries.get(handle)
+        if entry is None:
+            return None
+        created_at, payload = entry
+        if time.time() - created_at > self.ttl_seconds:
+            del self._entries[handle]
+            return None
+        return payload
+
+    def page(
+        self, handle: str, path: str = None, offset: int = 0, limit: int = 20
+    ) -> Dict:
+        """Return a slice of the list (or dict keys) found at a dotted path"""
+        payload = self.get(handle)
+        if payload is None:
+            return {
+                "success": False,
+                "error": f"Result handle {handle} not found or expired",
+            }
+        node = payload
+        for part in [p for p in (path or "").split(".") if p]:
+            if isinstance(node, list) and part.isdigit() and int(part) < len(node):
+                node = node[int(part)]
+            elif isinstance(node, dict) and part in node:
+                node = node[part]
+            else:
+                return {
+                    "success": False,
+                    "error": f"Path {path} not found in result {handle}",
+                }
+        if isinstance(node, dict):
+            keys = list(node.keys())
+            items = {key: node[key] for key in keys[offset : offset + limit]}
+            total = len(keys)
+        elif isinstance(node, list):
+            items = node[offset : offset + limit]
+            total = len(node)
+        else:
+            return {"success": True, "result": node}
+        return {
+            "success": True,
+            "result": {
+                "items": items,
+                "offset": offset,
+                "limit": limit,
+                "total": total,
+                "has_more": offset + limit < total,
+            },
+        }
+
+
+class ResultCompactor:
+    """Projects and truncates function results to fit a token budget"""
+
+    def __init__(
+        self,
+        store: ResultStore = None,
+        token_budget: int = DEFAULT_TOKEN_BUDGET,
+        projections: Dict[str, Callable[[Any], Any]] = None,
+    ) -> None:
+        self.store = store or ResultStore()
+        self.token_budget = token_budget
+        self.projections = dict(PROJECTIONS if projections is None else projections)
+
+    def compact(self, function_name: str, response: Any) -> Any:
+        """Return the view of a function response that goes into the conversation"""
+        if estimate_tokens(response) <= self.token_budget:
+            return response
+
+        compacted = response
+        if isinstance(response, dict) and "result" in response:
+            projection = self.projections.get(function_name)
+            if projection is not None:
+                try:
+                    compacted = {**response, "result": projection(response["result"])}
+                except Exception:
+                    # fall back to generic truncation if the shape is unexpected
+                    compacted = response
+
+        max_items = DEFAULT_LIST_ITEMS
+        while estimate_tokens(compacted) > self.token_budget and max_items >= 1:
+            compacted = _truncate(compacted, max_items)
+            max_items //= 2
+        if estimate_tokens(compacted) > self.token_budget:
+            text = json.dumps(compacted, default=str)
+            compacted = {"truncated_json": text[: self.token_budget * 4]}
+
+        handle = self.store.put(response)
+        if not isinstance(compacted, dict):
+            compacted = {"result": compacted}
+        return {
+            **compacted,
+            "_compacted": {
+                "handle": handle,
+                "original_tokens": estimate_tokens(response),
+                "note": "Summary only. Call fetch_result_page with this handle to read the full data.",
+            },
+        }
@@ -0,0 +1,488 @@
+"""Recurring function calls for agents, driven by one hashed timer wheel."""
+
+import asyncio
+import json
+import math
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, FrozenSet, List, Optional
+
+from app.metrics import metrics
+
+DEFAULT_PATH = ".cache/schedules.sqlite3"
+DEFAULT_RESOLUTION_SECONDS = 1.0
+DEFAULT_AGENT_CONCURRENCY = 2
+WHEEL_SLOTS = 4096
+MISSED_GRACE_SECONDS = 60
+MAX_CATCH_UP = 10
+MAX_RESULT_CHARS = 1000
+# runs late by more than MISSED_GRACE_SECONDS: run once now, drop them, or
+# replay each missed time up to MAX_CATCH_UP
+MISSED_POLICIES = ("run_once", "skip", "catch_up")
+
+
+class AgentUnavailable(Exception):
+    """prepare_agent can't run the schedule's agent yet, e.g. after a restart"""
+
+
+SHORTCUTS = {
+    "@hourly": "0 * * * *",
+    "@daily": "0 0 * * *",
+    "@weekly": "0 0 * * 0",
+}
+UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+# (lowest, highest) of minute, hour, day of month, month, day of week
+FIELD_RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]
+
+
+def _parse_field(text: str, low: int, high: int) -> FrozenSet[int]:
+    values = set()
+    for part in text.split(","):
+        expression, _, step = part.partition("/")
+        if expression == "*":
+            start, end = low, high
+        elif "-" in expression:
+            start, end = (int(value) for value in expression.split("-", 1))
+        else:
+            start = int(expression)
+            end = high if step else start
+        if not low <= start <= end <= high:
+            raise ValueError(f"{part!r} is outside {low}-{high}")
+        values.update(range(start, end + 1, int(step) if step else 1))
+    return frozenset(values)
+
+
+class CronSpec:
+    """Parsed schedule spec; next_after(ts) is the first run time after ts"""
+
+    def __init__(self, spec: str) -> None:
+        self.spec = spec.strip()
+        self.every: Optional[float] = None
+        text = SHORTCUTS.get(self.spec, self.spec)
+        if text.startswith("@every "):
+            amount = text[len("@every ") :].strip()
+            unit = UNITS.get(amount[-1:])
+            if unit is None or not amount[:-1].isdigit() or int(amount[:-1]) <= 0:
+                raise ValueError(f"Invalid interval in {spec!r}, e.g. @every 10m")
+            self.every = float(int(amount[:-1]) * unit)
+            return
+        fields = text.split()
+        if len(fields) != 5:
+            raise ValueError(
+                f"Invalid schedule {spec!r}: expected 5 cron fields or an @ shortcut"
+            )
+        try:
+            parsed = [
+                _parse_field(value, low, high)
+                for value, (low, high) in zip(fields, FIELD_RANGES)
+            ]
+        except ValueError as e:
+            raise ValueError(f"Invalid schedule {spec!r}: {e}") from None
+        self.minutes, self.hours, self.days, self.months, weekdays = parsed
+        # cron accepts both 0 and 7 for Sunday
+        self.weekdays = frozenset(day % 7 for day in weekdays)
+        self.days_restricted = fields[2] != "*"
+        self.weekdays_restricted = fields[4] != "*"
+        self.next_after(time.time())  # rejects specs that never fire, e.g. 30 Feb
+
+    def _day_matches(self, moment: datetime) -> bool:
+        day = moment.day in self.days
+        weekday = (moment.weekday() + 1) % 7 in self.weekdays
+        if self.days_restricted and self.weekdays_restricted:
+            return day or weekday
+        return day and weekday
+
+    def next_after(self, ts: float) -> float:
+        if self.every is not None:
+            # aligned to the epoch, so restarts keep the same grid
+            return (math.floor(ts / self.every) + 1) * self.every
+        moment = datetime.fromtimestamp(ts, timezone.utc).replace(
+            second=0, microsecond=0
+        ) + timedelta(minutes=1)
+        limit = moment + timedelta(days=366 * 5)
+        while moment < limit:
+            if moment.month not in self.months:
+                month = moment.month % 12 + 1
+                year = moment.year + (month == 1)
+                moment = moment.replace(year=year, month=month, day=1, hour=0, minute=0)
+            elif not self._day_matches(moment):
+                moment = (moment + timedelta(days=1)).replace(hour=0, minute=0)
+            elif moment.hour not in self.hours:
+                moment = (moment + timedelta(hours=1)).replace(minute=0)
+            elif moment.minute not in self.minutes:
+                moment += timedelta(minutes=1)
+            else:
+                return moment.timestamp()
+        raise ValueError(f"Schedule {self.spec!r} never fires")
+
+
+class TimerWheel:
+    """Hashed timing wheel of keys by deadline.
+
+    Adding, moving and removing a key is O(1); advance() visits one slot per
+    elapsed tick. Keys further out than one turn of the wheel stay in their
+    slot until the turn their deadline falls in.
+    """
+
+    def __init__(
+        self,
+        resolution: float = DEFAULT_RESOLUTION_SECONDS,
+        slots: int = WHEEL_SLOTS,
+        now: float = None,
+    ) -> None:
+        self.resolution = resolution
+        self.slots = slots
+        self._buckets: List[Dict[str, int]] = [{} for _ in range(slots)]
+        self._slot_of: Dict[str, int] = {}
+        self._tick = int((time.time() if now is None else now) // resolution)
+
+    def __len__(self) -> int:
+        return len(self._slot_of)
+
+    def add(self, key: str, deadline: float) -> None:
+        self.remove(key)
+        # anything already due fires on the next tick
+        tick = max(math.ceil(deadline / self.resolution), self._tick + 1)
+        slot = tick % self.slots
+        self._buckets[slot][key] = tick
+        self._slot_of[key] = slot
+
+    def remove(self, key: str) -> None:
+        slot = self._slot_of.pop(key, None)
+        if slot is not None:
+            self._buckets[slot].pop(key, None)
+
+    def advance(self, now: float) -> List[str]:
+        """Keys whose deadline is at or before now, removed from the wheel"""
+        target = int(now // self.resolution)
+        if target - self._tick >= self.slots:
+            # slept through a whole turn, every slot is due for a look
+            ticks = range(self.slots)
+        else:
+            ticks = range(self._tick + 1, target + 1)
+        due = []
+        for tick in ticks:
+            bucket = self._buckets[tick % self.slots]
+            for key in [key for key, deadline in bucket.items() if deadline <= target]:
+                del bucket[key]
+                del self._slot_of[key]
+                due.append(key)
+        self._tick = max(self._tick, target)
+        return due
+
+
+@dataclass
+class Schedule:
+    schedule_id: str
+    agent_id: str
+    environment: str
+    function: str
+    arguments: Dict
+    spec: str
+    jitter_seconds: float = 0.0
+    missed_policy: str = "run_once"
+    enabled: bool = True
+    next_run_at: Optional[float] = None  # the cron time, before jitter
+    last_run_at: Optional[float] = None
+    # ok, error, skipped_overlap, skipped_missed, waiting_for_agent
+    last_status: str = ""
+    last_result: str = ""
+    run_count: int = 0
+    failure_count: int = 0
+    created_at: float = field(default_factory=time.time)
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+class ScheduleStore:
+    """sqlite table of schedules, one row per schedule"""
+
+    COLUMNS = list(Schedule.__dataclass_fields__)
+
+    def __init__(self, path: str = DEFAULT_PATH) -> None:
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("""CREATE TABLE IF NOT EXISTS schedules (
+                schedule_id TEXT PRIMARY KEY,
+                agent_id TEXT NOT NULL,
+                environment TEXT NOT NULL,
+                function TEXT NOT NULL,
+                arguments TEXT NOT NULL,
+                spec TEXT NOT NULL,
+                jitter_seconds REAL NOT NULL,
+                missed_policy TEXT NOT NULL,
+                enabled INTEGER NOT NULL,
+                next_run_at REAL,
+                last_run_at REAL,
+                last_status TEXT NOT NULL,
+                last_result TEXT NOT NULL,
+                run_count INTEGER NOT NULL,
+                failure_count INTEGER NOT NULL,
+                created_at REAL NOT NULL
+            )""")
+        self._db.commit()
+
+    def save(self, schedule: Schedule) -> None:
+        row = schedule.to_dict()
+        row["arguments"] = json.dumps(row["arguments"], default=str)
+        with self._lock:
+            self._db.execute(
+                f"INSERT OR REPLACE INTO schedules ({', '.join(self.COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(self.COLUMNS))})",
+                [row[column] for column in self.COLUMNS],
+            )
+            self._db.commit()
+
+    def delete(self, schedule_id: str) -> None:
+        with self._lock:
+            self._db.execute(
+                "DELETE FROM schedules WHERE schedule_id = ?", (schedule_id,)
+            )
+            self._db.commit()
+
+    def load_all(self) -> List[Schedule]:
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT {', '.join(self.COLUMNS)} FROM schedules"
+            ).fetchall()
+        schedules = []
+        for row in rows:
+            values = dict(zip(self.COLUMNS, row))
+            values["arguments"] = json.loads(values["arguments"])
+            values["enabled"] = bool(values["enabled"])
+            schedules.append(Schedule(**values))
+        return schedules
+
+
+class Scheduler:
+    def __init__(
+        self,
+        execute: Callable[[str, Dict, str], Awaitable[Dict]],
+        prepare_agent: Callable[[str, str], Awaitable[None]],
+        store: ScheduleStore,
+        agent_concurrency: int = DEFAULT_AGENT_CONCURRENCY,
+        resolution: float = DEFAULT_RESOLUTION_SECONDS,
+    ) -> None:
+        """execute(function, arguments, agent_id) runs a call;
+        prepare_agent(agent_id, environment) makes sure the agent is initialized
+        or raises AgentUnavailable"""
+        self.execute = execute
+        self.prepare_agent = prepare_agent
+        self.store = store
+        self.agent_concurrency = agent_concurrency
+        self.schedules: Dict[str, Schedule] = {}
+        self._specs: Dict[str, CronSpec] = {}
+        self._wheel = TimerWheel(resolution)
+        self._running: Dict[str, asyncio.Task] = {}
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._listeners: List[Callable[[Schedule], None]] = []
+        self._loop_task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_env(cls, execute, prepare_agent) -> "Scheduler":
+        return cls(
+            execute,
+            prepare_agent,
+            ScheduleStore(os.getenv("SCHEDULER_PATH", DEFAULT_PATH)),
+            int(
+                os.getenv("SCHEDULER_AGENT_CONCURRENCY", str(DEFAULT_AGENT_CONCURRENCY))
+            ),
+        )
+
+    def add_listener(self, listener: Callable[[Schedule], None]) -> None:
+        """listener(schedule) is called after every run or skipped run"""
+        self._listeners.append(listener)
+
+    def start(self) -> None:
+        """Load stored schedules and start the timer task"""
+        for schedule in self.store.load_all():
+            self.schedules[schedule.schedule_id] = schedule
+            self._specs[schedule.schedule_id] = CronSpec(schedule.spec)
+            if schedule.enabled:
+                # times missed while the server was down are handled on the first
+                # fire; schedules of agents that aren't back yet wait again then
+                self._arm(schedule)
+        if self._loop_task is None or self._loop_task.done():
+            self._loop_task = asyncio.create_task(self._loop())
+        print(f"Scheduler started with {len(self.schedules)} schedule(s)")
+
+    async def stop(self) -> None:
+        tasks = [self._loop_task, *self._running.values()]
+        for task in tasks:
+            if task is not None:
+                task.cancel()
+        await asyncio.gather(
+            *[t for t in tasks if t is not None], return_exceptions=True
+        )
+
+    def add(
+        self,
+        agent_id: str,
+        environment: str,
+        function: str,
+        arguments: Dict,
+        spec: str,
+        jitter_seconds: float = 0.0,
+        missed_policy: str = "run_once",
+    ) -> Schedule:
+        """Validate and store a schedule; raises ValueError for a bad spec or policy"""
+        if missed_policy not in MISSED_POLICIES:
+            raise ValueError(
+                f"Unknown missed_policy {missed_policy!r}, use one of "
+                f"{', '.join(MISSED_POLICIES)}"
+            )
+        if float(jitter_seconds) < 0:
+            raise ValueError("jitter_seconds can't be negative")
+        cron = CronSpec(spec)
+        schedule = Schedule(
+            schedule_id=f"sched_{uuid.uuid4().hex[:12]}",
+            agent_id=agent_id,
+            environment=environment,
+            function=function,
+            arguments=dict(arguments or {}),
+            spec=cron.spec,
+            jitter_seconds=float(jitter_seconds),
+            missed_policy=missed_policy,
+            next_run_at=cron.next_after(time.time()),
+        )
+        self.schedules[schedule.schedule_id] = schedule
+        self._specs[schedule.schedule_id] = cron
+        self.store.save(schedule)
+        self._arm(schedule)
+        return schedule
+
+    def get(self, schedule_id: str) -> Optional[Schedule]:
+        return self.schedules.get(schedule_id)
+
+    def list(self, agent_id: str = None) -> List[Schedule]:
+        return [
+            schedule
+            for schedule in self.schedules.values()
+            if agent_id is None or schedule.agent_id == agent_id
+        ]
+
+    def remove(self, schedule_id: str) -> Optional[Schedule]:
+        schedule = self.schedules.pop(schedule_id, None)
+        if schedule is not None:
+            self._wheel.remove(schedule_id)
+            self._specs.pop(schedule_id, None)
+            self.store.delete(schedule_id)
+        return schedule
+
+    def set_enabled(self, schedule_id: str, enabled: bool) -> Optional[Schedule]:
+        """Pause or resume; a resumed schedule continues from the next future time"""
+        schedule = self.schedules.get(schedule_id)
+        if schedule is None or schedule.enabled == enabled:
+            return schedule
+        schedule.enabled = enabled
+        if enabled:
+            schedule.next_run_at = self._specs[schedule_id].next_after(time.time())
+            self._arm(schedule)
+        else:
+            self._wheel.remove(schedule_id)
+        self.store.save(schedule)
+        return schedule
+
+    def agent_ready(self, agent_id: str) -> None:
+        """Re-arm the schedules that were waiting for this agent"""
+        for schedule in self.schedules.values():
+            if (
+                schedule.agent_id == agent_id
+                and schedule.enabled
+                and schedule.last_status == "waiting_for_agent"
+            ):
+                # runs missed while waiting follow the missed_policy
+                self._arm(schedule)
+
+    def _arm(self, schedule: Schedule) -> None:
+        jitter = random.uniform(0, schedule.jitter_seconds)
+        self._wheel.add(schedule.schedule_id, schedule.next_run_at + jitter)
+
+    async def _loop(self) -> None:
+        resolution = self._wheel.resolution
+        while True:
+            await asyncio.sleep(resolution - time.time() % resolution)
+            for schedule_id in self._wheel.advance(time.time()):
+                try:
+                    self._fire(self.schedules[schedule_id])
+                except Exception as e:
+                    print(f"Scheduled run of {schedule_id} failed to start: {e}")
+
+    def _fire(self, schedule: Schedule) -> None:
+        now = time.time()
+        cron = self._specs[schedule.schedule_id]
+        due = schedule.next_run_at
+        late = now - due - schedule.jitter_seconds > MISSED_GRACE_SECONDS
+        runs = 1
+        if late and schedule.missed_policy == "skip":
+            runs = 0
+        elif late and schedule.missed_policy == "catch_up":
+            while runs < MAX_CATCH_UP and cron.next_after(due) <= now:
+                due = cron.next_after(due)
+                runs += 1
+        schedule.next_run_at = cron.next_after(now)
+        self._arm(schedule)
+
+        if runs == 0:
+            self._finish(schedule, "skipped_missed", f"Missed the run at {due:.0f}")
+        elif schedule.schedule_id in self._running:
+            self._finish(schedule, "skipped_overlap", "The previous run is still going")
+        else:
+            self._running[schedule.schedule_id] = asyncio.create_task(
+                self._run(schedule, runs)
+            )
+
+    async def _run(self, schedule: Schedule, runs: int) -> None:
+        semaphore = self._semaphores.setdefault(
+            schedule.agent_id, asyncio.Semaphore(self.agent_concurrency)
+        )
+        try:
+            for _ in range(runs):
+                async with semaphore:
+                    try:
+                        await self.prepare_agent(
+                            schedule.agent_id, schedule.environment
+                        )
+                        result = await self.execute(
+                            schedule.function,
+                            dict(schedule.arguments),
+                            schedule.agent_id,
+                        )
+                        ok = bool(result.get("success", "error" not in result))
+                    except AgentUnavailable as e:
+                        # stop firing until agent_ready instead of failing every run
+                        self._wheel.remove(schedule.schedule_id)
+                        self._finish(schedule, "waiting_for_agent", str(e))
+                        return
+                    except Exception as e:
+                        result, ok = {"success": False, "error": str(e)}, False
+                schedule.run_count += 1
+                schedule.failure_count += not ok
+                metrics.increment("scheduled_runs")
+                self._finish(
+                    schedule,
+                    "ok" if ok else "error",
+                    json.dumps(result, default=str)[:MAX_RESULT_CHARS],
+                )
+        finally:
+            self._running.pop(schedule.schedule_id, None)
+
+    def _finish(self, schedule: Schedule, status: str, result: str) -> None:
+        schedule.last_run_at = time.time()
+        schedule.last_status, schedule.last_result = status, result
+        if schedule.schedule_id in self.schedules:
+            self.store.save(schedule)
+        for listener in self._listeners:
+            try:
+                listener(schedule)
+            except Exception as e:
+                print(f"Schedule listener failed: {e}")
@@ -0,0 +1,69 @@
+"""Helpers for consuming streamed chat completions."""
+
+import asyncio
+import json
+from typing import Any, AsyncIterator, Dict, Optional
+
+_DONE = object()
+
+
+async def stream_chat_completion(client, **kwargs) -> AsyncIterator[Any]:
+    """Yield chunks of client.chat.completions.create(stream=True, ...)"""
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+
+    def produce():
+        try:
+            for chunk in client.chat.completions.create(stream=True, **kwargs):
+                loop.call_soon_threadsafe(queue.put_nowait, chunk)
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, e)
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, _DONE)
+
+    producer = asyncio.create_task(asyncio.to_thread(produce))
+    try:
+        while True:
+            item = await queue.get()
+            if item is _DONE:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        await producer
+
+
+class FunctionCallAccumulator:
+    """Rebuilds a function call from streamed name/argument fragments"""
+
+    def __init__(self) -> None:
+        self.name = ""
+        self.raw_arguments = ""
+        self.arguments: Optional[Dict] = None
+
+    @property
+    def started(self) -> bool:
+        return bool(self.name)
+
+    def feed(self, delta) -> bool:
+        """Add a function_call delta; True the first time the arguments parse"""
+        if getattr(delta, "name", None):
+            self.name += delta.name
+        if getattr(delta, "arguments", None):
+            self.raw_arguments += delta.arguments
+        if self.arguments is not None or not self.raw_arguments.strip():
+            return False
+        try:
+            arguments = json.loads(self.raw_arguments)
+        except ValueError:
+            return False
+        if not isinstance(arguments, dict):
+            return False
+        self.arguments = arguments
+        return True
+
+    def final_arguments(self) -> Dict:
+        if not self.raw_arguments.strip():
+            return {}
+        return json.loads(self.raw_arguments)
@@ -0,0 +1,135 @@
+"""Startup warm-up of imports, market registries and agents, served on /ready."""
+
+import asyncio
+import os
+import time
+from typing import Dict, List
+
+from app.agent_manager import AgentManager
+from injective_functions.factory import InjectiveClientFactory
+from injective_functions.utils.market_registry import LCD_ENDPOINTS, get_registry
+from injective_functions.utils.signing import signing_executor
+
+
+class Readiness:
+    """Status of each warm-up step; ready once every required step passed"""
+
+    def __init__(self) -> None:
+        self.checks: Dict[str, Dict] = {}
+        self.finished = False
+        self.started_at = time.time()
+        self.finished_at = None
+
+    def mark(self, name: str, ok: bool, required: bool = True, **details) -> None:
+        self.checks[name] = {"ok": ok, "required": required, **details}
+
+    @property
+    def ready(self) -> bool:
+        return self.finished and all(
+            check["ok"] for check in self.checks.values() if check["required"]
+        )
+
+    def snapshot(self) -> Dict:
+        return {
+            "ready": self.ready,
+            "finished": self.finished,
+            "warmup_seconds": round(
+                (self.finished_at or time.time()) - self.started_at, 3
+            ),
+            "checks": self.checks,
+        }
+
+
+def configured_networks() -> List[str]:
+    """WARMUP_NETWORKS, e.g. "mainnet,testnet"; empty to skip the registries"""
+    names = os.getenv("WARMUP_NETWORKS", "mainnet").split(",")
+    return [name.strip() for name in names if name.strip() in LCD_ENDPOINTS]
+
+
+def configured_agents(config_path: str = "agents_config.yaml") -> Dict[str, dict]:
+    """Agents named in WARMUP_AGENTS ("all" or comma separated names)"""
+    selection = os.getenv("WARMUP_AGENTS", "").strip()
+    if not selection:
+        return {}
+    agents = AgentManager(config_path).list_agents()
+    if selection == "all":
+        return agents
+    names = {name.strip() for name in selection.split(",")}
+    return {name: info for name, info in agents.items() if name in names}
+
+
+async def warm_up(chat_agent, readiness: Readiness) -> Readiness:
+    readiness.mark(
+        "schemas",
+        bool(chat_agent.function_schemas),
+        count=len(chat_agent.function_schemas),
+    )
+
+    async def load_imports() -> None:
+        # heavy imports (OpenAI SDK, pyinjective) are deferred until after the port is bound
+        started = time.time()
+        try:
+            await asyncio.to_thread(lambda: chat_agent.client)
+            await asyncio.to_thread(InjectiveClientFactory.load_modules)
+            readiness.mark("imports", True, seconds=round(time.time() - started, 3))
+        except Exception as e:
+            readiness.mark("imports", False, error=str(e))
+
+    async def load_registry(network_type: str) -> None:
+        started = time.time()
+        try:
+            registry = await get_registry(network_type).load()
+        except Exception as e:
+            readiness.mark(f"registry:{network_type}", False, error=str(e))
+            return
+        readiness.mark(
+            f"registry:{network_type}",
+            registry.is_loaded,
+            markets=len(registry.market_ids),
+            denoms=len(registry.denom_decimals),
+            seconds=round(time.time() - started, 3),
+        )
+
+    async def start_signers() -> None:
+        if signing_executor.mode == "inline":
+            return
+        started = time.time()
+        try:
+            await signing_executor.warm_up()
+            readiness.mark(
+                "signing",
+                True,
+                mode=signing_executor.mode,
+                workers=signing_executor.max_workers,
+                seconds=round(time.time() - started, 3),
+            )
+        except Exception as e:
+            readiness.mark("signing", False, mode=signing_executor.mode, error=str(e))
+
+    async def load_agent(name: str, info: dict) -> None:
+        started = time.time()
+        try:
+            await chat_agent.initialize_agent(
+                agent_id=info["address"],
+                private_key=info["private_key"],
+                environment=info.get("network", "mainnet"),
+            )
+            readiness.mark(
+                f"agent:{name}",
+                True,
+                required=False,
+                seconds=round(time.time() - started, 3),
+            )
+        except Exception as e:
+            readiness.mark(f"agent:{name}", False, required=False, error=str(e))
+
+    await asyncio.gather(
+        load_imports(),
+        start_signers(),
+        *[load_registry(network) for network in configured_networks()],
+        *[load_agent(name, info) for name, info in configured_agents().items()],
+    )
+    readiness.finished = True
+    readiness.finished_at = time.time()
+    print(f"Warm-up finished: ready={readiness.ready}")
+    return readiness
@@ -0,0 +1,83 @@
+"""Import time benchmark for the CLI and the server.
+
+python benchmarks/import_time.py
+python benchmarks/import_time.py quickstart --budget-ms 300
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_TARGETS = ["quickstart", "agent_server", "injective_functions.factory"]
+
+
+def measure(module: str) -> Tuple[int, List[Tuple[int, str]]]:
+    """Return (total_us, [(cumulative_us, name)] of direct imports) for one run"""
+    env = dict(os.environ)
+    env.setdefault("OPENAI_API_KEY", "benchmark")  # agent_server checks it at import
+    env["PYTHONPATH"] = REPO_ROOT + os.pathsep + env.get("PYTHONPATH", "")
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"importing {module} failed:\n{completed.stderr[-2000:]}")
+
+    # children are printed before their parent, so collect depth 1 lines until
+    # the target's own depth 0 line shows up
+    total = 0
+    pending: List[Tuple[int, str]] = []
+    children: List[Tuple[int, str]] = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        if not cumulative.strip().isdigit():
+            continue  # header line
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 0:
+            if name.strip() == module:
+                total, children = int(cumulative), pending
+            pending = []
+        elif depth == 1:
+            pending.append((int(cumulative), name.strip()))
+    return total, sorted(children, reverse=True)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Measure module import time")
+    parser.add_argument("targets", nargs="*", default=DEFAULT_TARGETS)
+    parser.add_argument(
+        "--runs", type=int, default=3, help="runs per target (best is kept)"
+    )
+    parser.add_argument(
+        "--top", type=int, default=5, help="slowest direct imports to show"
+    )
+    parser.add_argument("--budget-ms", type=float, default=None, help="fail above this")
+    args = parser.parse_args()
+
+    results: Dict[str, int] = {}
+    for target in args.targets:
+        runs = [measure(target) for _ in range(args.runs)]
+        total, children = min(runs, key=lambda run: run[0])
+        results[target] = total
+        print(f"{target}: {total / 1000:.1f} ms (best of {args.runs})")
+        for cumulative, name in children[: args.top]:
+            print(f"    {cumulative / 1000:8.1f} ms  {name}")
+
+    if args.budget_ms is not None:
+        over = {t: us for t, us in results.items() if us / 1000 > args.budget_ms}
+        for target, us in over.items():
+            print(f"{target} is over budget: {us / 1000:.1f} ms > {args.budget_ms} ms")
+        return 1 if over else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
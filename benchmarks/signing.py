@@ -0,0 +1,91 @@
+"""Signing benchmark: inline vs thread pool vs process pool.
+
+python benchmarks/signing.py
+python benchmarks/signing.py --txs 500 --workers 4 --modes inline process
+"""
+
+import argparse
+import asyncio
+import os
+import secrets
+import sys
+import time
+from typing import Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from injective_functions.utils.signing import (
+    SIGNING_MODES,
+    SigningExecutor,
+    sign_batch,
+)
+
+SIGN_DOC_BYTES = 400  # a single-message MsgCreateSpotLimitOrder sign doc
+
+
+async def heartbeat(stop: asyncio.Event, stalls: List[float]) -> None:
+    interval = 0.001
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        stalls.append(time.perf_counter() - started - interval)
+
+
+async def run_mode(
+    mode: str, requests: List[Tuple[str, bytes]], workers: int, batch: bool
+) -> Dict:
+    executor = SigningExecutor(mode, max_workers=workers)
+    await executor.warm_up()
+    stop, stalls = asyncio.Event(), []
+    beat = asyncio.create_task(heartbeat(stop, stalls))
+    await asyncio.sleep(0.01)
+
+    started = time.perf_counter()
+    if batch:
+        signatures = await executor.sign_many(requests)
+    else:
+        signatures = await asyncio.gather(
+            *[executor.sign(key, doc) for key, doc in requests]
+        )
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await beat
+    executor.shutdown()
+    assert len(signatures) == len(requests) and all(len(s) == 64 for s in signatures)
+    return {
+        "seconds": elapsed,
+        "per_second": len(requests) / elapsed,
+        "max_stall_ms": max(stalls, default=0) * 1000,
+    }
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description="Compare signing executors")
+    parser.add_argument("--txs", type=int, default=200, help="signatures per run")
+    parser.add_argument("--keys", type=int, default=20, help="distinct agent keys")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--modes", nargs="*", default=list(SIGNING_MODES))
+    args = parser.parse_args()
+
+    keys = [secrets.token_hex(32) for _ in range(args.keys)]
+    requests = [
+        (keys[i % len(keys)], secrets.token_bytes(SIGN_DOC_BYTES))
+        for i in range(args.txs)
+    ]
+    sign_batch([(key, b"") for key in keys])  # import pyinjective, derive the keys
+    print(f"{args.txs} signatures, {args.keys} keys, {args.workers} workers")
+    for mode in args.modes:
+        for batch in (False, True):
+            result = await run_mode(mode, requests, args.workers, batch)
+            api = "sign_many" if batch else "sign x N"
+            print(
+                f"{mode:8} {api:10} {result['seconds'] * 1000:8.1f} ms"
+                f"  {result['per_second']:8.0f}/s"
+                f"  max loop stall {result['max_stall_ms']:7.1f} ms"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -1,8 +1,9 @@
+import asyncio
 from decimal import Decimal
 from injective_functions.base import InjectiveBase
 from injective_functions.utils.helpers import get_bridge_fee, detailed_exception_info
-from typing import Dict
-
+from injective_functions.utils.tx_tracker import tx_tracker
+from typing import Dict, List
 
 """This class handles all account transfer within the account"""
 
@@ -31,7 +32,7 @@ class InjectiveAccounts(InjectiveBase):
             amount=Decimal(amount),
             denom=denom,
         )
-        await self.chain_client.build_and_broadcast_tx(msg)
+        return await self.chain_client.build_and_broadcast_tx(msg)
 
     # External subaccount transfer
     async def external_subaccount_transfer(
@@ -61,7 +62,7 @@ class InjectiveAccounts(InjectiveBase):
             amount=Decimal(amount),
             bridge_fee=bridge_fee,
         )
-        await self.chain_client.build_and_broadcast_tx(msg)
+        return await self.chain_client.build_and_broadcast_tx(msg)
 
     async def fetch_tx(self, tx_hash: str) -> Dict:
         try:
@@ -72,3 +73,157 @@ class InjectiveAccounts(InjectiveBase):
             }
         except Exception as e:
             return {"success": False, "error": detailed_exception_info(e)}
+
+    async def get_tx_status(self, job_id: str, wait_seconds: float = 0) -> Dict:
+        """Status of a broadcast tx by job id (or hash), optionally waiting for it"""
+        try:
+            job = (
+                await tx_tracker.wait(job_id, timeout=min(float(wait_seconds), 30))
+                if wait_seconds
+                else tx_tracker.get(job_id)
+            )
+            if job is None:
+                return {"success": False, "error": f"No transaction job {job_id}"}
+            return {"success": True, "result": job.to_dict()}
+        except Exception as e:
+            return {"success": False, "error": detailed_exception_info(e)}
+
+    async def get_account_snapshot(self, subaccount_indices: List[int] = None) -> Dict:
+        """Balances, deposits, positions and open orders in one call.
+
+        Everything is fetched concurrently: the bank side and the list of
+        subaccounts in use first, then deposits, positions and spot/derivative
+        orders of every subaccount. Amounts are converted with one denom
+        decimals lookup and empty sections are left out. A section that fails
+        is reported under "errors" instead of failing the whole snapshot.
+        """
+        try:
+            address = self.chain_client.address
+            client = self.chain_client.client
+            errors = {}
+
+            async def subaccounts_in_use() -> List[str]:
+                if subaccount_indices is not None:
+                    return [address.get_subaccount_id(i) for i in subaccount_indices]
+                listed = (
+                    await client.fetch_subaccounts_list(address.to_acc_bech32())
+                ).get("subaccounts", [])
+                default = address.get_subaccount_id(0)
+                return [default] + [s for s in listed if s != default]
+
+            decimals, bank, spendable, subaccount_ids = await asyncio.gather(
+                self.chain_client.fetch_denom_decimals(),
+                self.chain_client.fetch_bank_balances(),
+                self.chain_client.fetch_spendable_balances(),
+                subaccounts_in_use(),
+            )
+            per_subaccount = await asyncio.gather(
+                *[
+                    asyncio.gather(
+                        self.chain_client.fetch_subaccount_deposits(subaccount_id),
+                        self.chain_client.fetch_subaccount_positions(subaccount_id),
+                        client.fetch_spot_orders(subaccount_id=subaccount_id),
+                        client.fetch_derivative_orders(subaccount_id=subaccount_id),
+                        return_exceptions=True,
+                    )
+                    for subaccount_id in subaccount_ids
+                ]
+            )
+
+            def human(denom: str, amount) -> str:
+                return str(Decimal(amount) / Decimal(10) ** decimals.get(denom, 0))
+
+            def human_amounts(convert, market_id: str, entry: Dict) -> Dict:
+                try:
+                    return {
+                        key: f"{value.normalize():f}"
+                        for key, value in convert(market_id, entry).items()
+                    }
+                except Exception as e:
+                    errors[f"units:{market_id}"] = str(e)
+                    return {}
+
+            bank_balances = {
+                coin["denom"]: human(coin["denom"], coin["amount"])
+                for coin in bank.get("balances", [])
+            }
+            # only list spendable amounts where they differ from the bank balance
+            locked = {}
+            spendable_amounts = {
+                coin["denom"]: human(coin["denom"], coin["amount"])
+                for coin in spendable.get("balances", [])
+            }
+            for denom, amount in bank_balances.items():
+                if spendable_amounts.get(denom, "0") != amount:
+                    locked[denom] = spendable_amounts.get(denom, "0")
+
+            deposits, positions, orders = {}, {}, {}
+            sections = ("deposits", "positions", "spot_orders", "derivative_orders")
+            for subaccount_id, results in zip(subaccount_ids, per_subaccount):
+                for section, result in zip(sections, results):
+                    if isinstance(result, Exception):
+                        errors[f"{section}:{subaccount_id}"] = str(result)
+                deposit_res, position_res, spot_res, derivative_res = [
+                    {} if isinstance(result, Exception) else result
+                    for result in results
+                ]
+                subaccount_deposits = {
+                    denom: {
+                        "available": human(denom, deposit["availableBalance"]),
+                        "total": human(denom, deposit["totalBalance"]),
+                    }
+                    for denom, deposit in deposit_res.get("deposits", {}).items()
+                    if Decimal(deposit["totalBalance"]) != 0
+                }
+                if subaccount_deposits:
+                    deposits[subaccount_id] = subaccount_deposits
+                subaccount_positions = {
+                    entry["marketId"]: {
+                        "direction": (
+                            "long" if entry["position"].get("isLong") else "short"
+                        ),
+                        **human_amounts(
+                            self.chain_client.position_to_human,
+                            entry["marketId"],
+                            entry["position"],
+                        ),
+                    }
+                    for entry in position_res.get("state", [])
+                }
+                if subaccount_positions:
+                    positions[subaccount_id] = subaccount_positions
+                subaccount_orders = [
+                    {
+                        "market_id": order.get("marketId"),
+                        "type": kind,
+                        "side": order.get("orderSide"),
+                        **human_amounts(
+                            self.chain_client.order_to_human,
+                            order.get("marketId"),
+                            order,
+                        ),
+                        "order_hash": order.get("orderHash"),
+                    }
+                    for kind, response in (
+                        ("spot", spot_res),
+                        ("derivative", derivative_res),
+                    )
+                    for order in response.get("orders", [])
+                ]
+                if subaccount_orders:
+                    orders[subaccount_id] = subaccount_orders
+
+            snapshot = {
+                "address": address.to_acc_bech32(),
+                "subaccounts": subaccount_ids,
+                "bank_balances": bank_balances,
+                "spendable_where_different": locked,
+                "deposits": deposits,
+                "positions": positions,
+                "open_orders": orders,
+            }
+            if errors:
+                snapshot["errors"] = errors
+            return {"success": True, "result": snapshot}
+        except Exception as e:
+            return {"success": False, "error": detailed_exception_info(e)}
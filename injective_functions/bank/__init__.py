@@ -1,7 +1,6 @@
 from decimal import Decimal
 from injective_functions.base import InjectiveBase
 from typing import Dict, List
-from injective_functions.utils.indexer_requests import fetch_decimal_denoms
 from injective_functions.utils.helpers import detailed_exception_info
 
 
@@ -25,12 +24,8 @@ class InjectiveBank(InjectiveBase):
     async def query_balances(self, denom_list: List[str] = None) -> Dict:
         try:
 
-            denoms: Dict[str, int] = await fetch_decimal_denoms(
-                self.chain_client.network_type
-            )
-            bank_balances = await self.chain_client.client.fetch_bank_balances(
-                address=self.chain_client.address.to_acc_bech32()
-            )
+            denoms: Dict[str, int] = await self.chain_client.fetch_denom_decimals()
+            bank_balances = await self.chain_client.fetch_bank_balances()
             bank_balances = bank_balances["balances"]
 
             # hash the bank balances as a kv pair
@@ -59,12 +54,8 @@ class InjectiveBank(InjectiveBase):
 
     async def query_spendable_balances(self, denom_list: List[str] = None) -> Dict:
         try:
-            denoms: Dict[str, int] = await fetch_decimal_denoms(
-                self.chain_client.network_type
-            )
-            bank_balances = await self.chain_client.client.fetch_spendable_balances(
-                address=self.chain_client.address.to_acc_bech32()
-            )
+            denoms: Dict[str, int] = await self.chain_client.fetch_denom_decimals()
+            bank_balances = await self.chain_client.fetch_spendable_balances()
             bank_balances = bank_balances["balances"]
             # hash the bank balances as a kv pair
             human_readable_balances = {
@@ -96,9 +87,7 @@ class InjectiveBank(InjectiveBase):
     async def query_total_supply(self, denom_list: List[str] = None) -> Dict:
         try:
             # we request this over and over again because new tokens can be added
-            denoms: Dict[str, int] = await fetch_decimal_denoms(
-                self.chain_client.network
-            )
+            denoms: Dict[str, int] = await self.chain_client.fetch_denom_decimals()
             total_supply = await self.chain_client.client.fetch_total_supply()
             total_supply = total_supply["supply"]
             human_readable_supply = {
@@ -111,7 +100,7 @@ class InjectiveBank(InjectiveBase):
 
             # check if denom is an arg fron the openai func calling
             filtered_supply = dict()
-            if denom_list != 0:
+            if denom_list != None:
                 # filter the balances
                 # TODO: replace with lambda func
                 for denom in denom_list:
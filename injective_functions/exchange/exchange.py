@@ -1,33 +1,51 @@
 from decimal import Decimal
 from injective_functions.base import InjectiveBase
-from injective_functions.utils.indexer_requests import fetch_decimal_denoms
-from injective_functions.utils.helpers import (
-    impute_market_id,
-    impute_market_ids,
-    detailed_exception_info,
+from injective_functions.utils.backtest import (
+    load_candles,
+    offline_context,
+    run_backtest,
+    sweep,
+)
+from injective_functions.utils.candles import (
+    candle_cache,
+    iso,
+    parse_interval,
+    parse_time,
+    summarize,
+    volume_profile,
+    window,
+)
+from injective_functions.utils.helpers import detailed_exception_info
+from injective_functions.utils.order_context import to_decimal
+from injective_functions.utils.quantization import OrderRejected, is_buy_side
+from injective_functions.utils.slippage import estimate_fill
+from injective_functions.utils.trade_store import (
+    DEFAULT_MAX_PAGES,
+    TRUNCATED_WARNING,
+    TradeStore,
+    sync_trades,
 )
 from pyinjective.client.model.pagination import PaginationOption
 
 from typing import Dict, List
 
+
 class InjectiveExchange(InjectiveBase):
     def __init__(self, chain_client) -> None:
         # Initializes the network and the composer
         super().__init__(chain_client)
-    
+
     async def get_subaccount_deposits(
         self, subaccount_idx: int, denoms: List[str] = None
     ) -> Dict:
         try:
 
             subaccount_id = self.chain_client.address.get_subaccount_id(subaccount_idx)
-            deposits_response = (
-                await self.chain_client.client.fetch_subaccount_deposits(
-                    subaccount_id=subaccount_id
-                )
+            deposits_response = await self.chain_client.fetch_subaccount_deposits(
+                subaccount_id
             )
             deposits = deposits_response["deposits"]
-            denom_decimals = await fetch_decimal_denoms(self.chain_client.network_type)
+            denom_decimals = await self.chain_client.fetch_denom_decimals()
             human_readable_deposits = {}
             # checks if the denoms are specified
             if denoms:
@@ -69,7 +87,7 @@ class InjectiveExchange(InjectiveBase):
 
     async def get_aggregate_market_volumes(self, market_ids=List[str]) -> Dict:
         try:
-            market_ids = await impute_market_ids(market_ids)
+            market_ids = await self.chain_client.resolve_market_ids(market_ids)
             res = await self.chain_client.client.fetch_aggregate_market_volumes(
                 market_ids=market_ids
             )
@@ -81,7 +99,7 @@ class InjectiveExchange(InjectiveBase):
         self, market_ids: List[str], addresses: List[str]
     ) -> Dict:
         try:
-            market_ids = await impute_market_ids(market_ids)
+            market_ids = await self.chain_client.resolve_market_ids(market_ids)
             res = await self.chain_client.client.fetch_aggregate_volumes(
                 accounts=addresses,
                 market_ids=market_ids,
@@ -92,7 +110,7 @@ class InjectiveExchange(InjectiveBase):
 
     async def get_subaccount_orders(self, subaccount_idx: int, market_id: str) -> Dict:
         try:
-            market_id = await impute_market_id(market_id)
+            market_id = await self.chain_client.resolve_market_id(market_id)
 
             subaccount_id = self.chain_client.address.get_subaccount_id(subaccount_idx)
             orders = await self.chain_client.client.fetch_chain_subaccount_orders(
@@ -106,7 +124,7 @@ class InjectiveExchange(InjectiveBase):
     async def get_historical_orders(self, market_id: str) -> Dict:
 
         try:
-            market_id = await impute_market_id(market_id)
+            market_id = await self.chain_client.resolve_market_id(market_id)
 
             res = await self.chain_client.client.fetch_historical_trade_records(
                 market_id=market_id
@@ -115,9 +133,195 @@ class InjectiveExchange(InjectiveBase):
         except Exception as e:
             return {"success": False, "error": detailed_exception_info(e)}
 
+    async def sync_trade_history(
+        self, market_id: str, max_pages: int = DEFAULT_MAX_PAGES, recent: int = 10
+    ) -> Dict:
+        """Bring the local trade store of a market up to date and summarize it"""
+        try:
+            market_id = await self.chain_client.resolve_market_id(market_id)
+            store = await sync_trades(self.chain_client, market_id, max_pages)
+            columns = store.read()
+            count = len(columns["timestamp"])
+
+            recent_trades = [
+                {
+                    "time": iso(columns["timestamp"][i]),
+                    "price": float(columns["price"][i]),
+                    "quantity": float(columns["quantity"][i]),
+                    "side": "buy" if columns["side"][i] > 0 else "sell",
+                }
+                for i in range(count - 1, max(count - int(recent), 0) - 1, -1)
+            ]
+            return {
+                "success": True,
+                "result": {
+                    "market_id": market_id,
+                    "new_trades": store.meta["last_added"],
+                    "stored_trades": count,
+                    "history_truncated": store.truncated,
+                    **({"warning": TRUNCATED_WARNING} if store.truncated else {}),
+                    "first_trade_at": iso(columns["timestamp"][0]) if count else None,
+                    "last_trade_at": iso(columns["timestamp"][-1]) if count else None,
+                    "recent_trades": recent_trades,
+                },
+            }
+        except Exception as e:
+            return {"success": False, "error": detailed_exception_info(e)}
+
+    async def _synced_trade_store(self, market_id: str):
+        """The market's trade store brought up to date, or as stored if that
+        fails, and a warning when the stored history is incomplete"""
+        warnings = []
+        try:
+            store = await sync_trades(self.chain_client, market_id)
+        except Exception as e:
+            store = TradeStore(self.chain_client.network_type, market_id)
+            warnings.append(f"Using stored trades only, the sync failed: {e}")
+        if store.truncated:
+            warnings.append(TRUNCATED_WARNING)
+        return store, " ".join(warnings) or None
+
+    async def get_candles(
+        self,
+        market_id: str,
+        interval: str = "1h",
+        start_time: str = None,
+        end_time: str = None,
+        limit: int = 24,
+    ) -> Dict:
+        """OHLCV candles from the local trade store, synced first"""
+        try:
+            market_id = await self.chain_client.resolve_market_id(market_id)
+            interval_ms = parse_interval(interval)
+            store, warning = await self._synced_trade_store(market_id)
+            candles = window(
+                candle_cache.candles(store, interval_ms),
+                parse_time(start_time),
+                parse_time(end_time),
+            )
+            first = max(len(candles["time"]) - int(limit), 0)
+            result = {
+                "market_id": market_id,
+                "interval": interval,
+                "candles": [
+                    {
+                        "time": iso(candles["time"][i]),
+                        "open": float(candles["open"][i]),
+                        "high": float(candles["high"][i]),
+                        "low": float(candles["low"][i]),
+                        "close": float(candles["close"][i]),
+                        "volume": float(candles["volume"][i]),
+                        "vwap": float(candles["notional"][i] / candles["volume"][i]),
+                        "buy_volume": float(candles["buy_volume"][i]),
+                        "trades": int(candles["trades"][i]),
+                    }
+                    for i in range(first, len(candles["time"]))
+                ],
+            }
+            if warning:
+                result["warning"] = warning
+            return {"success": True, "result": result}
+        except Exception as e:
+            return {"success": False, "error": detailed_exception_info(e)}
+
+    async def get_vwap(
+        self, market_id: str, start_time: str = None, end_time: str = None
+    ) -> Dict:
+        """VWAP, range and volume of a market over a time window"""
+        try:
+            market_id = await self.chain_client.resolve_market_id(market_id)
+            store, warning = await self._synced_trade_store(market_id)
+            result = {
+                "market_id": market_id,
+                **summarize(store.read(parse_time(start_time), parse_time(end_time))),
+            }
+            if warning:
+                result["warning"] = warning
+            return {"success": True, "result": result}
+        except Exception as e:
+            return {"success": False, "error": detailed_exception_info(e)}
+
+    async def get_volume_profile(
+        self,
+        market_id: str,
+        start_time: str = None,
+        end_time: str = None,
+        bins: int = 20,
+    ) -> Dict:
+        """Traded volume by price level over a time window"""
+        try:
+            market_id = await self.chain_client.resolve_market_id(market_id)
+            store, warning = await self._synced_trade_store(market_id)
+            result = {
+                "market_id": market_id,
+                **volume_profile(
+                    store.read(parse_time(start_time), parse_time(end_time)),
+                    int(bins),
+                ),
+            }
+            if warning:
+                result["warning"] = warning
+            return {"success": True, "result": result}
+        except Exception as e:
+            return {"success": False, "error": detailed_exception_info(e)}
+
+    async def backtest_strategy(
+        self,
+        market_id: str,
+        strategy: str,
+        interval: str = "1h",
+        quantity: str = "1",
+        params: Dict = None,
+        grid: Dict[str, List] = None,
+        start_time: str = None,
+        end_time: str = None,
+        slippage_bps: float = 5.0,
+        capital: float = 10_000.0,
+    ) -> Dict:
+        """Replay a strategy over the market's stored trades, or sweep a parameter grid"""
+        try:
+            market_id = await self.chain_client.resolve_market_id(market_id)
+            store, warning = await self._synced_trade_store(market_id)
+            candles = load_candles(store, interval, start_time, end_time)
+            ctx = offline_context(
+                market_id, self.chain_client.market_metadata(market_id)
+            )
+            settings = dict(
+                quantity=quantity,
+                slippage_bps=slippage_bps,
+                capital=capital,
+                interval_ms=parse_interval(interval),
+            )
+            if grid:
+                # fixed parameters apply to every combination of the grid
+                runs = sweep(
+                    candles,
+                    ctx,
+                    strategy,
+                    {
+                        **{name: [value] for name, value in (params or {}).items()},
+                        **grid,
+                    },
+                    **settings,
+                )
+                result = {
+                    "market_id": market_id,
+                    "interval": interval,
+                    "runs": len(runs),
+                    "best": [run.to_dict(max_fills=0) for run in runs[:10]],
+                }
+            else:
+                run = run_backtest(candles, ctx, strategy, params, **settings)
+                result = {"market_id": market_id, "interval": interval, **run.to_dict()}
+            if warning:
+                result["warning"] = warning
+            return {"success": True, "result": result}
+        except Exception as e:
+            return {"success": False, "error": detailed_exception_info(e)}
+
     async def get_mid_price_and_tob_derivatives_market(self, market_id: str) -> Dict:
         try:
-            market_id = await impute_market_id(market_id)
+            market_id = await self.chain_client.resolve_market_id(market_id)
 
             res = await self.chain_client.client.fetch_derivative_mid_price_and_tob(
                 market_id=market_id,
@@ -128,7 +332,7 @@ class InjectiveExchange(InjectiveBase):
 
     async def get_mid_price_and_tob_spot_market(self, market_id: str) -> Dict:
         try:
-            market_id = await impute_market_id(market_id)
+            market_id = await self.chain_client.resolve_market_id(market_id)
 
             res = await self.chain_client.client.fetch_spot_mid_price_and_tob(
                 market_id=market_id,
@@ -137,12 +341,26 @@ class InjectiveExchange(InjectiveBase):
         except Exception as e:
             return {"success": False, "error": detailed_exception_info(e)}
 
+    async def quote_market_order(
+        self, market_id: str, quantity: str, side: str
+    ) -> Dict:
+        """Expected average price, worst price and slippage of a market order"""
+        try:
+            market_id = await self.chain_client.resolve_market_id(market_id)
+            orderbook = await self.chain_client.fetch_orderbook(market_id)
+            estimate = estimate_fill(orderbook, to_decimal(quantity), is_buy_side(side))
+            return {"success": True, "result": estimate.to_dict()}
+        except OrderRejected as e:
+            return e.to_dict()
+        except Exception as e:
+            return {"success": False, "error": detailed_exception_info(e)}
+
     async def get_derivatives_orderbook(
         self, market_id: str, limit: int = None
     ) -> Dict:
         try:
-            market_id = await impute_market_id(market_id)
-            pagination = PaginationOption(limit)
+            market_id = await self.chain_client.resolve_market_id(market_id)
+            pagination = PaginationOption(limit=limit)
             orderbook = await self.chain_client.client.fetch_chain_derivative_orderbook(
                 market_id=market_id,
                 pagination=pagination,
@@ -153,8 +371,8 @@ class InjectiveExchange(InjectiveBase):
 
     async def get_spot_orderbook(self, market_id: str, limit: int = None) -> Dict:
         try:
-            market_id = await impute_market_id(market_id)
-            pagination = PaginationOption(limit)
+            market_id = await self.chain_client.resolve_market_id(market_id)
+            pagination = PaginationOption(limit=limit)
             orderbook = await self.chain_client.client.fetch_chain_spot_orderbook(
                 market_id=market_id,
                 pagination=pagination,
@@ -166,7 +384,7 @@ class InjectiveExchange(InjectiveBase):
     async def trader_derivative_orders(self, market_id: str, subaccount_idx: int):
         try:
 
-            market_id = await impute_market_id(market_id)
+            market_id = await self.chain_client.resolve_market_id(market_id)
 
             subaccount_id = self.chain_client.address.get_subaccount_id(subaccount_idx)
             orders = (
@@ -181,7 +399,7 @@ class InjectiveExchange(InjectiveBase):
 
     async def trader_spot_orders(self, market_id: str, subaccount_idx: int):
         try:
-            market_id = await impute_market_id(market_id)
+            market_id = await self.chain_client.resolve_market_id(market_id)
 
             subaccount_id = self.chain_client.address.get_subaccount_id(subaccount_idx)
             orders = await self.chain_client.client.fetch_chain_trader_spot_orders(
@@ -196,7 +414,7 @@ class InjectiveExchange(InjectiveBase):
         self, market_id: str, subaccount_idx: int, order_hashes: List[str]
     ) -> Dict:
         try:
-            market_id = await impute_market_id(market_id)
+            market_id = await self.chain_client.resolve_market_id(market_id)
 
             subaccount_id = self.chain_client.address.get_subaccount_id(subaccount_idx)
             orders = (
@@ -214,7 +432,7 @@ class InjectiveExchange(InjectiveBase):
         self, market_id: str, subaccount_idx: int, order_hashes: List[str]
     ) -> Dict:
         try:
-            market_id = await impute_market_id(market_id)
+            market_id = await self.chain_client.resolve_market_id(market_id)
 
             subaccount_id = self.chain_client.address.get_subaccount_id(subaccount_idx)
             orders = await self.chain_client.client.fetch_chain_spot_orders_by_hashes(
@@ -226,23 +444,26 @@ class InjectiveExchange(InjectiveBase):
         except Exception as e:
             return {"success": False, "error": detailed_exception_info(e)}
 
-    async def get_subaccount_positions_in_markets(self, market_ids: List[str]) -> Dict:
+    async def get_subaccount_positions_in_markets(
+        self, market_ids: List[str] = None, subaccount_idx: int = 0
+    ) -> Dict:
         try:
-            market_ids = await impute_market_ids(market_ids)
-
-            subaccount_id = self.chain_client.address.get_subaccount_id(subaccount_id)
-            positions = await self.chain_client.client.fetch_chain_subaccount_positions(
-                subaccount_id=subaccount_id,
+            subaccount_id = self.chain_client.address.get_subaccount_id(subaccount_idx)
+            positions = (
+                await self.chain_client.fetch_subaccount_positions(subaccount_id)
             )["state"]
             position_map = {}
             for position in positions:
-                position_map[position["market_id"]] = position["position"]
-
-            filtered_positions = dict()
-            if market_ids != None:
-                for market_id in market_ids:
-                    filtered_positions["market_id"] = position_map[market_id]
-                return {"success": True, "result": position_map}
+                position_map[position["marketId"]] = position["position"]
+
+            if market_ids:
+                market_ids = await self.chain_client.resolve_market_ids(market_ids)
+                filtered_positions = {
+                    market_id: position_map[market_id]
+                    for market_id in market_ids
+                    if market_id in position_map
+                }
+                return {"success": True, "result": filtered_positions}
             return {"success": True, "result": position_map}
         except Exception as e:
             return {"success": False, "error": detailed_exception_info(e)}
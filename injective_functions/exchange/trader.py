@@ -1,7 +1,31 @@
+import time
 import uuid
 from decimal import Decimal
 from injective_functions.base import InjectiveBase
-from injective_functions.utils.helpers import impute_market_id, base64convert
+from injective_functions.utils.execution import (
+    DEFAULT_BOOK_FRACTION,
+    STRATEGIES,
+    Execution,
+    execution_engine,
+    new_execution_id,
+)
+from injective_functions.utils.helpers import base64convert
+from injective_functions.utils.ladder import (
+    MAX_ORDERS_PER_TX,
+    ladder_levels,
+    order_hashes_by_cid,
+)
+from injective_functions.utils.order_context import to_decimal
+from injective_functions.utils.quantization import (
+    OrderRejected,
+    QuantizedOrder,
+    is_buy_side,
+    quantize_ladder,
+    quantize_order,
+    round_to_tick,
+)
+from injective_functions.utils.risk import check_order
+from injective_functions.utils.slippage import check_slippage, estimate_fill
 
 # TODO: serve endpoints of trader functions via an api
 # to isolate functions as much as possible
@@ -13,6 +37,22 @@ class InjectiveTrading(InjectiveBase):
         # Initializes the network and the composer
         super().__init__(chain_client)
 
+    async def _broadcast_order(self, msg, order, estimate=None, cid=None) -> dict:
+        result = await self.chain_client.build_and_broadcast_tx(msg)
+        if cid is not None:
+            # fills are looked up by cid, the order hash is only known once included
+            result["cid"] = cid
+        if estimate is not None:
+            result["fill_estimate"] = estimate.to_dict()
+        if order.adjusted:
+            # tell the caller which requested values were rounded to the market's ticks
+            result["quantized"] = {
+                "price": str(order.price),
+                "quantity": str(order.quantity),
+                "requested": order.adjusted,
+            }
+        return result
+
     async def place_derivative_limit_order(
         self,
         price: float,
@@ -21,30 +61,36 @@ class InjectiveTrading(InjectiveBase):
         market_id: str,
         subaccount_idx: int,
         leverage: str,
+        reduce_only: bool = False,
     ):
         """Place a limit order"""
-        market_id = await impute_market_id(market_id)
-        self.subaccount_id = self.chain_client.address.get_subaccount_id(
-            index=subaccount_idx
-        )
+        ctx = await self.chain_client.get_order_context(market_id, subaccount_idx)
+        try:
+            order = quantize_order(ctx, price, quantity, side)
+            await check_order(
+                self.chain_client, ctx, order, side, leverage, reduce_only
+            )
+        except OrderRejected as e:
+            return e.to_dict()
+        cid = str(uuid.uuid4())
         msg = self.chain_client.composer.msg_create_derivative_limit_order(
-            sender=self.chain_client.address.to_acc_bech32(),
-            fee_recipient=self.chain_client.address.to_acc_bech32(),
-            market_id=market_id,
-            subaccount_id=self.subaccount_id,
-            price=Decimal(str(price)),
-            quantity=Decimal(str(quantity)),
+            sender=ctx.sender,
+            fee_recipient=ctx.sender,
+            market_id=ctx.market_id,
+            subaccount_id=ctx.subaccount_id,
+            price=order.price,
+            quantity=order.quantity,
             margin=self.chain_client.composer.calculate_margin(
-                quantity=Decimal(str(quantity)),
-                price=Decimal(str(price)),
+                quantity=order.quantity,
+                price=order.price,
                 leverage=Decimal(leverage),
-                is_reduce_only=False,
+                is_reduce_only=reduce_only,
             ),
             order_type=side,
-            cid=str(uuid.uuid4()),
+            cid=cid,
         )
 
-        return await self.chain_client.build_and_broadcast_tx(msg)
+        return await self._broadcast_order(msg, order, cid=cid)
 
     async def place_derivative_market_order(
         self,
@@ -53,48 +99,55 @@ class InjectiveTrading(InjectiveBase):
         market_id: str,
         subaccount_idx: int,
         leverage: str,
+        reduce_only: bool = False,
+        max_slippage_bps: float = None,
     ):
         """Place a market order"""
 
-        market_id = await impute_market_id(market_id)
-        self.subaccount_id = self.chain_client.address.get_subaccount_id(subaccount_idx)
-        # For market orders, we'll use the current price as an estimate
-        # this gets bbo and mid from composer.
-        estimated_price = (
-            await self.chain_client.client.fetch_derivative_mid_price_and_tob(
-                market_id=market_id
-            )["midPrice"]
-        )
+        ctx = await self.chain_client.get_order_context(market_id, subaccount_idx)
+        # the worst price is where walking the book fills the whole quantity
+        orderbook = await self.chain_client.fetch_orderbook(ctx.market_id)
+        try:
+            estimate = estimate_fill(orderbook, to_decimal(quantity), is_buy_side(side))
+            check_slippage(estimate, max_slippage_bps)
+            order = quantize_order(
+                ctx, estimate.worst_price, quantity, side, is_market=True
+            )
+            await check_order(
+                self.chain_client, ctx, order, side, leverage, reduce_only
+            )
+        except OrderRejected as e:
+            return e.to_dict()
 
+        cid = str(uuid.uuid4())
         msg = self.chain_client.composer.msg_create_derivative_market_order(
-            sender=self.chain_client.address.to_acc_bech32(),
-            fee_recipient=self.chain_client.address.to_acc_bech32(),
-            market_id=market_id,
-            subaccount_id=self.subaccount_id,
-            price=Decimal(estimated_price),
-            quantity=Decimal(str(quantity)),
+            sender=ctx.sender,
+            fee_recipient=ctx.sender,
+            market_id=ctx.market_id,
+            subaccount_id=ctx.subaccount_id,
+            price=order.price,
+            quantity=order.quantity,
             margin=self.chain_client.composer.calculate_margin(
-                quantity=Decimal(str(quantity)),
-                price=Decimal(estimated_price),
+                quantity=order.quantity,
+                price=order.price,
                 leverage=Decimal(leverage),
-                is_reduce_only=False,
+                is_reduce_only=reduce_only,
             ),
             order_type=side,
-            cid=str(uuid.uuid4()),
+            cid=cid,
         )
 
-        return await self.chain_client.build_and_broadcast_tx(msg)
+        return await self._broadcast_order(msg, order, estimate, cid=cid)
 
     async def cancel_derivative_limit_order(
         self, market_id: str, subaccount_idx: int, order_hash: str
     ):
-        market_id = await impute_market_id(market_id)
+        ctx = await self.chain_client.get_order_context(market_id, subaccount_idx)
         converted_order_hash = base64convert(order_hash)
-        subaccount_id = self.chain_client.address.get_subaccount_id(subaccount_idx)
         msg = self.chain_client.composer.msg_cancel_derivative_order(
-            sender=self.chain_client.address.to_acc_bech32(),
-            market_id=market_id,
-            subaccount_id=subaccount_id,
+            sender=ctx.sender,
+            market_id=ctx.market_id,
+            subaccount_id=ctx.subaccount_id,
             order_hash=converted_order_hash,
         )
         return await self.chain_client.build_and_broadcast_tx(msg)
@@ -109,61 +162,333 @@ class InjectiveTrading(InjectiveBase):
     ):
         """Place a limit order"""
 
-        market_id = await impute_market_id(market_id)
-        self.subaccount_id = self.chain_client.address.get_subaccount_id(
-            index=subaccount_idx
-        )
+        ctx = await self.chain_client.get_order_context(market_id, subaccount_idx)
+        try:
+            order = quantize_order(ctx, price, quantity, side)
+            await check_order(self.chain_client, ctx, order, side)
+        except OrderRejected as e:
+            return e.to_dict()
+        cid = str(uuid.uuid4())
         msg = self.chain_client.composer.msg_create_spot_limit_order(
-            sender=self.chain_client.address.to_acc_bech32(),
-            fee_recipient=self.chain_client.address.to_acc_bech32(),
-            market_id=market_id,
-            subaccount_id=self.subaccount_id,
-            price=Decimal(str(price)),
-            quantity=Decimal(str(quantity)),
+            sender=ctx.sender,
+            fee_recipient=ctx.sender,
+            market_id=ctx.market_id,
+            subaccount_id=ctx.subaccount_id,
+            price=order.price,
+            quantity=order.quantity,
             order_type=side,
-            cid=str(uuid.uuid4()),
+            cid=cid,
         )
 
-        return await self.chain_client.build_and_broadcast_tx(msg)
+        return await self._broadcast_order(msg, order, cid=cid)
 
     async def place_spot_market_order(
-        self, quantity: float, side: str, market_id: str, subaccount_idx: int
+        self,
+        quantity: float,
+        side: str,
+        market_id: str,
+        subaccount_idx: int,
+        max_slippage_bps: float = None,
     ):
         """Place a market order"""
 
-        market_id = await impute_market_id(market_id)
-        self.subaccount_id = self.chain_client.address.get_subaccount_id(subaccount_idx)
-        # For market orders, we'll use the current price as an estimate
-        # this gets bbo and mid from composer.
-        estimated_price = (
-            await self.chain_client.client.fetch_derivative_mid_price_and_tob(
-                market_id=market_id
-            )["midPrice"]
-        )
+        ctx = await self.chain_client.get_order_context(market_id, subaccount_idx)
+        # the worst price is where walking the book fills the whole quantity
+        orderbook = await self.chain_client.fetch_orderbook(ctx.market_id)
+        try:
+            estimate = estimate_fill(orderbook, to_decimal(quantity), is_buy_side(side))
+            check_slippage(estimate, max_slippage_bps)
+            order = quantize_order(
+                ctx, estimate.worst_price, quantity, side, is_market=True
+            )
+            await check_order(self.chain_client, ctx, order, side)
+        except OrderRejected as e:
+            return e.to_dict()
 
+        cid = str(uuid.uuid4())
         msg = self.chain_client.composer.msg_create_spot_market_order(
-            sender=self.chain_client.address.to_acc_bech32(),
-            fee_recipient=self.chain_client.address.to_acc_bech32(),
-            market_id=market_id,
-            subaccount_id=self.subaccount_id,
-            price=Decimal(estimated_price),
-            quantity=Decimal(str(quantity)),
+            sender=ctx.sender,
+            fee_recipient=ctx.sender,
+            market_id=ctx.market_id,
+            subaccount_id=ctx.subaccount_id,
+            price=order.price,
+            quantity=order.quantity,
             order_type=side,
-            cid=str(uuid.uuid4()),
+            cid=cid,
         )
 
-        return await self.chain_client.build_and_broadcast_tx(msg)
+        return await self._broadcast_order(msg, order, estimate, cid=cid)
 
     async def cancel_spot_limit_order(
         self, market_id: str, subaccount_idx: int, order_hash: str
     ):
         converted_order_hash = base64convert(order_hash)
-        market_id = await impute_market_id(market_id)
-        subaccount_id = self.chain_client.address.get_subaccount_id(subaccount_idx)
+        ctx = await self.chain_client.get_order_context(market_id, subaccount_idx)
         msg = self.chain_client.composer.msg_cancel_spot_order(
-            sender=self.chain_client.address.to_acc_bech32(),
-            market_id=market_id,
-            subaccount_id=subaccount_id,
+            sender=ctx.sender,
+            market_id=ctx.market_id,
+            subaccount_id=ctx.subaccount_id,
             order_hash=converted_order_hash,
         )
         return await self.chain_client.build_and_broadcast_tx(msg)
+
+    async def place_order_ladder(
+        self,
+        market_id: str,
+        side: str,
+        price_from: float,
+        price_to: float,
+        levels: int,
+        total_quantity: float,
+        subaccount_idx: int = 0,
+        distribution: str = "flat",
+        size_ratio: float = 1.5,
+        leverage: str = "1",
+        reduce_only: bool = False,
+    ):
+        """Place a grid of limit orders in a spot or derivative market"""
+        ctx = await self.chain_client.get_order_context(market_id, subaccount_idx)
+        try:
+            prices, quantities = ladder_levels(
+                price_from,
+                price_to,
+                int(levels),
+                total_quantity,
+                distribution,
+                size_ratio,
+            )
+            orders = quantize_ladder(ctx, prices, quantities, side)
+            # margin and fees are linear in notional, so one check covers the grid
+            quantity = sum(order.quantity for order in orders)
+            notional = sum(order.notional for order in orders)
+            await check_order(
+                self.chain_client,
+                ctx,
+                QuantizedOrder(price=notional / quantity, quantity=quantity),
+                side,
+                leverage,
+                reduce_only,
+            )
+        except OrderRejected as e:
+            return e.to_dict()
+
+        composer = self.chain_client.composer
+        placed = []
+        for order in orders:
+            common = dict(
+                sender=ctx.sender,
+                fee_recipient=ctx.sender,
+                market_id=ctx.market_id,
+                subaccount_id=ctx.subaccount_id,
+                price=order.price,
+                quantity=order.quantity,
+                order_type=side,
+                cid=str(uuid.uuid4()),
+            )
+            if ctx.is_derivative:
+                msg = composer.msg_create_derivative_limit_order(
+                    margin=composer.calculate_margin(
+                        quantity=order.quantity,
+                        price=order.price,
+                        leverage=Decimal(leverage),
+                        is_reduce_only=reduce_only,
+                    ),
+                    **common,
+                )
+            else:
+                msg = composer.msg_create_spot_limit_order(**common)
+            placed.append((order, common["cid"], msg))
+
+        # the chain numbers each subaccount's orders, so their hashes are known
+        # before sending as long as nothing else places orders meanwhile
+        hash_error = None
+        try:
+            expected_hashes = await self.chain_client.compute_order_hashes(
+                [msg for _, _, msg in placed], subaccount_idx
+            )
+        except Exception as e:
+            expected_hashes, hash_error = [None] * len(placed), str(e)
+        # one tx per chunk; the chain client gives each the next account sequence
+        transactions, orders_out, error = [], [], None
+        chunks = range(0, len(placed), MAX_ORDERS_PER_TX)
+        for number, start in enumerate(chunks, start=1):
+            chunk = placed[start : start + MAX_ORDERS_PER_TX]
+            result = await self.chain_client.build_and_broadcast_tx(
+                [msg for _, _, msg in chunk]
+            )
+            tx_response = (result.get("result") or {}).get("txResponse", {})
+            transaction = {
+                "tx_hash": tx_response.get("txhash"),
+                "job_id": result.get("job_id"),
+                "orders": len(chunk),
+                "gas_fee": result.get("gas_fee"),
+                "status": "submitted",
+            }
+            transactions.append(transaction)
+            if not result.get("success") or tx_response.get("code", 0) != 0:
+                transaction["status"] = "failed"
+                transaction["error"] = str(
+                    result.get("error")
+                    or tx_response.get("rawLog")
+                    or "transaction failed"
+                )
+                error = (
+                    f"Transaction {number} of {len(chunks)} failed, later ones "
+                    f"were not sent: {transaction['error']}"
+                )
+                break
+            # included txs (the simulator's) carry the actual hashes in their events
+            hashes = order_hashes_by_cid(tx_response.get("events", []))
+            orders_out.extend(
+                {
+                    "price": f"{order.price:f}",
+                    "quantity": f"{order.quantity:f}",
+                    "cid": cid,
+                    "order_hash": hashes.get(cid) or expected_hashes[start + i],
+                }
+                for i, (order, cid, _) in enumerate(chunk)
+            )
+
+        summary = {
+            "market": ctx.ticker,
+            "side": side,
+            "distribution": distribution,
+            "levels_requested": int(levels),
+            "orders_placed": len(orders_out),
+            "orders_not_placed": len(placed) - len(orders_out),
+            "orders_total": len(placed),
+            "total_quantity": f"{sum(order.quantity for order in orders):f}",
+            "price_range": [f"{orders[0].price:f}", f"{orders[-1].price:f}"],
+            "transactions": transactions,
+            "orders": orders_out,
+        }
+        if hash_error is not None:
+            summary["order_hash_error"] = hash_error
+        if any(order["order_hash"] is None for order in orders_out):
+            summary["note"] = (
+                "Order hashes appear in the tx events once get_tx_status reports "
+                "the job as confirmed; orders can be matched by cid"
+            )
+        if error is not None:
+            return {"success": False, "error": error, "result": summary}
+        return {"success": True, "result": summary}
+
+    async def start_execution(
+        self,
+        market_id: str,
+        side: str,
+        quantity: float,
+        strategy: str = "twap",
+        duration_seconds: float = 300,
+        slices: int = 10,
+        participation_rate: float = 0.1,
+        interval_seconds: float = 15,
+        subaccount_idx: int = 0,
+        leverage: str = "1",
+        reduce_only: bool = False,
+        max_slippage_bps: float = None,
+        book_fraction: float = None,
+    ):
+        """Work a large market order in the background as TWAP or POV slices"""
+        ctx = await self.chain_client.get_order_context(market_id, subaccount_idx)
+        try:
+            if strategy not in STRATEGIES:
+                raise OrderRejected(
+                    "invalid_execution",
+                    f"Unknown strategy {strategy!r}, use one of {', '.join(STRATEGIES)}",
+                    strategy=strategy,
+                )
+            duration = float(duration_seconds)
+            slices = int(slices)
+            rate = to_decimal(participation_rate)
+            fraction = to_decimal(book_fraction or DEFAULT_BOOK_FRACTION)
+            if duration <= 0 or slices < 1 or not 0 < rate <= 1 or not 0 < fraction:
+                raise OrderRejected(
+                    "invalid_execution",
+                    "duration_seconds and slices must be positive, "
+                    "participation_rate in (0, 1] and book_fraction positive",
+                    duration_seconds=duration_seconds,
+                    slices=slices,
+                    participation_rate=participation_rate,
+                    book_fraction=fraction,
+                )
+            total = round_to_tick(
+                to_decimal(quantity), ctx.min_quantity_tick_size, False
+            )
+            if total <= 0:
+                raise OrderRejected(
+                    "below_quantity_tick",
+                    f"Quantity {quantity} is below the minimum of {ctx.ticker}",
+                    quantity=quantity,
+                    min_quantity_tick_size=ctx.min_quantity_tick_size,
+                )
+            # funds for the whole parent at today's top of book, children re-check
+            orderbook = await self.chain_client.fetch_orderbook(ctx.market_id, limit=1)
+            top = orderbook["sells" if is_buy_side(side) else "buys"]
+            if top:
+                await check_order(
+                    self.chain_client,
+                    ctx,
+                    QuantizedOrder(price=top[0][0], quantity=total),
+                    side,
+                    leverage,
+                    reduce_only,
+                )
+        except OrderRejected as e:
+            return e.to_dict()
+
+        now = time.time()
+        interval = duration / slices if strategy == "twap" else float(interval_seconds)
+        execution = execution_engine.start(
+            Execution(
+                execution_id=new_execution_id(),
+                owner=ctx.sender,
+                market_id=ctx.market_id,
+                ticker=ctx.ticker,
+                side=side,
+                strategy=strategy,
+                quantity=total,
+                quantity_tick=ctx.min_quantity_tick_size,
+                interval_seconds=interval,
+                started_at=now,
+                end_at=now + duration,
+                subaccount_idx=subaccount_idx,
+                leverage=str(leverage),
+                reduce_only=reduce_only,
+                max_slippage_bps=max_slippage_bps,
+                participation_rate=rate if strategy == "pov" else None,
+                book_fraction=fraction,
+            ),
+            self,
+        )
+        return {"success": True, "result": execution.progress()}
+
+    async def get_execution_status(self, execution_id: str):
+        """Progress and child orders of one execution"""
+        execution = execution_engine.get(
+            execution_id, self.chain_client.address.to_acc_bech32()
+        )
+        if execution is None:
+            return {"success": False, "error": f"No execution {execution_id}"}
+        return {"success": True, "result": execution.to_dict()}
+
+    async def list_executions(self, active_only: bool = False):
+        """Progress of this agent's executions, newest first"""
+        executions = execution_engine.list(self.chain_client.address.to_acc_bech32())
+        return {
+            "success": True,
+            "result": [
+                execution.progress()
+                for execution in reversed(executions)
+                if not (active_only and execution.done)
+            ],
+        }
+
+    async def cancel_execution(self, execution_id: str):
+        """Stop an execution; children already placed are not undone"""
+        execution = execution_engine.cancel(
+            execution_id, self.chain_client.address.to_acc_bech32()
+        )
+        if execution is None:
+            return {"success": False, "error": f"No execution {execution_id}"}
+        return {"success": True, "result": execution.progress()}
@@ -1,18 +1,32 @@
 from typing import Dict
-from injective_functions.utils.initializers import ChainInteractor
-from injective_functions.account import InjectiveAccounts
-from injective_functions.auction import InjectiveAuction
-from injective_functions.authz import InjectiveAuthz
-from injective_functions.bank import InjectiveBank
-from injective_functions.exchange.exchange import InjectiveExchange
-from injective_functions.exchange.trader import InjectiveTrading
-from injective_functions.staking import InjectiveStaking
-from injective_functions.token_factory import InjectiveTokenFactory
 
 
 class InjectiveClientFactory:
     """Factory for creating Injective client instances."""
 
+    @staticmethod
+    def load_modules() -> Dict[str, type]:
+        """Import the module classes; they pull in pyinjective, so only on first use"""
+        from injective_functions.account import InjectiveAccounts
+        from injective_functions.auction import InjectiveAuction
+        from injective_functions.authz import InjectiveAuthz
+        from injective_functions.bank import InjectiveBank
+        from injective_functions.exchange.exchange import InjectiveExchange
+        from injective_functions.exchange.trader import InjectiveTrading
+        from injective_functions.staking import InjectiveStaking
+        from injective_functions.token_factory import InjectiveTokenFactory
+
+        return {
+            "account": InjectiveAccounts,
+            "auction": InjectiveAuction,
+            "authz": InjectiveAuthz,
+            "bank": InjectiveBank,
+            "exchange": InjectiveExchange,
+            "trader": InjectiveTrading,
+            "staking": InjectiveStaking,
+            "token_factory": InjectiveTokenFactory,
+        }
+
     @staticmethod
     async def create_all(private_key: str, network_type: str = "mainnet") -> Dict:
         """
@@ -20,27 +34,31 @@ class InjectiveClientFactory:
 
         Args:
             private_key (str): Private key for blockchain interactions
-            network_type (str, optional): Network type. Defaults to "mainnet".
+            network_type (str, optional): Network type ("mainnet", "testnet" or
+                "simulated" for the offline in-memory chain). Defaults to "mainnet".
 
         Returns:
             Dict: Dictionary containing all initialized clients
         """
         # Create and initialize the chain client
-        chain_client = ChainInteractor(
-            network_type=network_type, private_key=private_key
-        )
+        if network_type == "simulated":
+            from injective_functions.simulator import SimulatedChainInteractor
+
+            chain_client = SimulatedChainInteractor(
+                network_type=network_type, private_key=private_key
+            )
+        else:
+            from injective_functions.utils.initializers import ChainInteractor
+
+            chain_client = ChainInteractor(
+                network_type=network_type, private_key=private_key
+            )
         await chain_client.init_client()  # This line is crucial!
 
         # Create instances with the initialized chain client
         clients = {
-            "account": InjectiveAccounts(chain_client),
-            "auction": InjectiveAuction(chain_client),
-            "authz": InjectiveAuthz(chain_client),
-            "bank": InjectiveBank(chain_client),
-            "exchange": InjectiveExchange(chain_client),
-            "trader": InjectiveTrading(chain_client),
-            "staking": InjectiveStaking(chain_client),
-            "token_factory": InjectiveTokenFactory(chain_client),
+            name: module(chain_client)
+            for name, module in InjectiveClientFactory.load_modules().items()
         }
         print(clients)
         return clients
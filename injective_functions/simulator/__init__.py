@@ -0,0 +1,22 @@
+"""Offline, in-memory chain backend for paper trading, tests and load generation."""
+
+from injective_functions.simulator.engine import (
+    SimMarket,
+    SimulatedExchange,
+    SimulationError,
+)
+from injective_functions.simulator.client import SimulatedAsyncClient, SimulatedComposer
+from injective_functions.simulator.interactor import (
+    SimulatedChainInteractor,
+    default_exchange,
+)
+
+__all__ = [
+    "SimMarket",
+    "SimulatedExchange",
+    "SimulationError",
+    "SimulatedAsyncClient",
+    "SimulatedComposer",
+    "SimulatedChainInteractor",
+    "default_exchange",
+]
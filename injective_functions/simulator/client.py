@@ -0,0 +1,838 @@
+"""Drop-in stand-ins for pyinjective's AsyncClient and Composer."""
+
+import base64
+import hashlib
+import json
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+from injective_functions.simulator.engine import (
+    SimOrder,
+    SimulatedExchange,
+    SimulationError,
+)
+
+# rough per-message gas figures, in line with what mainnet reports
+GAS_PER_MSG = {
+    "/injective.exchange.v1beta1.MsgCreateSpotLimitOrder": 120000,
+    "/injective.exchange.v1beta1.MsgCreateSpotMarketOrder": 130000,
+    "/injective.exchange.v1beta1.MsgCreateDerivativeLimitOrder": 140000,
+    "/injective.exchange.v1beta1.MsgCreateDerivativeMarketOrder": 150000,
+    "/injective.exchange.v1beta1.MsgCancelSpotOrder": 80000,
+    "/injective.exchange.v1beta1.MsgCancelDerivativeOrder": 80000,
+    "/injective.exchange.v1beta1.MsgBatchUpdateOrders": 100000,
+}
+DEFAULT_GAS = 90000
+
+
+def encode_tx(messages: List[Dict]) -> bytes:
+    """Serialize simulated messages the way the simulated client expects them"""
+    return json.dumps({"messages": messages}, default=str).encode()
+
+
+def _str(value: Optional[Decimal]) -> str:
+    return "" if value is None else format(value.normalize(), "f")
+
+
+class SimulatedComposer:
+    """Builds simulated messages with the same signatures as pyinjective's Composer"""
+
+    def coin(self, amount: int, denom: str) -> Dict:
+        return {"amount": str(amount), "denom": denom}
+
+    def calculate_margin(
+        self,
+        quantity: Decimal,
+        price: Decimal,
+        leverage: Decimal,
+        is_reduce_only: bool = False,
+    ) -> Decimal:
+        if is_reduce_only:
+            return Decimal(0)
+        return quantity * price / leverage
+
+    def spot_order(
+        self,
+        market_id: str,
+        subaccount_id: str,
+        fee_recipient: str,
+        price: Decimal,
+        quantity: Decimal,
+        order_type: str,
+        cid: Optional[str] = None,
+        trigger_price: Optional[Decimal] = None,
+    ) -> Dict:
+        return {
+            "market_id": market_id,
+            "subaccount_id": subaccount_id,
+            "fee_recipient": fee_recipient,
+            "price": str(price),
+            "quantity": str(quantity),
+            "order_type": order_type,
+            "cid": cid or "",
+        }
+
+    def derivative_order(
+        self,
+        market_id: str,
+        subaccount_id: str,
+        fee_recipient: str,
+        price: Decimal,
+        quantity: Decimal,
+        margin: Decimal,
+        order_type: str,
+        cid: Optional[str] = None,
+        trigger_price: Optional[Decimal] = None,
+    ) -> Dict:
+        order = self.spot_order(
+            market_id, subaccount_id, fee_recipient, price, quantity, order_type, cid
+        )
+        order["margin"] = str(margin)
+        return order
+
+    def _order_msg(self, type_url: str, sender: str, order: Dict) -> Dict:
+        return {"@type": type_url, "sender": sender, "order": order}
+
+    def msg_create_spot_limit_order(
+        self,
+        market_id,
+        sender,
+        subaccount_id,
+        fee_recipient,
+        price,
+        quantity,
+        order_type,
+        cid=None,
+        trigger_price=None,
+    ) -> Dict:
+        order = self.spot_order(
+            market_id, subaccount_id, fee_recipient, price, quantity, order_type, cid
+        )
+        return self._order_msg(
+            "/injective.exchange.v1beta1.MsgCreateSpotLimitOrder", sender, order
+        )
+
+    def msg_create_spot_market_order(
+        self,
+        market_id,
+        sender,
+        subaccount_id,
+        fee_recipient,
+        price,
+        quantity,
+        order_type,
+        cid=None,
+        trigger_price=None,
+    ) -> Dict:
+        order = self.spot_order(
+            market_id, subaccount_id, fee_recipient, price, quantity, order_type, cid
+        )
+        return self._order_msg(
+            "/injective.exchange.v1beta1.MsgCreateSpotMarketOrder", sender, order
+        )
+
+    def msg_create_derivative_limit_order(
+        self,
+        market_id,
+        sender,
+        subaccount_id,
+        fee_recipient,
+        price,
+        quantity,
+        margin,
+        order_type,
+        cid=None,
+        trigger_price=None,
+    ) -> Dict:
+        order = self.derivative_order(
+            market_id,
+            subaccount_id,
+            fee_recipient,
+            price,
+            quantity,
+            margin,
+            order_type,
+            cid,
+        )
+        return self._order_msg(
+            "/injective.exchange.v1beta1.MsgCreateDerivativeLimitOrder", sender, order
+        )
+
+    def msg_create_derivative_market_order(
+        self,
+        market_id,
+        sender,
+        subaccount_id,
+        fee_recipient,
+        price,
+        quantity,
+        margin,
+        order_type,
+        cid=None,
+        trigger_price=None,
+    ) -> Dict:
+        order = self.derivative_order(
+            market_id,
+            subaccount_id,
+            fee_recipient,
+            price,
+            quantity,
+            margin,
+            order_type,
+            cid,
+        )
+        return self._order_msg(
+            "/injective.exchange.v1beta1.MsgCreateDerivativeMarketOrder", sender, order
+        )
+
+    def msg_cancel_spot_order(
+        self, market_id, sender, subaccount_id, order_hash=None, cid=None
+    ) -> Dict:
+        return {
+            "@type": "/injective.exchange.v1beta1.MsgCancelSpotOrder",
+            "sender": sender,
+            "market_id": market_id,
+            "subaccount_id": subaccount_id,
+            "order_hash": order_hash,
+            "cid": cid,
+        }
+
+    def msg_cancel_derivative_order(
+        self,
+        market_id,
+        sender,
+        subaccount_id,
+        order_hash=None,
+        cid=None,
+        is_conditional=False,
+        is_buy=False,
+        is_market_order=False,
+    ) -> Dict:
+        msg = self.msg_cancel_spot_order(
+            market_id, sender, subaccount_id, order_hash, cid
+        )
+        msg["@type"] = "/injective.exchange.v1beta1.MsgCancelDerivativeOrder"
+        return msg
+
+    def msg_batch_update_orders(
+        self,
+        sender: str,
+        subaccount_id: Optional[str] = None,
+        spot_orders_to_cancel: Optional[List[Dict]] = None,
+        derivative_orders_to_cancel: Optional[List[Dict]] = None,
+        spot_orders_to_create: Optional[List[Dict]] = None,
+        derivative_orders_to_create: Optional[List[Dict]] = None,
+        **kwargs,
+    ) -> Dict:
+        return {
+            "@type": "/injective.exchange.v1beta1.MsgBatchUpdateOrders",
+            "sender": sender,
+            "subaccount_id": subaccount_id,
+            "spot_orders_to_cancel": spot_orders_to_cancel or [],
+            "derivative_orders_to_cancel": derivative_orders_to_cancel or [],
+            "spot_orders_to_create": spot_orders_to_create or [],
+            "derivative_orders_to_create": derivative_orders_to_create or [],
+        }
+
+    def msg_deposit(
+        self, sender: str, subaccount_id: str, amount: Decimal, denom: str
+    ) -> Dict:
+        return {
+            "@type": "/injective.exchange.v1beta1.MsgDeposit",
+            "sender": sender,
+            "subaccount_id": subaccount_id,
+            "amount": str(amount),
+            "denom": denom,
+        }
+
+    def msg_withdraw(
+        self, sender: str, subaccount_id: str, amount: Decimal, denom: str
+    ) -> Dict:
+        msg = self.msg_deposit(sender, subaccount_id, amount, denom)
+        msg["@type"] = "/injective.exchange.v1beta1.MsgWithdraw"
+        return msg
+
+    def msg_subaccount_transfer(
+        self, sender, source_subaccount_id, destination_subaccount_id, amount, denom
+    ) -> Dict:
+        return {
+            "@type": "/injective.exchange.v1beta1.MsgSubaccountTransfer",
+            "sender": sender,
+            "source_subaccount_id": source_subaccount_id,
+            "destination_subaccount_id": destination_subaccount_id,
+            "amount": str(amount),
+            "denom": denom,
+        }
+
+    def msg_external_transfer(
+        self, sender, source_subaccount_id, destination_subaccount_id, amount, denom
+    ) -> Dict:
+        msg = self.msg_subaccount_transfer(
+            sender, source_subaccount_id, destination_subaccount_id, amount, denom
+        )
+        msg["@type"] = "/injective.exchange.v1beta1.MsgExternalTransfer"
+        return msg
+
+    def MsgSend(
+        self, from_address: str, to_address: str, amount: float, denom: str
+    ) -> Dict:
+        return {
+            "@type": "/cosmos.bank.v1beta1.MsgSend",
+            "from_address": from_address,
+            "to_address": to_address,
+            "amount": str(amount),
+            "denom": denom,
+        }
+
+    def MsgBid(self, sender: str, bid_amount: float, round: float) -> Dict:
+        return {
+            "@type": "/injective.auction.v1beta1.MsgBid",
+            "sender": sender,
+            "bid_amount": str(bid_amount),
+            "round": int(round),
+        }
+
+
+class SimulatedAsyncClient:
+    """Answers the AsyncClient queries the injective_functions modules use from a SimulatedExchange"""
+
+    def __init__(self, exchange: SimulatedExchange) -> None:
+        self.exchange = exchange
+        self.timeout_height = 0
+        self.txs: Dict[str, Dict] = {}
+        self._sequences: Dict[str, int] = {}
+        self._address: Optional[str] = None
+
+    # ------------------------------------------------------------------
+    # account / tx plumbing
+    # ------------------------------------------------------------------
+    async def composer(self) -> SimulatedComposer:
+        return SimulatedComposer()
+
+    async def sync_timeout_height(self) -> None:
+        self.timeout_height = self.exchange.block_height + 50
+
+    async def fetch_account(self, address: str) -> Dict:
+        self._address = address
+        self._sequences.setdefault(address, 0)
+        return {"address": address, "sequence": str(self._sequences[address])}
+
+    def get_sequence(self) -> int:
+        return self._sequences.get(self._address, 0)
+
+    def get_number(self) -> int:
+        return 0
+
+    async def simulate(self, tx_bytes: bytes) -> Dict[str, Any]:
+        messages = json.loads(tx_bytes)["messages"]
+        # each message sees the state the previous ones left, as on chain
+        state = self.exchange.snapshot()
+        try:
+            for msg in messages:
+                self._check(msg)
+                self._apply(msg)
+        finally:
+            self.exchange.restore(state)
+        gas = sum(GAS_PER_MSG.get(msg["@type"], DEFAULT_GAS) for msg in messages)
+        return {"gasInfo": {"gasWanted": str(gas), "gasUsed": str(gas)}, "result": {}}
+
+    async def broadcast_tx_sync_mode(self, tx_bytes: bytes) -> Dict[str, Any]:
+        messages = json.loads(tx_bytes)["messages"]
+        self.exchange.block_height += 1
+        tx_hash = (
+            hashlib.sha256(tx_bytes + str(self.exchange.block_height).encode())
+            .hexdigest()
+            .upper()
+        )
+        gas = sum(GAS_PER_MSG.get(msg["@type"], DEFAULT_GAS) for msg in messages)
+        events: List[Dict] = []
+        code, raw_log = 0, ""
+        state = self.exchange.snapshot()
+        try:
+            for msg in messages:
+                events.extend(self._apply(msg))
+        except SimulationError as e:
+            # a failed tx changes nothing but the sequence
+            self.exchange.restore(state)
+            events, code, raw_log = [], 1, str(e)
+        if self._address is not None:
+            self._sequences[self._address] = self._sequences.get(self._address, 0) + 1
+        tx_response = {
+            "txhash": tx_hash,
+            "height": str(self.exchange.block_height),
+            "code": code,
+            "rawLog": raw_log,
+            "gasWanted": str(gas),
+            "gasUsed": str(gas),
+            "events": events,
+            "timestamp": str(int(self.exchange.clock())),
+        }
+        self.txs[tx_hash] = tx_response
+        return {"txResponse": tx_response}
+
+    async def fetch_tx(self, hash: str) -> Dict[str, Any]:
+        tx_response = self.txs.get(hash.upper())
+        if tx_response is None:
+            raise SimulationError(f"tx {hash} not found")
+        return {"tx": {}, "txResponse": tx_response}
+
+    # ------------------------------------------------------------------
+    # bank
+    # ------------------------------------------------------------------
+    def _base_units(self, denom: str, amount: Decimal) -> str:
+        return str(int(amount * 10 ** self.exchange.denom_decimals.get(denom, 0)))
+
+    def _human(self, denom: str, amount) -> Decimal:
+        return Decimal(str(amount)) / 10 ** self.exchange.denom_decimals.get(denom, 0)
+
+    async def fetch_bank_balances(self, address: str) -> Dict[str, Any]:
+        balances = self.exchange.bank.get(address, {})
+        return {
+            "balances": [
+                {"denom": denom, "amount": self._base_units(denom, amount)}
+                for denom, amount in balances.items()
+            ],
+            "pagination": {"total": str(len(balances))},
+        }
+
+    async def fetch_spendable_balances(self, address: str) -> Dict[str, Any]:
+        return await self.fetch_bank_balances(address)
+
+    async def fetch_total_supply(self, **kwargs) -> Dict[str, Any]:
+        supply = self.exchange.total_supply()
+        return {
+            "supply": [
+                {"denom": denom, "amount": self._base_units(denom, amount)}
+                for denom, amount in supply.items()
+            ]
+        }
+
+    # ------------------------------------------------------------------
+    # exchange
+    # ------------------------------------------------------------------
+    async def fetch_subaccount_deposits(
+        self, subaccount_id: str = None, **kwargs
+    ) -> Dict[str, Any]:
+        deposits = self.exchange.deposits.get(subaccount_id, {})
+        return {
+            "deposits": {
+                denom: {
+                    "availableBalance": self._base_units(denom, deposit.available),
+                    "totalBalance": self._base_units(denom, deposit.total),
+                }
+                for denom, deposit in deposits.items()
+            }
+        }
+
+    async def fetch_subaccounts_list(self, address: str) -> Dict[str, Any]:
+        return {
+            "subaccounts": [
+                subaccount_id
+                for subaccount_id in self.exchange.deposits
+                if self.exchange.subaccount_owner(subaccount_id) == address
+            ]
+        }
+
+    async def _mid_price_and_tob(self, market_id: str) -> Dict[str, Any]:
+        tob = self.exchange.mid_price_and_tob(market_id)
+        return {
+            "midPrice": _str(tob["mid_price"]),
+            "bestBuyPrice": _str(tob["best_buy_price"]),
+            "bestSellPrice": _str(tob["best_sell_price"]),
+        }
+
+    async def fetch_derivative_mid_price_and_tob(
+        self, market_id: str
+    ) -> Dict[str, Any]:
+        return await self._mid_price_and_tob(market_id)
+
+    async def fetch_spot_mid_price_and_tob(self, market_id: str) -> Dict[str, Any]:
+        return await self._mid_price_and_tob(market_id)
+
+    def _orderbook(self, market_id: str, pagination=None) -> Dict[str, Any]:
+        book = self.exchange.books[self.exchange._market(market_id).market_id]
+        limit = getattr(pagination, "limit", None)
+        return {
+            "buysPriceLevel": [
+                {"p": _str(p), "q": _str(q)} for p, q in book.levels(True, limit)
+            ],
+            "sellsPriceLevel": [
+                {"p": _str(p), "q": _str(q)} for p, q in book.levels(False, limit)
+            ],
+        }
+
+    async def fetch_chain_derivative_orderbook(
+        self, market_id: str, limit_cumulative_notional=None, pagination=None
+    ) -> Dict[str, Any]:
+        return self._orderbook(market_id, pagination)
+
+    async def fetch_chain_spot_orderbook(
+        self,
+        market_id: str,
+        order_side=None,
+        limit_cumulative_notional=None,
+        limit_cumulative_quantity=None,
+        pagination=None,
+    ) -> Dict[str, Any]:
+        return self._orderbook(market_id, pagination)
+
+    @staticmethod
+    def _order(order: SimOrder) -> Dict[str, Any]:
+        return {
+            "price": _str(order.price),
+            "quantity": _str(order.quantity),
+            "fillable": _str(order.fillable),
+            "margin": _str(order.margin),
+            "isBuy": order.is_buy,
+            "orderHash": order.order_hash,
+            "cid": order.cid,
+        }
+
+    async def fetch_chain_trader_derivative_orders(
+        self, market_id: str, subaccount_id: str
+    ) -> Dict[str, Any]:
+        orders = self.exchange.subaccount_orders(subaccount_id, market_id)
+        return {"orders": [self._order(order) for order in orders]}
+
+    async def fetch_chain_trader_spot_orders(
+        self, market_id: str, subaccount_id: str
+    ) -> Dict[str, Any]:
+        return await self.fetch_chain_trader_derivative_orders(market_id, subaccount_id)
+
+    async def fetch_chain_subaccount_orders(
+        self, subaccount_id: str, market_id: str
+    ) -> Dict[str, Any]:
+        orders = self.exchange.subaccount_orders(subaccount_id, market_id)
+        return {
+            "buyOrders": [self._order(order) for order in orders if order.is_buy],
+            "sellOrders": [self._order(order) for order in orders if not order.is_buy],
+        }
+
+    async def fetch_chain_derivative_orders_by_hashes(
+        self, market_id: str, subaccount_id: str, order_hashes: List[str]
+    ) -> Dict[str, Any]:
+        orders = self.exchange.subaccount_orders(subaccount_id, market_id)
+        wanted = {order_hash.lower() for order_hash in order_hashes}
+        return {
+            "orders": [
+                self._order(order)
+                for order in orders
+                if order.order_hash.lower() in wanted
+            ]
+        }
+
+    async def fetch_chain_spot_orders_by_hashes(
+        self, market_id: str, subaccount_id: str, order_hashes: List[str]
+    ) -> Dict[str, Any]:
+        return await self.fetch_chain_derivative_orders_by_hashes(
+            market_id, subaccount_id, order_hashes
+        )
+
+    def _indexer_orders(self, subaccount_id: str, derivative: bool) -> Dict[str, Any]:
+        orders = [
+            order
+            for order in self.exchange.subaccount_orders(subaccount_id)
+            if self.exchange._market(order.market_id).is_derivative == derivative
+        ]
+        return {
+            "orders": [
+                {
+                    "orderHash": order.order_hash,
+                    "marketId": order.market_id,
+                    "subaccountId": order.subaccount_id,
+                    "orderSide": "buy" if order.is_buy else "sell",
+                    "price": _str(order.price),
+                    "quantity": _str(order.quantity),
+                    "unfilledQuantity": _str(order.fillable),
+                    "cid": order.cid,
+                }
+                for order in orders
+            ]
+        }
+
+    async def fetch_spot_orders(
+        self, subaccount_id: str = None, **kwargs
+    ) -> Dict[str, Any]:
+        return self._indexer_orders(subaccount_id, derivative=False)
+
+    async def fetch_derivative_orders(
+        self, subaccount_id: str = None, **kwargs
+    ) -> Dict[str, Any]:
+        return self._indexer_orders(subaccount_id, derivative=True)
+
+    async def fetch_chain_subaccount_positions(
+        self, subaccount_id: str
+    ) -> Dict[str, Any]:
+        positions = self.exchange.subaccount_positions(subaccount_id)
+        return {
+            "state": [
+                {
+                    "subaccountId": subaccount_id,
+                    "marketId": market_id,
+                    "position": {
+                        "isLong": position.is_long,
+                        "quantity": _str(position.quantity),
+                        "entryPrice": _str(position.entry_price),
+                        "margin": _str(position.margin),
+                        "cumulativeFundingEntry": "0",
+                    },
+                }
+                for market_id, position in positions.items()
+            ]
+        }
+
+    async def fetch_historical_trade_records(self, market_id: str) -> Dict[str, Any]:
+        market = self.exchange._market(market_id)
+        return {
+            "tradeRecords": [
+                {
+                    "marketId": market.market_id,
+                    "latestTradeRecords": [
+                        {
+                            "timestamp": str(trade.timestamp),
+                            "price": _str(trade.price),
+                            "quantity": _str(trade.quantity),
+                        }
+                        for trade in self.exchange.trades[market.market_id]
+                    ],
+                }
+            ]
+        }
+
+    async def fetch_aggregate_market_volumes(
+        self, market_ids: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        volumes = []
+        for market_id in market_ids or list(self.exchange.markets):
+            market = self.exchange._market(market_id)
+            total = sum(
+                (
+                    trade.price * trade.quantity
+                    for trade in self.exchange.trades[market.market_id]
+                ),
+                Decimal("0"),
+            )
+            volumes.append(
+                {
+                    "marketId": market.market_id,
+                    "volume": {"makerVolume": _str(total), "takerVolume": _str(total)},
+                }
+            )
+        return {"volumes": volumes}
+
+    # ------------------------------------------------------------------
+    # auction
+    # ------------------------------------------------------------------
+    def _auction(self, auction) -> Dict[str, Any]:
+        return {
+            "round": str(auction.round),
+            "endTimestamp": str(auction.end_timestamp * 1000),
+            "winner": auction.winner,
+            "winnerBidAmount": self._base_units("inj", auction.winner_bid),
+            "basket": [
+                {"denom": denom, "amount": self._base_units(denom, amount)}
+                for denom, amount in auction.basket.items()
+            ],
+        }
+
+    async def fetch_auctions(self) -> Dict[str, Any]:
+        self.exchange.current_auction()
+        return {
+            "auctions": [self._auction(auction) for auction in self.exchange.auctions]
+        }
+
+    async def fetch_auction(self, round: int) -> Dict[str, Any]:
+        for auction in self.exchange.auctions:
+            if auction.round == int(round):
+                return {
+                    "auction": self._auction(auction),
+                    "bids": [
+                        {
+                            "bidder": bidder,
+                            "amount": self._base_units("inj", amount),
+                            "timestamp": str(ts),
+                        }
+                        for bidder, amount, ts in auction.bids
+                    ],
+                }
+        raise SimulationError(f"auction round {round} not found")
+
+    # ------------------------------------------------------------------
+    # message handling
+    # ------------------------------------------------------------------
+    def _check(self, msg: Dict) -> None:
+        """Reject messages that would fail, without changing state"""
+        type_url = msg["@type"]
+        if type_url.endswith("LimitOrder") or type_url.endswith("MarketOrder"):
+            order = msg["order"]
+            self.exchange.check_order(
+                order["market_id"],
+                order["subaccount_id"],
+                order["order_type"].upper().startswith("BUY"),
+                Decimal(order["price"]),
+                Decimal(order["quantity"]),
+                Decimal(order.get("margin", "0")),
+            )
+        elif type_url == "/injective.exchange.v1beta1.MsgBatchUpdateOrders":
+            for order in (
+                msg["spot_orders_to_create"] + msg["derivative_orders_to_create"]
+            ):
+                self.exchange.check_order(
+                    order["market_id"],
+                    order["subaccount_id"],
+                    order["order_type"].upper().startswith("BUY"),
+                    Decimal(order["price"]),
+                    Decimal(order["quantity"]),
+                    Decimal(order.get("margin", "0")),
+                )
+        elif type_url not in _HANDLERS:
+            raise SimulationError(
+                f"message type {type_url} is not supported by the simulator"
+            )
+
+    def _place(self, order: Dict, market_order: bool, kind: str) -> Dict:
+        """Place an order and return the event the chain emits for it; kind is
+        Spot or Derivative"""
+        place = (
+            self.exchange.place_market_order
+            if market_order
+            else self.exchange.place_limit_order
+        )
+        is_buy = order["order_type"].upper().startswith("BUY")
+        sim_order = place(
+            order["market_id"],
+            order["subaccount_id"],
+            is_buy,
+            Decimal(order["price"]),
+            Decimal(order["quantity"]),
+            Decimal(order.get("margin", "0")),
+            order.get("cid", ""),
+        )
+        # event attribute values are JSON, order hashes base64 encoded bytes
+        order_hash = base64.b64encode(bytes.fromhex(sim_order.order_hash[2:])).decode()
+        if market_order:
+            return _event(
+                f"EventBatch{kind}Execution",
+                market_id=sim_order.market_id,
+                is_buy=is_buy,
+                executionType="Market",
+                trades=[
+                    {
+                        "subaccount_id": sim_order.subaccount_id,
+                        "quantity": _str(sim_order.quantity - sim_order.fillable),
+                        "order_hash": order_hash,
+                        "cid": sim_order.cid,
+                    }
+                ],
+            )
+        limit_order = {
+            "order_info": {
+                "subaccount_id": sim_order.subaccount_id,
+                "price": _str(sim_order.price),
+                "quantity": _str(sim_order.quantity),
+                "cid": sim_order.cid,
+            },
+            "order_type": order["order_type"].upper(),
+            "fillable": _str(sim_order.fillable),
+            "order_hash": order_hash,
+        }
+        return _event(
+            f"EventNew{kind}Orders",
+            market_id=sim_order.market_id,
+            buy_orders=[limit_order] if is_buy else [],
+            sell_orders=[] if is_buy else [limit_order],
+        )
+
+    def _apply(self, msg: Dict) -> List[Dict]:
+        type_url = msg["@type"]
+        if type_url.endswith("LimitOrder") and "Create" in type_url:
+            return [self._place(msg["order"], False, _kind(type_url))]
+        if type_url.endswith("MarketOrder") and "Create" in type_url:
+            return [self._place(msg["order"], True, _kind(type_url))]
+        if type_url == "/injective.exchange.v1beta1.MsgBatchUpdateOrders":
+            events = []
+            for order in (
+                msg["spot_orders_to_cancel"] + msg["derivative_orders_to_cancel"]
+            ):
+                self.exchange.cancel_order(
+                    order["market_id"],
+                    order["subaccount_id"],
+                    order.get("order_hash"),
+                    order.get("cid"),
+                )
+            for order in msg["spot_orders_to_create"]:
+                events.append(self._place(order, False, "Spot"))
+            for order in msg["derivative_orders_to_create"]:
+                events.append(self._place(order, False, "Derivative"))
+            return events
+        handler = _HANDLERS.get(type_url)
+        if handler is None:
+            raise SimulationError(
+                f"message type {type_url} is not supported by the simulator"
+            )
+        handler(self, msg)
+        return [{"type": type_url.rsplit(".", 1)[-1]}]
+
+
+def _kind(type_url: str) -> str:
+    return "Derivative" if "Derivative" in type_url else "Spot"
+
+
+def _event(name: str, **attributes) -> Dict:
+    """A tx event shaped like the chain's: typed, with JSON encoded attributes"""
+    return {
+        "type": f"injective.exchange.v1beta1.{name}",
+        "attributes": [
+            {"key": key, "value": json.dumps(value)}
+            for key, value in attributes.items()
+        ],
+    }
+
+
+def _cancel(client: SimulatedAsyncClient, msg: Dict) -> None:
+    client.exchange.cancel_order(
+        msg["market_id"], msg["subaccount_id"], msg.get("order_hash"), msg.get("cid")
+    )
+
+
+def _send(client: SimulatedAsyncClient, msg: Dict) -> None:
+    client.exchange.send(
+        msg["from_address"], msg["to_address"], msg["denom"], Decimal(msg["amount"])
+    )
+
+
+def _deposit(client: SimulatedAsyncClient, msg: Dict) -> None:
+    client.exchange.deposit(
+        msg["sender"], msg["subaccount_id"], msg["denom"], Decimal(msg["amount"])
+    )
+
+
+def _withdraw(client: SimulatedAsyncClient, msg: Dict) -> None:
+    client.exchange.withdraw(
+        msg["sender"], msg["subaccount_id"], msg["denom"], Decimal(msg["amount"])
+    )
+
+
+def _transfer(client: SimulatedAsyncClient, msg: Dict) -> None:
+    client.exchange.subaccount_transfer(
+        msg["source_subaccount_id"],
+        msg["destination_subaccount_id"],
+        msg["denom"],
+        Decimal(msg["amount"]),
+    )
+
+
+def _bid(client: SimulatedAsyncClient, msg: Dict) -> None:
+    client.exchange.bid(msg["sender"], msg["round"], Decimal(msg["bid_amount"]))
+
+
+_HANDLERS = {
+    "/injective.exchange.v1beta1.MsgCancelSpotOrder": _cancel,
+    "/injective.exchange.v1beta1.MsgCancelDerivativeOrder": _cancel,
+    "/cosmos.bank.v1beta1.MsgSend": _send,
+    "/injective.exchange.v1beta1.MsgDeposit": _deposit,
+    "/injective.exchange.v1beta1.MsgWithdraw": _withdraw,
+    "/injective.exchange.v1beta1.MsgSubaccountTransfer": _transfer,
+    "/injective.exchange.v1beta1.MsgExternalTransfer": _transfer,
+    "/injective.auction.v1beta1.MsgBid": _bid,
+}
@@ -0,0 +1,768 @@
+"""In-memory exchange state of the simulated chain, in human readable Decimals."""
+
+import bisect
+import copy
+import hashlib
+import itertools
+import time
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+class SimulationError(Exception):
+    """Raised when a simulated message would fail on chain"""
+
+
+USDT_DENOM = "peggy0xdAC17F958D2ee523a2206206994597C13D831ec7"
+WBTC_DENOM = "peggy0x2260FAC5E5542a773Aa44fBCfeDf7C193bc2C599"
+WETH_DENOM = "peggy0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2"
+
+DEFAULT_DENOMS: Dict[str, int] = {
+    "inj": 18,
+    USDT_DENOM: 6,
+    WBTC_DENOM: 8,
+    WETH_DENOM: 18,
+}
+
+
+def market_id_for_ticker(ticker: str) -> str:
+    """Deterministic 0x-prefixed market id for a simulated market ticker"""
+    return "0x" + hashlib.sha256(ticker.encode()).hexdigest()
+
+
+@dataclass
+class SimMarket:
+    ticker: str
+    market_type: str  # "spot" or "derivative"
+    base_denom: Optional[str]
+    quote_denom: str
+    min_price_tick_size: Decimal
+    min_quantity_tick_size: Decimal
+    min_notional: Decimal = Decimal("0")
+    maker_fee_rate: Decimal = Decimal("-0.0001")
+    taker_fee_rate: Decimal = Decimal("0.0005")
+    initial_margin_ratio: Decimal = Decimal("0.05")
+    maintenance_margin_ratio: Decimal = Decimal("0.02")
+    market_id: str = ""
+
+    def __post_init__(self):
+        if not self.market_id:
+            self.market_id = market_id_for_ticker(self.ticker)
+
+    @property
+    def is_derivative(self) -> bool:
+        return self.market_type == "derivative"
+
+
+DEFAULT_MARKETS: List[SimMarket] = [
+    SimMarket(
+        ticker="INJ/USDT",
+        market_type="spot",
+        base_denom="inj",
+        quote_denom=USDT_DENOM,
+        min_price_tick_size=Decimal("0.001"),
+        min_quantity_tick_size=Decimal("0.001"),
+        min_notional=Decimal("1"),
+    ),
+    SimMarket(
+        ticker="BTC/USDT PERP",
+        market_type="derivative",
+        base_denom=None,
+        quote_denom=USDT_DENOM,
+        min_price_tick_size=Decimal("1"),
+        min_quantity_tick_size=Decimal("0.0001"),
+        min_notional=Decimal("1"),
+    ),
+    SimMarket(
+        ticker="ETH/USDT PERP",
+        market_type="derivative",
+        base_denom=None,
+        quote_denom=USDT_DENOM,
+        min_price_tick_size=Decimal("0.1"),
+        min_quantity_tick_size=Decimal("0.01"),
+        min_notional=Decimal("1"),
+    ),
+    SimMarket(
+        ticker="INJ/USDT PERP",
+        market_type="derivative",
+        base_denom=None,
+        quote_denom=USDT_DENOM,
+        min_price_tick_size=Decimal("0.001"),
+        min_quantity_tick_size=Decimal("0.1"),
+        min_notional=Decimal("1"),
+    ),
+]
+
+
+@dataclass
+class SimOrder:
+    order_hash: str
+    market_id: str
+    subaccount_id: str
+    is_buy: bool
+    price: Decimal
+    quantity: Decimal
+    fillable: Decimal
+    margin: Decimal = Decimal("0")
+    cid: str = ""
+    # funds held for the unfilled part of the order, in hold_denom
+    hold: Decimal = Decimal("0")
+    hold_denom: str = ""
+
+
+@dataclass
+class SimPosition:
+    is_long: bool
+    quantity: Decimal
+    entry_price: Decimal
+    margin: Decimal
+
+
+@dataclass
+class SimTrade:
+    market_id: str
+    price: Decimal
+    quantity: Decimal
+    is_buy: bool
+    timestamp: int
+    taker_subaccount_id: str
+    maker_subaccount_id: str
+    fee: Decimal
+    taker_cid: str = ""
+
+
+@dataclass
+class SimDeposit:
+    available: Decimal = Decimal("0")
+    total: Decimal = Decimal("0")
+
+
+@dataclass
+class SimAuction:
+    round: int
+    end_timestamp: int
+    basket: Dict[str, Decimal] = field(default_factory=dict)
+    bids: List[Tuple[str, Decimal, int]] = field(default_factory=list)
+    winner: str = ""
+    winner_bid: Decimal = Decimal("0")
+
+
+class OrderBook:
+    """Price-time priority book for one market"""
+
+    def __init__(self) -> None:
+        # entries are ((sort_price, sequence), order); bids sort on -price
+        self.bids: List[Tuple[Tuple[Decimal, int], SimOrder]] = []
+        self.asks: List[Tuple[Tuple[Decimal, int], SimOrder]] = []
+
+    def add(self, order: SimOrder, sequence: int) -> None:
+        side = self.bids if order.is_buy else self.asks
+        key = (-order.price if order.is_buy else order.price, sequence)
+        bisect.insort(side, (key, order), key=lambda entry: entry[0])
+
+    def remove(self, order: SimOrder) -> None:
+        side = self.bids if order.is_buy else self.asks
+        for i, (_, resting) in enumerate(side):
+            if resting is order:
+                del side[i]
+                return
+
+    def best_bid(self) -> Optional[Decimal]:
+        return self.bids[0][1].price if self.bids else None
+
+    def best_ask(self) -> Optional[Decimal]:
+        return self.asks[0][1].price if self.asks else None
+
+    def levels(
+        self, is_buy: bool, limit: Optional[int] = None
+    ) -> List[Tuple[Decimal, Decimal]]:
+        """Aggregated (price, quantity) levels, best first"""
+        levels: List[Tuple[Decimal, Decimal]] = []
+        for _, order in self.bids if is_buy else self.asks:
+            if levels and levels[-1][0] == order.price:
+                levels[-1] = (order.price, levels[-1][1] + order.fillable)
+            else:
+                if limit is not None and len(levels) == limit:
+                    break
+                levels.append((order.price, order.fillable))
+        return levels
+
+
+class SimulatedExchange:
+    """Offline exchange state: bank, subaccounts, order books, positions and auctions.
+
+    One instance is shared by every simulated agent in a process so agents can
+    trade against each other.
+    """
+
+    def __init__(
+        self,
+        markets: Optional[List[SimMarket]] = None,
+        denom_decimals: Optional[Dict[str, int]] = None,
+        clock: Callable[[], float] = time.time,
+        auction_period: int = 7 * 24 * 3600,
+    ) -> None:
+        self.clock = clock
+        self.denom_decimals: Dict[str, int] = dict(denom_decimals or DEFAULT_DENOMS)
+        self.markets: Dict[str, SimMarket] = {}
+        self.books: Dict[str, OrderBook] = {}
+        self.orders: Dict[str, SimOrder] = {}
+        self.bank: Dict[str, Dict[str, Decimal]] = {}
+        self.deposits: Dict[str, Dict[str, SimDeposit]] = {}
+        self.positions: Dict[Tuple[str, str], SimPosition] = {}
+        self.trades: Dict[str, List[SimTrade]] = {}
+        self.mark_prices: Dict[str, Decimal] = {}
+        # bech32 address -> 0x-prefixed hex address, used to map subaccounts to owners
+        self.accounts: Dict[str, str] = {}
+        self.block_height = 1
+        self.auction_period = auction_period
+        self.auctions: List[SimAuction] = [
+            SimAuction(round=1, end_timestamp=int(clock()) + auction_period)
+        ]
+        self._sequence = itertools.count()
+        for market in markets if markets is not None else DEFAULT_MARKETS:
+            self.add_market(market)
+
+    # ------------------------------------------------------------------
+    # setup helpers
+    # ------------------------------------------------------------------
+    def add_market(self, market: SimMarket) -> SimMarket:
+        self.markets[market.market_id] = market
+        self.books[market.market_id] = OrderBook()
+        self.trades[market.market_id] = []
+        return market
+
+    def register_account(self, address: str, hex_address: str) -> None:
+        self.accounts[address] = hex_address.lower()
+
+    def subaccount_owner(self, subaccount_id: str) -> Optional[str]:
+        prefix = subaccount_id[:42].lower()
+        for address, hex_address in self.accounts.items():
+            if hex_address == prefix:
+                return address
+        return None
+
+    def market_by_ticker(self, ticker: str) -> Optional[SimMarket]:
+        for market in self.markets.values():
+            if market.ticker.upper() == ticker.upper():
+                return market
+        return None
+
+    def fund(self, address: str, denom: str, amount) -> None:
+        """Credit bank balance out of thin air (faucet)"""
+        balances = self.bank.setdefault(address, {})
+        balances[denom] = balances.get(denom, Decimal("0")) + Decimal(str(amount))
+
+    def fund_subaccount(self, subaccount_id: str, denom: str, amount) -> None:
+        """Credit a subaccount deposit out of thin air (faucet)"""
+        deposit = self._deposit(subaccount_id, denom)
+        deposit.available += Decimal(str(amount))
+        deposit.total += Decimal(str(amount))
+
+    def seed_orderbook(
+        self,
+        market_id: str,
+        mid_price,
+        levels: int = 10,
+        spacing_bps=10,
+        quantity=1,
+        subaccount_id: str = "0x" + "0" * 64,
+    ) -> None:
+        """Rest a symmetric ladder of liquidity around mid_price for a house subaccount"""
+        market = self._market(market_id)
+        mid = Decimal(str(mid_price))
+        step = mid * Decimal(str(spacing_bps)) / Decimal("10000")
+        quantity = Decimal(str(quantity))
+        # the house account is funded (with headroom for fees) for whatever it rests
+        budget = mid * quantity * levels * 3
+        self.fund_subaccount(subaccount_id, market.quote_denom, budget)
+        if not market.is_derivative:
+            self.fund_subaccount(subaccount_id, market.base_denom, quantity * levels)
+        for i in range(1, levels + 1):
+            for is_buy in (True, False):
+                price = mid - step * i if is_buy else mid + step * i
+                price = self._round_to_tick(price, market.min_price_tick_size)
+                margin = price * quantity if market.is_derivative else Decimal("0")
+                self.place_limit_order(
+                    market_id, subaccount_id, is_buy, price, quantity, margin
+                )
+        self.mark_prices[market_id] = mid
+
+    # ------------------------------------------------------------------
+    # tx atomicity
+    # ------------------------------------------------------------------
+    def snapshot(self) -> Dict:
+        """Copy of the mutable state, for restore() if a tx fails part way"""
+        state = copy.deepcopy(
+            {
+                name: getattr(self, name)
+                for name in (
+                    "books",
+                    "orders",
+                    "bank",
+                    "deposits",
+                    "positions",
+                    "mark_prices",
+                    "auctions",
+                )
+            }
+        )
+        # trades are append only, their lengths are enough to roll back
+        state["trade_counts"] = {
+            market_id: len(trades) for market_id, trades in self.trades.items()
+        }
+        return state
+
+    def restore(self, state: Dict) -> None:
+        for market_id, count in state.pop("trade_counts").items():
+            del self.trades[market_id][count:]
+        for name, value in state.items():
+            setattr(self, name, value)
+
+    # ------------------------------------------------------------------
+    # reads
+    # ------------------------------------------------------------------
+    def mid_price_and_tob(self, market_id: str) -> Dict[str, Optional[Decimal]]:
+        book = self.books[self._market(market_id).market_id]
+        best_bid, best_ask = book.best_bid(), book.best_ask()
+        if best_bid is not None and best_ask is not None:
+            mid = (best_bid + best_ask) / 2
+        else:
+            mid = best_bid if best_bid is not None else best_ask
+        return {
+            "mid_price": mid,
+            "best_buy_price": best_bid,
+            "best_sell_price": best_ask,
+        }
+
+    def subaccount_orders(
+        self, subaccount_id: str, market_id: Optional[str] = None
+    ) -> List[SimOrder]:
+        return [
+            order
+            for order in self.orders.values()
+            if order.subaccount_id == subaccount_id
+            and (market_id is None or order.market_id == market_id)
+        ]
+
+    def subaccount_positions(self, subaccount_id: str) -> Dict[str, SimPosition]:
+        return {
+            market_id: position
+            for (sub_id, market_id), position in self.positions.items()
+            if sub_id == subaccount_id
+        }
+
+    def total_supply(self) -> Dict[str, Decimal]:
+        supply: Dict[str, Decimal] = {}
+        for balances in self.bank.values():
+            for denom, amount in balances.items():
+                supply[denom] = supply.get(denom, Decimal("0")) + amount
+        for deposits in self.deposits.values():
+            for denom, deposit in deposits.items():
+                supply[denom] = supply.get(denom, Decimal("0")) + deposit.total
+        return supply
+
+    # ------------------------------------------------------------------
+    # bank / subaccount transfers
+    # ------------------------------------------------------------------
+    def send(
+        self, from_address: str, to_address: str, denom: str, amount: Decimal
+    ) -> None:
+        self._debit_bank(from_address, denom, amount)
+        self.fund(to_address, denom, amount)
+
+    def deposit(
+        self, address: str, subaccount_id: str, denom: str, amount: Decimal
+    ) -> None:
+        self._debit_bank(address, denom, amount)
+        self.fund_subaccount(subaccount_id, denom, amount)
+
+    def withdraw(
+        self, address: str, subaccount_id: str, denom: str, amount: Decimal
+    ) -> None:
+        self._debit_deposit(subaccount_id, denom, amount)
+        self.fund(address, denom, amount)
+
+    def subaccount_transfer(
+        self,
+        source_subaccount_id: str,
+        destination_subaccount_id: str,
+        denom: str,
+        amount: Decimal,
+    ) -> None:
+        self._debit_deposit(source_subaccount_id, denom, amount)
+        self.fund_subaccount(destination_subaccount_id, denom, amount)
+
+    # ------------------------------------------------------------------
+    # trading
+    # ------------------------------------------------------------------
+    def place_limit_order(
+        self,
+        market_id: str,
+        subaccount_id: str,
+        is_buy: bool,
+        price: Decimal,
+        quantity: Decimal,
+        margin: Decimal = Decimal("0"),
+        cid: str = "",
+    ) -> SimOrder:
+        """Match against the book and rest any remainder"""
+        order = self._new_order(
+            market_id, subaccount_id, is_buy, price, quantity, margin, cid
+        )
+        self._match(order)
+        if order.fillable > 0:
+            self.books[order.market_id].add(order, next(self._sequence))
+            self.orders[order.order_hash] = order
+        else:
+            self._release(order)
+        return order
+
+    def place_market_order(
+        self,
+        market_id: str,
+        subaccount_id: str,
+        is_buy: bool,
+        worst_price: Decimal,
+        quantity: Decimal,
+        margin: Decimal = Decimal("0"),
+        cid: str = "",
+    ) -> SimOrder:
+        """Match immediately up to worst_price; any remainder is cancelled"""
+        order = self._new_order(
+            market_id, subaccount_id, is_buy, worst_price, quantity, margin, cid
+        )
+        self._match(order)
+        self._release(order)
+        return order
+
+    def cancel_order(
+        self,
+        market_id: str,
+        subaccount_id: str,
+        order_hash: str = None,
+        cid: str = None,
+    ) -> SimOrder:
+        order = self.orders.get(order_hash) if order_hash else None
+        if order is None and cid:
+            order = next(
+                (
+                    o
+                    for o in self.orders.values()
+                    if o.cid == cid and o.subaccount_id == subaccount_id
+                ),
+                None,
+            )
+        if (
+            order is None
+            or order.market_id != market_id
+            or order.subaccount_id != subaccount_id
+        ):
+            raise SimulationError(f"order {order_hash or cid} not found")
+        self.books[market_id].remove(order)
+        del self.orders[order.order_hash]
+        self._release(order)
+        return order
+
+    def check_order(
+        self,
+        market_id: str,
+        subaccount_id: str,
+        is_buy: bool,
+        price: Decimal,
+        quantity: Decimal,
+        margin: Decimal = Decimal("0"),
+    ) -> None:
+        """Validate an order without touching state (used by simulate)"""
+        market = self._market(market_id)
+        self._validate_order(market, price, quantity)
+        denom, amount = self._hold_for(market, is_buy, price, quantity, margin)
+        available = self._deposit(subaccount_id, denom).available
+        if available < amount:
+            raise SimulationError(
+                f"insufficient deposits: {available} {denom} available, {amount} required"
+            )
+
+    # ------------------------------------------------------------------
+    # auctions
+    # ------------------------------------------------------------------
+    def current_auction(self) -> SimAuction:
+        auction = self.auctions[-1]
+        if self.clock() >= auction.end_timestamp:
+            auction = self.settle_auction()
+        return auction
+
+    def bid(self, bidder: str, round: int, amount: Decimal) -> None:
+        auction = self.current_auction()
+        if round != auction.round:
+            raise SimulationError(
+                f"bid round {round} is not the current round {auction.round}"
+            )
+        if amount <= auction.winner_bid:
+            raise SimulationError(
+                f"bid {amount} must exceed the current highest bid {auction.winner_bid}"
+            )
+        self._debit_bank(bidder, "inj", amount)
+        if auction.winner:
+            # the previous highest bidder is refunded
+            self.fund(auction.winner, "inj", auction.winner_bid)
+        auction.winner, auction.winner_bid = bidder, amount
+        auction.bids.append((bidder, amount, int(self.clock() * 1000)))
+
+    def settle_auction(self) -> SimAuction:
+        """Pay the basket to the winner, burn the bid and open the next round"""
+        auction = self.auctions[-1]
+        if auction.winner:
+            for denom, amount in auction.basket.items():
+                self.fund(auction.winner, denom, amount)
+        next_auction = SimAuction(
+            round=auction.round + 1,
+            end_timestamp=max(int(self.clock()), auction.end_timestamp)
+            + self.auction_period,
+        )
+        self.auctions.append(next_auction)
+        return next_auction
+
+    # ------------------------------------------------------------------
+    # internals
+    # ------------------------------------------------------------------
+    def _market(self, market_id: str) -> SimMarket:
+        market = self.markets.get(market_id) or self.market_by_ticker(market_id)
+        if market is None:
+            raise SimulationError(f"market {market_id} does not exist")
+        return market
+
+    def _deposit(self, subaccount_id: str, denom: str) -> SimDeposit:
+        return self.deposits.setdefault(subaccount_id, {}).setdefault(
+            denom, SimDeposit()
+        )
+
+    def _debit_bank(self, address: str, denom: str, amount: Decimal) -> None:
+        balances = self.bank.setdefault(address, {})
+        if balances.get(denom, Decimal("0")) < amount:
+            raise SimulationError(
+                f"insufficient funds: {balances.get(denom, Decimal('0'))} {denom} < {amount}"
+            )
+        balances[denom] -= amount
+
+    def _debit_deposit(self, subaccount_id: str, denom: str, amount: Decimal) -> None:
+        deposit = self._deposit(subaccount_id, denom)
+        if deposit.available < amount:
+            raise SimulationError(
+                f"insufficient deposits: {deposit.available} {denom} available, {amount} required"
+            )
+        deposit.available -= amount
+        deposit.total -= amount
+
+    @staticmethod
+    def _round_to_tick(value: Decimal, tick: Decimal) -> Decimal:
+        return (value / tick).to_integral_value() * tick
+
+    def _validate_order(
+        self, market: SimMarket, price: Decimal, quantity: Decimal
+    ) -> None:
+        if price <= 0 or quantity <= 0:
+            raise SimulationError("price and quantity must be positive")
+        if price % market.min_price_tick_size != 0:
+            raise SimulationError(
+                f"price {price} is not a multiple of tick size {market.min_price_tick_size}"
+            )
+        if quantity % market.min_quantity_tick_size != 0:
+            raise SimulationError(
+                f"quantity {quantity} is not a multiple of tick size {market.min_quantity_tick_size}"
+            )
+        if price * quantity < market.min_notional:
+            raise SimulationError(
+                f"order notional {price * quantity} is below min notional {market.min_notional}"
+            )
+
+    @staticmethod
+    def _hold_for(
+        market: SimMarket,
+        is_buy: bool,
+        price: Decimal,
+        quantity: Decimal,
+        margin: Decimal,
+    ) -> Tuple[str, Decimal]:
+        """Denom and amount an order locks while it is open"""
+        fee = price * quantity * max(market.taker_fee_rate, Decimal("0"))
+        if market.is_derivative:
+            return market.quote_denom, margin + fee
+        if is_buy:
+            return market.quote_denom, price * quantity + fee
+        return market.base_denom, quantity
+
+    def _new_order(
+        self,
+        market_id: str,
+        subaccount_id: str,
+        is_buy: bool,
+        price: Decimal,
+        quantity: Decimal,
+        margin: Decimal,
+        cid: str,
+    ) -> SimOrder:
+        market = self._market(market_id)
+        self._validate_order(market, price, quantity)
+        hold_denom, hold = self._hold_for(market, is_buy, price, quantity, margin)
+        deposit = self._deposit(subaccount_id, hold_denom)
+        if deposit.available < hold:
+            raise SimulationError(
+                f"insufficient deposits: {deposit.available} {hold_denom} available, {hold} required"
+            )
+        deposit.available -= hold
+        sequence = next(self._sequence)
+        order_hash = (
+            "0x"
+            + hashlib.sha256(
+                f"{market.market_id}{subaccount_id}{sequence}".encode()
+            ).hexdigest()
+        )
+        return SimOrder(
+            order_hash=order_hash,
+            market_id=market.market_id,
+            subaccount_id=subaccount_id,
+            is_buy=is_buy,
+            price=price,
+            quantity=quantity,
+            fillable=quantity,
+            margin=margin,
+            cid=cid,
+            hold=hold,
+            hold_denom=hold_denom,
+        )
+
+    def _release(self, order: SimOrder) -> None:
+        """Return whatever is still held for an order that leaves the book"""
+        if order.hold > 0:
+            self._deposit(order.subaccount_id, order.hold_denom).available += order.hold
+            order.hold = Decimal("0")
+
+    def _match(self, taker: SimOrder) -> None:
+        market = self.markets[taker.market_id]
+        book = self.books[taker.market_id]
+        resting = book.asks if taker.is_buy else book.bids
+        while taker.fillable > 0 and resting:
+            maker = resting[0][1]
+            crosses = (
+                maker.price <= taker.price
+                if taker.is_buy
+                else maker.price >= taker.price
+            )
+            if not crosses or maker.subaccount_id == taker.subaccount_id:
+                break
+            quantity = min(taker.fillable, maker.fillable)
+            self._settle(market, taker, maker, maker.price, quantity)
+            if maker.fillable == 0:
+                resting.pop(0)
+                del self.orders[maker.order_hash]
+                self._release(maker)
+
+    def _settle(
+        self,
+        market: SimMarket,
+        taker: SimOrder,
+        maker: SimOrder,
+        price: Decimal,
+        quantity: Decimal,
+    ) -> None:
+        notional = price * quantity
+        taker_fee = notional * market.taker_fee_rate
+        maker_fee = notional * market.maker_fee_rate
+        for order, fee in ((taker, taker_fee), (maker, maker_fee)):
+            fraction = quantity / order.fillable
+            consumed = order.hold * fraction
+            order.hold -= consumed
+            order.fillable -= quantity
+            if market.is_derivative:
+                margin = order.margin * quantity / order.quantity
+                # the hold is released and the position takes what it needs
+                self._deposit(
+                    order.subaccount_id, market.quote_denom
+                ).available += consumed
+                self._apply_position(
+                    market, order.subaccount_id, order.is_buy, price, quantity, margin
+                )
+                self._charge(order.subaccount_id, market.quote_denom, fee)
+            elif order.is_buy:
+                quote = self._deposit(order.subaccount_id, market.quote_denom)
+                quote.available += consumed - notional
+                quote.total -= notional
+                self._charge(order.subaccount_id, market.quote_denom, fee)
+                self.fund_subaccount(order.subaccount_id, market.base_denom, quantity)
+            else:
+                self._deposit(order.subaccount_id, market.base_denom).total -= quantity
+                self.fund_subaccount(order.subaccount_id, market.quote_denom, notional)
+                self._charge(order.subaccount_id, market.quote_denom, fee)
+
+        self.trades[market.market_id].append(
+            SimTrade(
+                market_id=market.market_id,
+                price=price,
+                quantity=quantity,
+                is_buy=taker.is_buy,
+                timestamp=int(self.clock() * 1000),
+                taker_subaccount_id=taker.subaccount_id,
+                maker_subaccount_id=maker.subaccount_id,
+                fee=taker_fee + maker_fee,
+                taker_cid=taker.cid,
+            )
+        )
+        self.mark_prices[market.market_id] = price
+
+    def _charge(self, subaccount_id: str, denom: str, fee: Decimal) -> None:
+        """Charge (or rebate, for negative fees) a trading fee"""
+        deposit = self._deposit(subaccount_id, denom)
+        deposit.available -= fee
+        deposit.total -= fee
+
+    def _apply_position(
+        self,
+        market: SimMarket,
+        subaccount_id: str,
+        is_buy: bool,
+        price: Decimal,
+        quantity: Decimal,
+        margin: Decimal,
+    ) -> None:
+        key = (subaccount_id, market.market_id)
+        deposit = self._deposit(subaccount_id, market.quote_denom)
+        position = self.positions.get(key)
+        if position is None or position.is_long == is_buy:
+            # open or increase: margin moves from the deposit into the position
+            deposit.available -= margin
+            deposit.total -= margin
+            if position is None:
+                self.positions[key] = SimPosition(is_buy, quantity, price, margin)
+            else:
+                total = position.quantity + quantity
+                position.entry_price = (
+                    position.entry_price * position.quantity + price * quantity
+                ) / total
+                position.quantity = total
+                position.margin += margin
+            return
+
+        # reduce, close or flip the existing position
+        closed = min(position.quantity, quantity)
+        direction = Decimal("1") if position.is_long else Decimal("-1")
+        pnl = (price - position.entry_price) * closed * direction
+        released_margin = position.margin * closed / position.quantity
+        position.quantity -= closed
+        position.margin -= released_margin
+        deposit.available += released_margin + pnl
+        deposit.total += released_margin + pnl
+        if position.quantity == 0:
+            del self.positions[key]
+        remaining = quantity - closed
+        if remaining > 0:
+            # flip: the rest of the fill opens a position on the other side
+            self._apply_position(
+                market,
+                subaccount_id,
+                is_buy,
+                price,
+                remaining,
+                margin * remaining / quantity,
+            )
@@ -0,0 +1,279 @@
+import hashlib
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+from injective_functions.simulator.client import (
+    SimulatedAsyncClient,
+    SimulationError,
+    encode_tx,
+)
+from injective_functions.simulator.engine import SimulatedExchange
+from injective_functions.utils.helpers import detailed_exception_info
+from injective_functions.utils.tx_tracker import tx_tracker
+from injective_functions.utils.indexer_requests import normalize_ticker
+from injective_functions.utils.order_context import OrderContext, OrderContextCache
+
+_BECH32_CHARSET = "qpzry9x8gf2tvdw0s3jn54khce6mua7l"
+_default_exchange: Optional[SimulatedExchange] = None
+
+
+def default_exchange() -> SimulatedExchange:
+    """Process wide exchange shared by every simulated agent"""
+    global _default_exchange
+    if _default_exchange is None:
+        _default_exchange = SimulatedExchange()
+    return _default_exchange
+
+
+def _bech32_polymod(values: List[int]) -> int:
+    generator = [0x3B6A57B2, 0x26508E6D, 0x1EA119FA, 0x3D4233DD, 0x2A1462B3]
+    chk = 1
+    for value in values:
+        top = chk >> 25
+        chk = (chk & 0x1FFFFFF) << 5 ^ value
+        for i in range(5):
+            chk ^= generator[i] if ((top >> i) & 1) else 0
+    return chk
+
+
+def _bech32_encode(hrp: str, data: bytes) -> str:
+    # regroup 8-bit bytes into 5-bit words
+    acc, bits, words = 0, 0, []
+    for byte in data:
+        acc = (acc << 8) | byte
+        bits += 8
+        while bits >= 5:
+            bits -= 5
+            words.append((acc >> bits) & 31)
+    if bits:
+        words.append((acc << (5 - bits)) & 31)
+    expanded = [ord(x) >> 5 for x in hrp] + [0] + [ord(x) & 31 for x in hrp]
+    polymod = _bech32_polymod(expanded + words + [0] * 6) ^ 1
+    checksum = [(polymod >> 5 * (5 - i)) & 31 for i in range(6)]
+    return hrp + "1" + "".join(_BECH32_CHARSET[d] for d in words + checksum)
+
+
+class SimulatedAddress:
+    """Mirrors the parts of pyinjective's Address the modules use"""
+
+    def __init__(self, private_key: str) -> None:
+        # not a real secp256k1 derivation, just a stable 20 byte id per key
+        self.addr = hashlib.sha256(bytes.fromhex(private_key)).digest()[:20]
+
+    def to_acc_bech32(self) -> str:
+        return _bech32_encode("inj", self.addr)
+
+    def to_hex(self) -> str:
+        return "0x" + self.addr.hex()
+
+    def get_subaccount_id(self, index: int) -> str:
+        return f"{self.to_hex()}{index:024x}"
+
+
+class SimulatedBroadcaster:
+    """Stand-in for MsgBroadcasterWithPk used by the token factory/market launch paths"""
+
+    def __init__(self, chain_client: "SimulatedChainInteractor") -> None:
+        self.chain_client = chain_client
+
+    async def broadcast(self, messages: List[Dict]) -> Dict:
+        result = await self.chain_client.build_and_broadcast_tx(messages)
+        if not result.get("success"):
+            raise SimulationError(str(result.get("error")))
+        return result["result"]
+
+
+class SimulatedChainInteractor:
+    """Offline ChainInteractor backed by an in-memory SimulatedExchange.
+
+    Exposes the same surface as ChainInteractor (client, composer, address,
+    build_and_broadcast_tx, ...) so every InjectiveBase module runs against it
+    unchanged. Use network_type="simulated" with InjectiveClientFactory.
+    """
+
+    def __init__(
+        self,
+        network_type: str = "simulated",
+        private_key: str = None,
+        exchange: SimulatedExchange = None,
+    ) -> None:
+        self.private_key = private_key
+        self.network_type = network_type
+        if not self.private_key:
+            raise ValueError("No private key found in environment variables")
+
+        self.exchange = exchange or default_exchange()
+        self.network = None
+        self.client = None
+        self.composer = None
+        self.message_broadcaster = None
+
+        self.address = SimulatedAddress(self.private_key)
+        self.exchange.register_account(
+            self.address.to_acc_bech32(), self.address.to_hex()
+        )
+        self.order_contexts = OrderContextCache(self)
+
+    async def init_client(self):
+        """Initialize the simulated client (idempotent, no network access)"""
+        if self.client is None:
+            self.client = SimulatedAsyncClient(self.exchange)
+            self.composer = await self.client.composer()
+            self.message_broadcaster = SimulatedBroadcaster(self)
+        await self.client.sync_timeout_height()
+        await self.client.fetch_account(self.address.to_acc_bech32())
+
+    def enable_account_state(
+        self, subaccount_indices: List[int] = None, idle_seconds: float = None
+    ) -> None:
+        """No-op: simulated reads are already served from memory"""
+
+    async def fetch_bank_balances(self) -> Dict:
+        return await self.client.fetch_bank_balances(
+            address=self.address.to_acc_bech32()
+        )
+
+    async def fetch_spendable_balances(self) -> Dict:
+        return await self.client.fetch_spendable_balances(
+            address=self.address.to_acc_bech32()
+        )
+
+    async def fetch_subaccount_deposits(self, subaccount_id: str) -> Dict:
+        return await self.client.fetch_subaccount_deposits(subaccount_id=subaccount_id)
+
+    async def fetch_subaccount_positions(self, subaccount_id: str) -> Dict:
+        return await self.client.fetch_chain_subaccount_positions(
+            subaccount_id=subaccount_id
+        )
+
+    async def fetch_denom_decimals(self) -> Dict[str, int]:
+        return dict(self.exchange.denom_decimals)
+
+    async def resolve_market_id(self, market_id: str) -> str:
+        market = self.exchange.markets.get(market_id)
+        if market is None:
+            market = self.exchange.market_by_ticker(normalize_ticker(market_id))
+        if market is None:
+            raise SimulationError(f"No simulated market found for {market_id}")
+        return market.market_id
+
+    async def resolve_market_ids(self, market_ids: List[str]) -> List[str]:
+        return [await self.resolve_market_id(market_id) for market_id in market_ids]
+
+    def market_metadata(self, market_id: str) -> Dict:
+        market = self.exchange._market(market_id)
+        return {
+            "ticker": market.ticker,
+            "is_derivative": market.is_derivative,
+            "min_price_tick_size": market.min_price_tick_size,
+            "min_quantity_tick_size": market.min_quantity_tick_size,
+            "min_notional": market.min_notional,
+            "base_denom": market.base_denom,
+            "quote_denom": market.quote_denom,
+            "taker_fee_rate": market.taker_fee_rate,
+            "initial_margin_ratio": (
+                market.initial_margin_ratio if market.is_derivative else None
+            ),
+        }
+
+    # the simulated client already answers in human readable units
+    def position_to_human(self, market_id: str, position: Dict) -> Dict:
+        return {
+            "quantity": Decimal(position.get("quantity", "0")),
+            "entry_price": Decimal(position.get("entryPrice", "0")),
+            "margin": Decimal(position.get("margin", "0")),
+        }
+
+    def order_to_human(self, market_id: str, order: Dict) -> Dict:
+        return {
+            "price": Decimal(order.get("price", "0")),
+            "quantity": Decimal(order.get("quantity", "0")),
+            "unfilled": Decimal(order.get("unfilledQuantity", "0")),
+        }
+
+    async def fetch_orderbook(self, market_id: str, limit: int = None) -> Dict:
+        book = self.exchange.books[self.exchange._market(market_id).market_id]
+        return {"buys": book.levels(True, limit), "sells": book.levels(False, limit)}
+
+    async def fetch_trades(
+        self,
+        market_id: str,
+        skip: int = 0,
+        limit: int = 100,
+        start_time: int = None,
+        end_time: int = None,
+    ) -> List[Dict]:
+        market_id = self.exchange._market(market_id).market_id
+        trades = [
+            {
+                "trade_id": f"{market_id[:10]}-{index}",
+                "timestamp": trade.timestamp,
+                "price": trade.price,
+                "quantity": trade.quantity,
+                "is_buy": trade.is_buy,
+            }
+            for index, trade in enumerate(self.exchange.trades[market_id])
+            if (start_time is None or trade.timestamp >= start_time)
+            and (end_time is None or trade.timestamp <= end_time)
+        ]
+        return trades[::-1][skip : skip + limit]
+
+    async def fetch_market_volume(self, market_id: str) -> Decimal:
+        res = await self.client.fetch_aggregate_market_volumes(market_ids=[market_id])
+        return Decimal(res["volumes"][0]["volume"]["takerVolume"])
+
+    async def fetch_order_fill(
+        self, market_id: str, subaccount_idx: int, cid: str
+    ) -> Tuple[Decimal, Decimal]:
+        subaccount_id = self.address.get_subaccount_id(subaccount_idx)
+        fills = [
+            trade
+            for trade in self.exchange.trades[
+                self.exchange._market(market_id).market_id
+            ]
+            if trade.taker_subaccount_id == subaccount_id and trade.taker_cid == cid
+        ]
+        return (
+            sum((trade.quantity for trade in fills), Decimal(0)),
+            sum((trade.quantity * trade.price for trade in fills), Decimal(0)),
+        )
+
+    async def get_order_context(
+        self, market_id: str, subaccount_idx: int = 0
+    ) -> OrderContext:
+        return await self.order_contexts.get(market_id, subaccount_idx)
+
+    async def compute_order_hashes(
+        self, messages: List, subaccount_idx: int = 0
+    ) -> List[Optional[str]]:
+        # simulated hashes aren't derived from a nonce, they come in the tx events
+        return [None] * len(messages)
+
+    async def build_and_broadcast_tx(self, msg):
+        """Simulate then apply a tx; returns the same shape as ChainInteractor"""
+        try:
+            await self.init_client()
+            messages = msg if isinstance(msg, list) else [msg]
+            tx_bytes = encode_tx(messages)
+            try:
+                sim_res = await self.client.simulate(tx_bytes)
+            except SimulationError as ex:
+                return {"error": str(ex)}
+
+            gas_limit = int(sim_res["gasInfo"]["gasUsed"])
+            gas_fee = "{:.18f}".format(
+                Decimal(gas_limit) * Decimal("0.0000000005")
+            ).rstrip("0")
+            res = await self.client.broadcast_tx_sync_mode(tx_bytes)
+            job = tx_tracker.submit(
+                self.client, res, self.address.to_acc_bech32(), self.network_type
+            )
+            return {
+                "success": True,
+                "result": res,
+                "job_id": job.job_id if job else None,
+                "gas_wanted": gas_limit,
+                "gas_fee": f"{gas_fee} INJ",
+            }
+        except Exception as e:
+            return {"success": False, "error": detailed_exception_info(e)}
@@ -0,0 +1,213 @@
+"""Per-agent balances, deposits and positions kept current by the chain stream."""
+
+import asyncio
+import time
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+DEFAULT_IDLE_SECONDS = 900
+RECONNECT_DELAYS = (1, 2, 5, 10, 30)
+
+
+class AccountStateCache:
+    def __init__(
+        self,
+        chain_client,
+        subaccount_indices: List[int] = None,
+        idle_seconds: float = DEFAULT_IDLE_SECONDS,
+    ) -> None:
+        self.chain_client = chain_client
+        self.address = chain_client.address.to_acc_bech32()
+        self.subaccount_ids = [
+            chain_client.address.get_subaccount_id(index)
+            for index in (subaccount_indices or [0])
+        ]
+        self.idle_seconds = idle_seconds
+        self.warm = False
+        self.last_used = time.monotonic()
+        self.resyncs = 0
+        self._bank: Dict[str, str] = {}
+        # bank balance minus spendable balance (vesting, etc.) as of the last resync
+        self._locked: Dict[str, Decimal] = {}
+        self._deposits: Dict[str, Dict[str, Dict]] = {}
+        self._positions: Dict[str, Dict[str, Dict]] = {}
+        self._buffer: Optional[List[Dict]] = None
+        self._task: Optional[asyncio.Task] = None
+
+    # ------------------------------------------------------------------
+    # lifecycle
+    # ------------------------------------------------------------------
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        if not self.running:
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self) -> None:
+        self.warm = False
+        if self.running:
+            self._task.cancel()
+        self._task = None
+
+    def touch(self) -> bool:
+        """Mark the agent active (restarting the stream if needed); True when warm"""
+        self.last_used = time.monotonic()
+        self.start()
+        return self.warm
+
+    async def _run(self) -> None:
+        attempt = 0
+        while time.monotonic() - self.last_used < self.idle_seconds:
+            self.warm = False
+            # events that arrive during the resync are applied after the snapshot
+            self._buffer = []
+            client = self.chain_client.client
+            composer = self.chain_client.composer
+            stream = asyncio.create_task(
+                client.listen_chain_stream_updates(
+                    callback=self._on_event,
+                    bank_balances_filter=composer.chain_stream_bank_balances_filter(
+                        accounts=[self.address]
+                    ),
+                    subaccount_deposits_filter=composer.chain_stream_subaccount_deposits_filter(
+                        subaccount_ids=self.subaccount_ids
+                    ),
+                    positions_filter=composer.chain_stream_positions_filter(
+                        subaccount_ids=self.subaccount_ids, market_ids=["*"]
+                    ),
+                )
+            )
+            try:
+                await self._resync()
+                attempt = 0
+                while not stream.done():
+                    if time.monotonic() - self.last_used > self.idle_seconds:
+                        stream.cancel()
+                        break
+                    await asyncio.wait({stream}, timeout=min(self.idle_seconds, 30))
+            except asyncio.CancelledError:
+                stream.cancel()
+                raise
+            except Exception as e:
+                print(f"Account stream for {self.address} failed: {e}")
+                stream.cancel()
+            self.warm = False
+            if time.monotonic() - self.last_used > self.idle_seconds:
+                break
+            await asyncio.sleep(
+                RECONNECT_DELAYS[min(attempt, len(RECONNECT_DELAYS) - 1)]
+            )
+            attempt += 1
+        self.warm = False
+
+    async def _resync(self) -> None:
+        client = self.chain_client.client
+        bank, spendable, positions, *deposits = await asyncio.gather(
+            client.fetch_bank_balances(address=self.address),
+            client.fetch_spendable_balances(address=self.address),
+            asyncio.gather(
+                *[
+                    client.fetch_chain_subaccount_positions(subaccount_id=subaccount_id)
+                    for subaccount_id in self.subaccount_ids
+                ]
+            ),
+            *[
+                client.fetch_subaccount_deposits(subaccount_id=subaccount_id)
+                for subaccount_id in self.subaccount_ids
+            ],
+        )
+        self._bank = {coin["denom"]: coin["amount"] for coin in bank["balances"]}
+        spendable_amounts = {
+            coin["denom"]: Decimal(coin["amount"]) for coin in spendable["balances"]
+        }
+        self._locked = {
+            denom: Decimal(amount) - spendable_amounts.get(denom, Decimal(0))
+            for denom, amount in self._bank.items()
+        }
+        self._deposits = {
+            subaccount_id: dict(response.get("deposits", {}))
+            for subaccount_id, response in zip(self.subaccount_ids, deposits)
+        }
+        self._positions = {subaccount_id: {} for subaccount_id in self.subaccount_ids}
+        for response in positions:
+            for entry in response.get("state", []):
+                self._positions.setdefault(entry["subaccountId"], {})[
+                    entry["marketId"]
+                ] = entry
+        buffered, self._buffer = self._buffer or [], None
+        for event in buffered:
+            self._apply(event)
+        self.resyncs += 1
+        self.warm = True
+
+    # ------------------------------------------------------------------
+    # stream events (absolute values per key, so replaying them in order is safe)
+    # ------------------------------------------------------------------
+    def _on_event(self, event: Dict) -> None:
+        if self._buffer is not None:
+            self._buffer.append(event)
+        else:
+            self._apply(event)
+
+    def _apply(self, event: Dict) -> None:
+        for balance in event.get("bankBalances", []):
+            if balance.get("account") != self.address:
+                continue
+            for coin in balance.get("balances", []):
+                self._bank[coin["denom"]] = coin["amount"]
+        for update in event.get("subaccountDeposits", []):
+            deposits = self._deposits.setdefault(update["subaccountId"], {})
+            for entry in update.get("deposits", []):
+                deposits[entry["denom"]] = entry["deposit"]
+        for position in event.get("positions", []):
+            positions = self._positions.setdefault(position["subaccountId"], {})
+            if Decimal(position.get("quantity") or 0) == 0:
+                positions.pop(position["marketId"], None)
+                continue
+            positions[position["marketId"]] = {
+                "subaccountId": position["subaccountId"],
+                "marketId": position["marketId"],
+                "position": {
+                    "isLong": position.get("isLong", False),
+                    "quantity": position["quantity"],
+                    "entryPrice": position.get("entryPrice"),
+                    "margin": position.get("margin"),
+                    "cumulativeFundingEntry": position.get("cumulativeFundingEntry"),
+                },
+            }
+
+    # ------------------------------------------------------------------
+    # reads, shaped like the AsyncClient responses; None means "ask RPC"
+    # ------------------------------------------------------------------
+    def bank_balances(self) -> Optional[Dict]:
+        if not self.touch():
+            return None
+        return {
+            "balances": [
+                {"denom": denom, "amount": amount}
+                for denom, amount in self._bank.items()
+                if Decimal(amount) != 0
+            ]
+        }
+
+    def spendable_balances(self) -> Optional[Dict]:
+        if not self.touch():
+            return None
+        balances = []
+        for denom, amount in self._bank.items():
+            spendable = max(Decimal(amount) - self._locked.get(denom, 0), Decimal(0))
+            if spendable != 0:
+                balances.append({"denom": denom, "amount": str(spendable)})
+        return {"balances": balances}
+
+    def subaccount_deposits(self, subaccount_id: str) -> Optional[Dict]:
+        if not self.touch() or subaccount_id not in self._deposits:
+            return None
+        return {"deposits": dict(self._deposits[subaccount_id])}
+
+    def subaccount_positions(self, subaccount_id: str) -> Optional[Dict]:
+        if not self.touch() or subaccount_id not in self._positions:
+            return None
+        return {"state": list(self._positions[subaccount_id].values())}
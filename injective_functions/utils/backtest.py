@@ -0,0 +1,412 @@
+"""Offline backtests of simple strategies over the local trade store."""
+
+import argparse
+import inspect
+import itertools
+import sys
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Callable, Dict, List, Optional, Sequence
+
+from injective_functions.utils.candles import (
+    UNITS,
+    candle_cache,
+    iso,
+    parse_interval,
+    parse_time,
+    window,
+)
+from injective_functions.utils.order_context import OrderContext, to_decimal
+from injective_functions.utils.quantization import (
+    Number,
+    OrderRejected,
+    quantize_order,
+)
+from injective_functions.utils.trade_store import (
+    DEFAULT_ROOT,
+    TRUNCATED_WARNING,
+    TradeStore,
+)
+
+MAX_GRID_RUNS = 1000
+YEAR_MS = 365 * UNITS["d"]
+
+
+def _rolling_mean(values, length: int):
+    """Mean of the last `length` values at each index, NaN until there are enough"""
+    import numpy as np
+
+    result = np.full(len(values), np.nan)
+    if 0 < length <= len(values):
+        sums = np.cumsum(np.concatenate(([0.0], values)))
+        result[length - 1 :] = (sums[length:] - sums[:-length]) / length
+    return result
+
+
+def _rolling_std(values, length: int):
+    import numpy as np
+
+    mean = _rolling_mean(values, length)
+    mean_of_squares = _rolling_mean(np.square(values), length)
+    return np.sqrt(np.maximum(mean_of_squares - np.square(mean), 0.0))
+
+
+def _hold(events):
+    """Carry each non-NaN event forward until the next one, 0 before the first"""
+    import numpy as np
+
+    index = np.where(np.isnan(events), 0, np.arange(len(events)))
+    index = np.maximum.accumulate(index)
+    held = events[index]
+    return np.where(np.isnan(held), 0.0, held)
+
+
+def sma_cross(close, fast: int = 10, slow: int = 30):
+    """Long when the fast moving average is above the slow one, short below"""
+    import numpy as np
+
+    if not 0 < int(fast) < int(slow):
+        raise ValueError("sma_cross needs 0 < fast < slow")
+    spread = _rolling_mean(close, int(fast)) - _rolling_mean(close, int(slow))
+    return np.nan_to_num(np.sign(spread))
+
+
+def momentum(close, lookback: int = 24, threshold_bps: float = 0.0):
+    """Follow the return over the last `lookback` candles when it beats the threshold"""
+    import numpy as np
+
+    lookback = int(lookback)
+    if lookback <= 0:
+        raise ValueError("momentum needs a positive lookback")
+    change = np.full(len(close), np.nan)
+    change[lookback:] = close[lookback:] / close[:-lookback] - 1
+    threshold = float(threshold_bps) / 10_000
+    return np.where(change > threshold, 1.0, np.where(change < -threshold, -1.0, 0.0))
+
+
+def mean_reversion(
+    close, lookback: int = 24, entry_z: float = 2.0, exit_z: float = 0.5
+):
+    """Fade moves beyond entry_z standard deviations, flat again inside exit_z"""
+    import numpy as np
+
+    if int(lookback) <= 1 or not 0 <= float(exit_z) < float(entry_z):
+        raise ValueError("mean_reversion needs lookback > 1 and 0 <= exit_z < entry_z")
+    mean = _rolling_mean(close, int(lookback))
+    std = _rolling_std(close, int(lookback))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = np.where(std > 0, (close - mean) / std, 0.0)
+    events = np.full(len(close), np.nan)
+    events[np.abs(z) < float(exit_z)] = 0.0
+    events[z >= float(entry_z)] = -1.0
+    events[z <= -float(entry_z)] = 1.0
+    events[np.isnan(mean)] = np.nan
+    return _hold(events)
+
+
+def buy_and_hold(close):
+    """Long from the first candle to the last, the baseline to beat"""
+    import numpy as np
+
+    return np.ones(len(close))
+
+
+STRATEGIES: Dict[str, Callable] = {
+    "sma_cross": sma_cross,
+    "momentum": momentum,
+    "mean_reversion": mean_reversion,
+    "buy_and_hold": buy_and_hold,
+}
+
+
+def _strategy_function(strategy: str) -> Callable:
+    if strategy not in STRATEGIES:
+        raise ValueError(
+            f"Unknown strategy {strategy!r}, use one of {', '.join(STRATEGIES)}"
+        )
+    return STRATEGIES[strategy]
+
+
+def signal(strategy: str, close, params: Dict = None):
+    """Target position per candle of a strategy with the given parameters"""
+    function = _strategy_function(strategy)
+    accepted = list(inspect.signature(function).parameters)[1:]
+    unknown = set(params or {}) - set(accepted)
+    if unknown:
+        raise ValueError(
+            f"{strategy} has no parameter {', '.join(sorted(unknown))}, "
+            f"it takes {', '.join(accepted) or 'none'}"
+        )
+    return function(close, **(params or {}))
+
+
+@dataclass
+class Fill:
+    time: int
+    side: str
+    price: Decimal
+    quantity: Decimal
+    fee: Decimal
+
+
+@dataclass
+class BacktestResult:
+    strategy: str
+    params: Dict
+    metrics: Dict
+    fills: List[Fill] = field(default_factory=list)
+    rejected: Dict[str, int] = field(default_factory=dict)
+    times: Optional["np.ndarray"] = None  # candle open times (ms)
+    equity: Optional["np.ndarray"] = None  # marked at each candle's close
+
+    def to_dict(self, max_fills: int = 20) -> Dict:
+        return {
+            "strategy": self.strategy,
+            "params": self.params,
+            **self.metrics,
+            "rejected_orders": self.rejected,
+            "last_fills": [
+                {
+                    "time": iso(fill.time),
+                    "side": fill.side,
+                    "price": f"{fill.price:f}",
+                    "quantity": f"{fill.quantity:f}",
+                    "fee": f"{fill.fee:f}",
+                }
+                for fill in (self.fills[-max_fills:] if max_fills else [])
+            ],
+        }
+
+
+def offline_context(market_id: str, metadata: Dict) -> OrderContext:
+    """OrderContext from saved market metadata; there is no sender to sign with"""
+    return OrderContext(market_id=market_id, sender="", subaccount_id="", **metadata)
+
+
+def _check_length(count: int) -> None:
+    if count < 2:
+        raise ValueError("Need at least two candles to backtest, sync more trades")
+
+
+def run_backtest(
+    candles: Dict,
+    ctx: OrderContext,
+    strategy: str,
+    params: Dict = None,
+    quantity: Number = 1,
+    slippage_bps: float = 5.0,
+    capital: float = 10_000.0,
+    interval_ms: int = UNITS["h"],
+) -> BacktestResult:
+    """Simulate a strategy over candles of one market (see the module docstring)"""
+    import numpy as np
+
+    close = np.asarray(candles["close"], dtype=float)
+    opens = np.asarray(candles["open"], dtype=float)
+    count = len(close)
+    _check_length(count)
+    quantity = to_decimal(quantity)
+    target = np.asarray(signal(strategy, close, params), dtype=float)
+    if not ctx.is_derivative:
+        target = np.clip(target, 0.0, None)
+
+    # the target set at candle i's close is traded at candle i + 1's open
+    wanted = np.concatenate(([0.0], target[:-1]))
+    events = np.flatnonzero(np.diff(wanted, prepend=0.0))
+    slippage = float(slippage_bps) / 10_000
+    position, cash, fees = Decimal(0), Decimal(0), Decimal(0)
+    fills: List[Fill] = []
+    rejected: Dict[str, int] = {}
+    positions, balances = np.zeros(len(events)), np.zeros(len(events))
+    for n, i in enumerate(events):
+        delta = to_decimal(wanted[i]) * quantity - position
+        if delta:
+            side = "BUY" if delta > 0 else "SELL"
+            worst = opens[i] * (1 + slippage if delta > 0 else 1 - slippage)
+            try:
+                order = quantize_order(ctx, worst, abs(delta), side, is_market=True)
+            except OrderRejected as e:
+                rejected[e.reason] = rejected.get(e.reason, 0) + 1
+            else:
+                fee = order.notional * ctx.taker_fee_rate
+                signed = order.quantity if delta > 0 else -order.quantity
+                position += signed
+                cash -= signed * order.price + fee
+                fees += fee
+                fills.append(
+                    Fill(
+                        int(candles["time"][i]), side, order.price, order.quantity, fee
+                    )
+                )
+        positions[n], balances[n] = float(position), float(cash)
+
+    # position and cash after the last fill at or before each candle
+    index = np.zeros(count, dtype=int)
+    index[events] = np.arange(1, len(events) + 1)
+    index = np.maximum.accumulate(index)
+    position_path = np.concatenate(([0.0], positions))[index]
+    cash_path = np.concatenate(([0.0], balances))[index]
+    equity = capital + cash_path + position_path * close
+
+    peak = np.maximum.accumulate(np.maximum(equity, capital))
+    drawdown = peak - equity
+    returns = np.diff(equity) / equity[:-1]
+    deviation = returns.std()
+    traded = sum((fill.price * fill.quantity for fill in fills), Decimal(0))
+    metrics = {
+        "start": iso(candles["time"][0]),
+        "end": iso(candles["time"][-1]),
+        "candles": count,
+        "fills": len(fills),
+        "pnl": round(float(equity[-1] - capital), 8),
+        "return_pct": round(float(equity[-1] / capital - 1) * 100, 4),
+        "fees": round(float(fees), 8),
+        "traded_notional": round(float(traded), 8),
+        "max_drawdown": round(float(drawdown.max()), 8),
+        "max_drawdown_pct": round(float((drawdown / peak).max()) * 100, 4),
+        "sharpe": (
+            round(float(returns.mean() / deviation * np.sqrt(YEAR_MS / interval_ms)), 4)
+            if deviation > 0
+            else None
+        ),
+        "exposure_pct": round(float(np.mean(position_path != 0)) * 100, 2),
+        "final_position": f"{position:f}",
+    }
+    return BacktestResult(
+        strategy=strategy,
+        params=dict(params or {}),
+        metrics=metrics,
+        fills=fills,
+        rejected=rejected,
+        times=np.asarray(candles["time"]),
+        equity=equity,
+    )
+
+
+def expand_grid(grid: Dict[str, Sequence]) -> List[Dict]:
+    """Every combination of the grid's parameter values"""
+    names = list(grid)
+    combinations = [
+        dict(zip(names, values))
+        for values in itertools.product(*(list(grid[name]) for name in names))
+    ]
+    if len(combinations) > MAX_GRID_RUNS:
+        raise ValueError(
+            f"The grid has {len(combinations)} combinations, at most "
+            f"{MAX_GRID_RUNS} are allowed"
+        )
+    return combinations
+
+
+def sweep(
+    candles: Dict,
+    ctx: OrderContext,
+    strategy: str,
+    grid: Dict[str, Sequence],
+    rank_by: str = "pnl",
+    **settings,
+) -> List[BacktestResult]:
+    """run_backtest for every combination of the grid, best first by rank_by.
+
+    Combinations the strategy rejects (e.g. fast >= slow) are left out; when
+    it rejects all of them the first reason is raised.
+    """
+    _strategy_function(strategy)
+    _check_length(len(candles["close"]))
+    results, first_error = [], None
+    for params in expand_grid(grid):
+        try:
+            results.append(run_backtest(candles, ctx, strategy, params, **settings))
+        except ValueError as e:
+            first_error = first_error or e
+    if first_error and not results:
+        raise ValueError(f"Every combination of the grid failed: {first_error}")
+    results.sort(
+        key=lambda result: (
+            result.metrics[rank_by] is not None,
+            result.metrics[rank_by] or 0,
+        ),
+        reverse=True,
+    )
+    return results
+
+
+def load_candles(
+    store: TradeStore, interval: str, start_time=None, end_time=None
+) -> Dict:
+    """Candles of the store's history within the window, from the candle cache"""
+    return window(
+        candle_cache.candles(store, parse_interval(interval)),
+        parse_time(start_time),
+        parse_time(end_time),
+    )
+
+
+def _parse_grid(options: List[str]) -> Dict[str, List[float]]:
+    grid = {}
+    for option in options:
+        name, _, values = option.partition("=")
+        numbers = [float(value) for value in values.split(",") if value]
+        grid[name.strip()] = [int(n) if n.is_integer() else n for n in numbers]
+    return grid
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description="Backtest over the local trade store")
+    parser.add_argument("--network", default="mainnet")
+    parser.add_argument("--market", required=True, help="market id of a synced store")
+    parser.add_argument("--strategy", default="sma_cross", choices=list(STRATEGIES))
+    parser.add_argument("--interval", default="1h")
+    parser.add_argument("--quantity", default="1")
+    parser.add_argument("--slippage-bps", type=float, default=5.0)
+    parser.add_argument("--capital", type=float, default=10_000.0)
+    parser.add_argument("--start", default=None, help="ISO time, ms or lookback")
+    parser.add_argument("--end", default=None)
+    parser.add_argument(
+        "--grid",
+        action="append",
+        default=[],
+        help="name=v1,v2,... (repeat per parameter)",
+    )
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--root", default=DEFAULT_ROOT)
+    args = parser.parse_args(argv)
+
+    store = TradeStore(args.network, args.market, args.root)
+    metadata = store.market()
+    if not len(store) or metadata is None:
+        sys.exit(f"No synced trades for {args.market} under {store.path}")
+    candles = load_candles(store, args.interval, args.start, args.end)
+    settings = dict(
+        quantity=args.quantity,
+        slippage_bps=args.slippage_bps,
+        capital=args.capital,
+        interval_ms=parse_interval(args.interval),
+    )
+    try:
+        results = sweep(
+            candles,
+            offline_context(args.market, metadata),
+            args.strategy,
+            _parse_grid(args.grid),
+            **settings,
+        )
+    except ValueError as e:
+        sys.exit(str(e))
+    print(
+        f"{metadata['ticker']}: {len(candles['time'])} {args.interval} candles, "
+        f"{len(results)} runs"
+    )
+    if store.truncated:
+        print(TRUNCATED_WARNING)
+    print(f"{'pnl':>14} {'return%':>9} {'fees':>12} {'maxdd%':>8} {'fills':>6}  params")
+    for result in results[: args.top]:
+        m = result.metrics
+        print(
+            f"{m['pnl']:>14.4f} {m['return_pct']:>9.2f} {m['fees']:>12.4f} "
+            f"{m['max_drawdown_pct']:>8.2f} {m['fills']:>6}  {result.params}"
+        )
+
+
+if __name__ == "__main__":
+    main()
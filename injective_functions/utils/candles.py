@@ -0,0 +1,195 @@
+"""OHLCV candles, VWAP and volume profiles over the local trade store."""
+
+import re
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple, Union
+
+from injective_functions.utils.trade_store import TradeStore
+
+UNITS = {"s": 1_000, "m": 60_000, "h": 3_600_000, "d": 86_400_000, "w": 604_800_000}
+CANDLE_FIELDS = (
+    "time",
+    "open",
+    "high",
+    "low",
+    "close",
+    "volume",
+    "notional",
+    "buy_volume",
+    "trades",
+)
+
+
+def parse_interval(interval: str) -> int:
+    """'30s', '15m', '1h', '1d', '1w' -> milliseconds"""
+    match = re.fullmatch(r"\s*(\d+)\s*([smhdw])\s*", str(interval).lower())
+    if not match or int(match.group(1)) <= 0:
+        raise ValueError(
+            f"Invalid interval {interval!r}, use e.g. 1m, 15m, 1h, 4h or 1d"
+        )
+    return int(match.group(1)) * UNITS[match.group(2)]
+
+
+def parse_time(
+    value: Union[str, int, float, None], now_ms: int = None
+) -> Optional[int]:
+    """ISO 8601 (UTC unless an offset is given), epoch ms, or a lookback like '24h'"""
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)) or str(value).isdigit():
+        return int(value)
+    text = str(value).strip()
+    if re.fullmatch(r"\d+\s*[smhdw]", text.lower()):
+        now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+        return now_ms - parse_interval(text)
+    moment = datetime.fromisoformat(text.replace("Z", "+00:00"))
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return int(moment.timestamp() * 1000)
+
+
+def iso(timestamp_ms) -> str:
+    return datetime.fromtimestamp(int(timestamp_ms) / 1000, timezone.utc).isoformat()
+
+
+def compute_candles(columns: Dict, interval_ms: int) -> Dict:
+    """Candles of time ordered trade columns, one per interval with trades"""
+    import numpy as np
+
+    timestamps = np.asarray(columns["timestamp"])
+    if len(timestamps) == 0:
+        return {
+            field: np.empty(0, dtype="i8" if field in ("time", "trades") else "f8")
+            for field in CANDLE_FIELDS
+        }
+    price = np.asarray(columns["price"])
+    quantity = np.asarray(columns["quantity"])
+    buckets = timestamps // interval_ms
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(buckets)) + 1))
+    ends = np.concatenate((starts[1:], [len(timestamps)])) - 1
+    return {
+        "time": buckets[starts] * interval_ms,
+        "open": price[starts],
+        "high": np.maximum.reduceat(price, starts),
+        "low": np.minimum.reduceat(price, starts),
+        "close": price[ends],
+        "volume": np.add.reduceat(quantity, starts),
+        "notional": np.add.reduceat(price * quantity, starts),
+        "buy_volume": np.add.reduceat(
+            np.where(np.asarray(columns["side"]) > 0, quantity, 0.0), starts
+        ),
+        "trades": ends - starts + 1,
+    }
+
+
+class CandleCache:
+    """Candles of each store's full history per interval, extended incrementally"""
+
+    def __init__(self) -> None:
+        # (store path, interval) -> (trades covered, first trade of the last
+        # candle, candles)
+        self._rollups: Dict[Tuple[str, int], Tuple[int, int, Dict]] = {}
+
+    def candles(self, store: TradeStore, interval_ms: int) -> Dict:
+        import numpy as np
+
+        key = (store.path, interval_ms)
+        count = len(store)
+        covered, last_start, candles = self._rollups.get(key, (0, 0, None))
+        if candles is not None and covered == count:
+            return candles
+        if candles is None or covered > count:
+            # first use, or the store was rebuilt underneath us
+            candles, last_start = compute_candles(store.read(), interval_ms), 0
+            base = 0
+        else:
+            # redo the last candle, it may have been unfinished, and add the new ones
+            columns = {
+                name: values[last_start:] for name, values in store.read().items()
+            }
+            fresh = compute_candles(columns, interval_ms)
+            candles = {
+                field: np.concatenate((values[:-1], fresh[field]))
+                for field, values in candles.items()
+            }
+            base = last_start
+        if len(candles["time"]):
+            last_bucket_start = store.read()["timestamp"][base:] // interval_ms
+            last_start = base + int(
+                np.searchsorted(last_bucket_start, last_bucket_start[-1], "left")
+            )
+        self._rollups[key] = (count, last_start, candles)
+        return candles
+
+    def clear(self) -> None:
+        self._rollups.clear()
+
+
+def window(candles: Dict, start_time: int = None, end_time: int = None) -> Dict:
+    """Candles whose interval starts within [start_time, end_time]"""
+    import numpy as np
+
+    times = candles["time"]
+    lo = 0 if start_time is None else np.searchsorted(times, start_time, "left")
+    hi = len(times) if end_time is None else np.searchsorted(times, end_time, "right")
+    return {field: values[lo:hi] for field, values in candles.items()}
+
+
+def summarize(columns: Dict) -> Dict:
+    """Open, high, low, close, volume and VWAP of a slice of trades"""
+    import numpy as np
+
+    price, quantity = np.asarray(columns["price"]), np.asarray(columns["quantity"])
+    if len(price) == 0:
+        return {"trades": 0}
+    volume = float(quantity.sum())
+    notional = float((price * quantity).sum())
+    buy_volume = float(quantity[np.asarray(columns["side"]) > 0].sum())
+    return {
+        "trades": int(len(price)),
+        "first_trade_at": iso(columns["timestamp"][0]),
+        "last_trade_at": iso(columns["timestamp"][-1]),
+        "open": float(price[0]),
+        "high": float(price.max()),
+        "low": float(price.min()),
+        "close": float(price[-1]),
+        "volume": volume,
+        "notional": notional,
+        "vwap": notional / volume if volume else None,
+        "buy_volume": buy_volume,
+        "sell_volume": volume - buy_volume,
+    }
+
+
+def volume_profile(columns: Dict, bins: int = 20, value_area: float = 0.7) -> Dict:
+    """Traded volume per price bin, the point of control and the value area"""
+    import numpy as np
+
+    price, quantity = np.asarray(columns["price"]), np.asarray(columns["quantity"])
+    if len(price) == 0:
+        return {"trades": 0, "bins": []}
+    volume, edges = np.histogram(price, bins=bins, weights=quantity)
+    control = int(np.argmax(volume))
+    # grow the value area from the busiest bins down until it holds value_area of volume
+    order = np.argsort(volume)[::-1]
+    inside = order[
+        : int(np.searchsorted(np.cumsum(volume[order]), value_area * volume.sum())) + 1
+    ]
+    return {
+        "trades": int(len(price)),
+        "point_of_control": float((edges[control] + edges[control + 1]) / 2),
+        "value_area_low": float(edges[inside.min()]),
+        "value_area_high": float(edges[inside.max() + 1]),
+        "bins": [
+            {
+                "price_low": float(edges[i]),
+                "price_high": float(edges[i + 1]),
+                "volume": float(volume[i]),
+            }
+            for i in range(len(volume))
+        ],
+    }
+
+
+candle_cache = CandleCache()
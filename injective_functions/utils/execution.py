@@ -0,0 +1,341 @@
+"""Sliced (TWAP / POV) execution of large market orders."""
+
+import asyncio
+import math
+import time
+import uuid
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+from injective_functions.utils.quantization import is_buy_side, round_to_tick
+from injective_functions.utils.tx_tracker import tx_tracker
+
+# twap: even slices over the duration, pov: a share of the market's traded volume
+STRATEGIES = ("twap", "pov")
+DEFAULT_BOOK_FRACTION = Decimal("0.5")
+MAX_CONSECUTIVE_FAILURES = 3
+MAX_FINISHED_EXECUTIONS = 200
+# the indexer can lag the block a child was included in
+FILL_LOOKUP_ATTEMPTS = 3
+FILL_LOOKUP_DELAY = 1.0
+# rejections that only mean "not now": the slice is skipped and caught up later
+RETRYABLE_REASONS = frozenset(
+    {
+        "no_liquidity",
+        "slippage_above_limit",
+        "below_quantity_tick",
+        "below_min_notional",
+    }
+)
+
+
+@dataclass
+class ChildOrder:
+    quantity: str
+    submitted_at: float
+    status: str  # submitted, filled, unfilled, skipped, failed
+    reason: str = ""
+    estimated_price: Optional[str] = None  # depth-based estimate at placement
+    filled_quantity: Optional[str] = None  # once the tx is confirmed
+    average_price: Optional[str] = None
+    tx_hash: Optional[str] = None
+    job_id: Optional[str] = None
+    cid: Optional[str] = None
+
+
+@dataclass
+class Execution:
+    execution_id: str
+    owner: str
+    market_id: str
+    ticker: str
+    side: str
+    strategy: str
+    quantity: Decimal
+    quantity_tick: Decimal
+    interval_seconds: float
+    started_at: float
+    end_at: float
+    subaccount_idx: int = 0
+    leverage: str = "1"
+    reduce_only: bool = False
+    max_slippage_bps: Optional[float] = None
+    participation_rate: Optional[Decimal] = None
+    book_fraction: Decimal = DEFAULT_BOOK_FRACTION
+    status: str = "running"  # running, completed, cancelled, expired, failed
+    executed_quantity: Decimal = Decimal(0)
+    executed_notional: Decimal = Decimal(0)
+    children: List[ChildOrder] = field(default_factory=list)
+    error: str = ""
+    finished_at: Optional[float] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status != "running"
+
+    @property
+    def remaining(self) -> Decimal:
+        return max(self.quantity - self.executed_quantity, Decimal(0))
+
+    def progress(self) -> Dict:
+        average = (
+            self.executed_notional / self.executed_quantity
+            if self.executed_quantity
+            else None
+        )
+        return {
+            "execution_id": self.execution_id,
+            "market": self.ticker,
+            "side": self.side,
+            "strategy": self.strategy,
+            "status": self.status,
+            "quantity": f"{self.quantity:f}",
+            "executed_quantity": f"{self.executed_quantity:f}",
+            "remaining_quantity": f"{self.remaining:f}",
+            "percent_complete": round(
+                float(self.executed_quantity / self.quantity) * 100, 2
+            ),
+            "average_price": f"{average:.8f}" if average is not None else None,
+            "children_placed": sum(
+                c.status in ("submitted", "filled", "unfilled") for c in self.children
+            ),
+            "children_filled": sum(c.status == "filled" for c in self.children),
+            "seconds_left": max(round(self.end_at - time.time()), 0),
+            "error": self.error,
+        }
+
+    def to_dict(self) -> Dict:
+        result = self.progress()
+        result.update(
+            {
+                "interval_seconds": self.interval_seconds,
+                "participation_rate": (
+                    str(self.participation_rate) if self.participation_rate else None
+                ),
+                "book_fraction": str(self.book_fraction),
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+                "children": [vars(child) for child in self.children],
+            }
+        )
+        return result
+
+
+class ExecutionEngine:
+    def __init__(self) -> None:
+        self.executions: Dict[str, Execution] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._stops: Dict[str, asyncio.Event] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def start(self, execution: Execution, trader) -> Execution:
+        """Run the execution in the background with trader placing the children"""
+        self.executions[execution.execution_id] = execution
+        self._stops[execution.execution_id] = asyncio.Event()
+        self._tasks[execution.execution_id] = asyncio.create_task(
+            self._run(execution, trader)
+        )
+        return execution
+
+    def get(self, execution_id: str, owner: str) -> Optional[Execution]:
+        execution = self.executions.get(execution_id)
+        return execution if execution and execution.owner == owner else None
+
+    def list(self, owner: str) -> List[Execution]:
+        return [e for e in self.executions.values() if e.owner == owner]
+
+    def cancel(self, execution_id: str, owner: str) -> Optional[Execution]:
+        """Stop after the child in flight, if any; submitted children still count
+        once they fill"""
+        execution = self.get(execution_id, owner)
+        if execution is not None and not execution.done:
+            self._finish(execution, "cancelled")
+            self._stops[execution_id].set()
+        return execution
+
+    def shutdown(self) -> None:
+        for task in self._tasks.values():
+            task.cancel()
+
+    async def _run(self, execution: Execution, trader) -> None:
+        chain_client = trader.chain_client
+        stop = self._stops[execution.execution_id]
+        failures = 0
+        try:
+            volume_mark = own_notional = Decimal(0)
+            if execution.strategy == "pov":
+                volume_mark = await chain_client.fetch_market_volume(
+                    execution.market_id
+                )
+                await self._sleep(stop, execution.interval_seconds)
+            while not execution.done:
+                try:
+                    volume_mark, own_notional, child = await self._next_child(
+                        execution, trader, volume_mark, own_notional
+                    )
+                except Exception as e:
+                    # e.g. an orderbook query that timed out, try again next slice
+                    child = ChildOrder(
+                        quantity="0",
+                        submitted_at=time.time(),
+                        status="failed",
+                        reason=str(e),
+                    )
+                    execution.children.append(child)
+                if child is not None and child.status in ("failed", "unfilled"):
+                    failures += 1
+                    if failures >= MAX_CONSECUTIVE_FAILURES:
+                        self._finish(execution, "failed", child.reason)
+                elif child is not None and child.status == "filled":
+                    failures = 0
+                if execution.done:
+                    break
+                if execution.remaining < execution.quantity_tick:
+                    self._finish(execution, "completed")
+                elif time.time() >= execution.end_at:
+                    self._finish(execution, "expired")
+                else:
+                    await self._sleep(stop, execution.interval_seconds)
+        except asyncio.CancelledError:
+            self._finish(execution, "cancelled")
+            raise
+        except Exception as e:
+            self._finish(execution, "failed", str(e))
+        finally:
+            self._tasks.pop(execution.execution_id, None)
+            self._prune()
+
+    async def _next_child(
+        self, execution: Execution, trader, volume_mark: Decimal, own_notional: Decimal
+    ):
+        """Size and place one child; returns the updated volume marks and the child"""
+        chain_client = trader.chain_client
+        orderbook = await chain_client.fetch_orderbook(execution.market_id, limit=1)
+        if execution.strategy == "twap":
+            slices_left = math.ceil(
+                (execution.end_at - time.time()) / execution.interval_seconds - 1e-6
+            )
+            target = execution.remaining / max(slices_left, 1)
+        else:
+            volume = await chain_client.fetch_market_volume(execution.market_id)
+            traded = max(volume - volume_mark - own_notional, Decimal(0))
+            volume_mark, own_notional = volume, Decimal(0)
+            mid = _mid(orderbook)
+            target = execution.participation_rate * traded / mid if mid else Decimal(0)
+        size = self._child_size(execution, target, orderbook)
+        if size <= 0:
+            return volume_mark, own_notional, None
+        # one child in flight per agent; broadcasts themselves are ordered by
+        # the chain client, which tracks the account sequence
+        async with self._locks.setdefault(execution.owner, asyncio.Lock()):
+            child = await self._place_child(execution, trader, size)
+        if child.status == "submitted":
+            own_notional += await self._confirm(execution, trader, child)
+        return volume_mark, own_notional, child
+
+    @staticmethod
+    async def _sleep(stop: asyncio.Event, seconds: float) -> None:
+        try:
+            await asyncio.wait_for(stop.wait(), seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    @staticmethod
+    def _child_size(execution: Execution, target: Decimal, orderbook: Dict) -> Decimal:
+        """target capped by the remaining quantity and the visible best level"""
+        levels = orderbook["sells" if is_buy_side(execution.side) else "buys"]
+        if not levels:
+            return Decimal(0)
+        size = min(target, execution.remaining, levels[0][1] * execution.book_fraction)
+        return round_to_tick(size, execution.quantity_tick, False)
+
+    async def _place_child(self, execution: Execution, trader, size: Decimal):
+        arguments = dict(
+            quantity=str(size),
+            side=execution.side,
+            market_id=execution.market_id,
+            subaccount_idx=execution.subaccount_idx,
+            max_slippage_bps=execution.max_slippage_bps,
+        )
+        if trader.chain_client.market_metadata(execution.market_id)["is_derivative"]:
+            result = await trader.place_derivative_market_order(
+                leverage=execution.leverage,
+                reduce_only=execution.reduce_only,
+                **arguments,
+            )
+        else:
+            result = await trader.place_spot_market_order(**arguments)
+
+        child = ChildOrder(quantity=f"{size:f}", submitted_at=time.time(), status="")
+        execution.children.append(child)
+        tx_response = (result.get("result") or {}).get("txResponse", {})
+        if result.get("reason"):
+            child.status, child.reason = "skipped", result["reason"]
+            if result["reason"] not in RETRYABLE_REASONS:
+                # e.g. insufficient funds, later children would fail the same way
+                self._finish(execution, "failed", result["error"])
+        elif not result.get("success") or tx_response.get("code", 0) != 0:
+            child.status = "failed"
+            child.reason = str(
+                result.get("error") or tx_response.get("rawLog") or "transaction failed"
+            )
+        else:
+            child.status = "submitted"
+            child.estimated_price = result["fill_estimate"]["average_price"]
+            child.tx_hash, child.job_id = tx_response.get("txhash"), result.get(
+                "job_id"
+            )
+            child.cid = result.get("cid")
+        return child
+
+    async def _confirm(self, execution: Execution, trader, child: ChildOrder):
+        """Wait for a submitted child's tx and count what it filled; returns the
+        filled notional"""
+        job = await tx_tracker.wait(child.job_id) if child.job_id else None
+        if job is None or job.status != "confirmed":
+            child.status = "failed"
+            child.reason = (
+                (job.raw_log or f"transaction {job.status}") if job else "not tracked"
+            )
+            return Decimal(0)
+        for attempt in range(FILL_LOOKUP_ATTEMPTS):
+            if attempt:
+                await asyncio.sleep(FILL_LOOKUP_DELAY)
+            quantity, notional = await trader.chain_client.fetch_order_fill(
+                execution.market_id, execution.subaccount_idx, child.cid
+            )
+            if quantity:
+                break
+        if not quantity:
+            child.status, child.reason = "unfilled", "no fills for the order"
+            return Decimal(0)
+        child.status, child.filled_quantity = "filled", f"{quantity:f}"
+        child.average_price = f"{notional / quantity:f}"
+        execution.executed_quantity += quantity
+        execution.executed_notional += notional
+        return notional
+
+    def _finish(self, execution: Execution, status: str, error: str = "") -> None:
+        if execution.done:
+            return
+        execution.status, execution.error = status, error
+        execution.finished_at = time.time()
+
+    def _prune(self) -> None:
+        finished = [e for e in self.executions.values() if e.done]
+        for execution in finished[: max(0, len(finished) - MAX_FINISHED_EXECUTIONS)]:
+            del self.executions[execution.execution_id]
+            self._stops.pop(execution.execution_id, None)
+
+
+def _mid(orderbook: Dict) -> Optional[Decimal]:
+    tops = [levels[0][0] for levels in orderbook.values() if levels]
+    return sum(tops) / len(tops) if tops else None
+
+
+def new_execution_id() -> str:
+    return f"exec_{uuid.uuid4().hex[:12]}"
+
+
+execution_engine = ExecutionEngine()
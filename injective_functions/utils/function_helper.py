@@ -8,6 +8,10 @@ from pathlib import Path
 class InjectiveFunctionMapper:
     # Map function names to (client_type, method_name)
     FUNCTION_MAP: Dict[str, Tuple[str, str]] = {
+        # Account functions
+        "fetch_tx": ("account", "fetch_tx"),
+        "get_tx_status": ("account", "get_tx_status"),
+        "get_account_snapshot": ("account", "get_account_snapshot"),
         # Trader functions
         "place_derivative_limit_order": ("trader", "place_derivative_limit_order"),
         "place_derivative_market_order": ("trader", "place_derivative_market_order"),
@@ -15,12 +19,27 @@ class InjectiveFunctionMapper:
         "place_spot_market_order": ("trader", "place_spot_market_order"),
         "cancel_derivative_limit_order": ("trader", "cancel_derivative_limit_order"),
         "cancel_spot_limit_order": ("trader", "cancel_spot_limit_order"),
+        "place_order_ladder": ("trader", "place_order_ladder"),
+        "start_execution": ("trader", "start_execution"),
+        "get_execution_status": ("trader", "get_execution_status"),
+        "list_executions": ("trader", "list_executions"),
+        "cancel_execution": ("trader", "cancel_execution"),
         # Exchange functions
         "get_subaccount_deposits": ("exchange", "get_subaccount_deposits"),
+        "quote_market_order": ("exchange", "quote_market_order"),
+        "get_subaccount_positions_in_markets": (
+            "exchange",
+            "get_subaccount_positions_in_markets",
+        ),
         "get_aggregate_market_volumes": ("exchange", "get_aggregate_market_volumes"),
         "get_aggregate_account_volumes": ("exchange", "get_aggregate_account_volumes"),
         "get_subaccount_orders": ("exchange", "get_subaccount_orders"),
         "get_historical_orders": ("exchange", "get_historical_orders"),
+        "sync_trade_history": ("exchange", "sync_trade_history"),
+        "get_candles": ("exchange", "get_candles"),
+        "get_vwap": ("exchange", "get_vwap"),
+        "get_volume_profile": ("exchange", "get_volume_profile"),
+        "backtest_strategy": ("exchange", "backtest_strategy"),
         "get_mid_price_and_tob_derivatives_market": (
             "exchange",
             "get_mid_price_and_tob_derivatives_market",
@@ -61,6 +80,43 @@ class InjectiveFunctionMapper:
         "set_denom_metadata": ("token_factory", "set_denom_metadata"),
     }
 
+    # Functions that only read chain state and never broadcast a transaction.
+    # They may run speculatively (early calls, fast path), so they must also be
+    # cheap and free of side effects: sync_trade_history and the candle, VWAP
+    # and volume profile functions (page the indexer into the trade store) and
+    # backtest_strategy (CPU heavy) are left out on purpose
+    READ_ONLY_FUNCTIONS = frozenset(
+        {
+            "get_subaccount_deposits",
+            "quote_market_order",
+            "get_subaccount_positions_in_markets",
+            "get_aggregate_market_volumes",
+            "get_aggregate_account_volumes",
+            "get_subaccount_orders",
+            "get_historical_orders",
+            "get_mid_price_and_tob_derivatives_market",
+            "get_mid_price_and_tob_spot_market",
+            "get_derivatives_orderbook",
+            "get_spot_orderbook",
+            "trader_derivative_orders",
+            "trader_derivative_orders_by_hash",
+            "trader_spot_orders",
+            "trader_spot_orders_by_hash",
+            "query_balances",
+            "query_spendable_balances",
+            "query_total_supply",
+            "fetch_auctions",
+            "fetch_latest_auction",
+            "fetch_auction_bids",
+            "fetch_grants",
+            "fetch_tx",
+            "get_tx_status",
+            "get_account_snapshot",
+            "get_execution_status",
+            "list_executions",
+        }
+    )
+
     @classmethod
     def get_function_mapping(cls, function_name: str) -> Optional[Tuple[str, str]]:
         """Get the client type and method name for a given function"""
@@ -71,6 +127,11 @@ class InjectiveFunctionMapper:
         """Check if a function name is valid"""
         return function_name in cls.FUNCTION_MAP
 
+    @classmethod
+    def is_read_only(cls, function_name: str) -> bool:
+        """Check if a function only reads state (safe to run without confirmation)"""
+        return function_name in cls.READ_ONLY_FUNCTIONS
+
     @classmethod
     def get_all_client_types(cls) -> set:
         """Get all unique client types"""
@@ -3,7 +3,7 @@ import json
 import re
 import base64
 import requests
-from injective_functions.utils.indexer_requests import get_market_id
+from injective_functions.utils.market_registry import get_registry
 
 
 def base64convert(s):
@@ -58,21 +58,21 @@ def combine_function_schemas(input_files: List[str]) -> Dict:
     return combined_data
 
 
-async def impute_market_ids(market_ids):
+async def impute_market_ids(market_ids, network_type: str = "mainnet"):
     lst = []
     for market_id in market_ids:
         if validate_market_id(market_id):
             lst.append(market_id)
         else:
-            lst.append(await get_market_id(market_id))
+            lst.append(await get_registry(network_type).get_market_id(market_id))
     return lst
 
 
-async def impute_market_id(market_id):
+async def impute_market_id(market_id, network_type: str = "mainnet"):
     if validate_market_id(market_id):
         return market_id
     else:
-        return await get_market_id(market_id)
+        return await get_registry(network_type).get_market_id(market_id)
 
 
 def detailed_exception_info(e) -> Dict:
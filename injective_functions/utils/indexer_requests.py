@@ -1,14 +1,30 @@
 import aiohttp
-from typing import Dict, Tuple
+from typing import Dict, Optional, Tuple
 import re
 import json
 import logging
 
-
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+_http_session: Optional[aiohttp.ClientSession] = None
+
+
+def get_http_session() -> aiohttp.ClientSession:
+    """Process wide aiohttp session so connections and TLS sessions are reused"""
+    global _http_session
+    if _http_session is None or _http_session.closed:
+        _http_session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=30))
+    return _http_session
+
+
+async def close_http_session() -> None:
+    global _http_session
+    if _http_session is not None and not _http_session.closed:
+        await _http_session.close()
+    _http_session = None
+
 
 # This is expected to return a (kv) pair
 async def fetch_decimal_denoms(is_mainnet: bool) -> Dict[str, int]:
@@ -22,34 +38,34 @@ async def fetch_decimal_denoms(is_mainnet: bool) -> Dict[str, int]:
     logger.info(f"Fetching denoms from: {request_url}")
 
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(request_url) as response:
-                if response.status != 200:
-                    logger.error(f"Error status code: {response.status}")
-                    logger.error(f"Error response: {await response.text()}")
-                    return {}
+        session = get_http_session()
+        async with session.get(request_url) as response:
+            if response.status != 200:
+                logger.error(f"Error status code: {response.status}")
+                logger.error(f"Error response: {await response.text()}")
+                return {}
 
-                raw_data = await response.text()
-                logger.info(f"Raw response: {raw_data}")
+            raw_data = await response.text()
+            logger.info(f"Raw response: {raw_data}")
 
-                denom_data = json.loads(raw_data)
+            denom_data = json.loads(raw_data)
 
-                if "denom_decimals" not in denom_data:
-                    logger.error("No 'denom_decimals' key in response")
-                    logger.error(f"Response keys: {denom_data.keys()}")
-                    return {}
+            if "denom_decimals" not in denom_data:
+                logger.error("No 'denom_decimals' key in response")
+                logger.error(f"Response keys: {denom_data.keys()}")
+                return {}
 
-                denom_data = denom_data["denom_decimals"]
-                logger.info(f"Number of denoms found: {len(denom_data)}")
+            denom_data = denom_data["denom_decimals"]
+            logger.info(f"Number of denoms found: {len(denom_data)}")
 
-                response_dic: Dict[str, int] = {}
-                for denom in denom_data:
-                    response_dic[denom["denom"]] = int(denom["decimals"])
-                    logger.info(
-                        f"Added denom: {denom['denom']} with decimals: {denom['decimals']}"
-                    )
+            response_dic: Dict[str, int] = {}
+            for denom in denom_data:
+                response_dic[denom["denom"]] = int(denom["decimals"])
+                logger.info(
+                    f"Added denom: {denom['denom']} with decimals: {denom['decimals']}"
+                )
 
-                return response_dic
+            return response_dic
 
     except aiohttp.ClientError as e:
         logger.error(f"Network error occurred: {str(e)}")
@@ -146,38 +162,38 @@ async def get_market_id(ticker_symbol: str, network_type: str = "mainnet"):
         request_url = "https://sentry.lcd.injective.network/injective/exchange/v1beta1/derivative/markets"
     else:
         request_url = "https://testnet.sentry.lcd.injective.network/injective/exchange/v1beta1/derivative/markets"
-    async with aiohttp.ClientSession() as session:
-        try:
-            async with session.get(request_url) as response:
-                data = await response.json()
-
-                # Initialize a mapping of tickers to market IDs
-                ticker_to_market_id = {}
-
-                # Check if 'markets' key exists in the response
-                if "markets" in data:
-                    for market_info in data["markets"]:
-                        market = market_info.get("market", {})
-                        ticker = market.get("ticker", "").upper()
-                        market_id = market.get("market_id")
-
-                        # Ensure market_id does not have extra quotes
-                        if isinstance(market_id, str):
-                            market_id = market_id.strip("'\"")
-
-                        if ticker and market_id:
-                            ticker_to_market_id[ticker] = market_id
-
-                    # Get the market_id for the normalized ticker
-                    market_id = ticker_to_market_id.get(normalized_ticker)
-                    if market_id:
-                        return market_id
-                    else:
-                        print(f"No market ID found for ticker: {normalized_ticker}")
+    session = get_http_session()
+    try:
+        async with session.get(request_url) as response:
+            data = await response.json()
+
+            # Initialize a mapping of tickers to market IDs
+            ticker_to_market_id = {}
+
+            # Check if 'markets' key exists in the response
+            if "markets" in data:
+                for market_info in data["markets"]:
+                    market = market_info.get("market", {})
+                    ticker = market.get("ticker", "").upper()
+                    market_id = market.get("market_id")
+
+                    # Ensure market_id does not have extra quotes
+                    if isinstance(market_id, str):
+                        market_id = market_id.strip("'\"")
+
+                    if ticker and market_id:
+                        ticker_to_market_id[ticker] = market_id
+
+                # Get the market_id for the normalized ticker
+                market_id = ticker_to_market_id.get(normalized_ticker)
+                if market_id:
+                    return market_id
                 else:
-                    print("No market data found in the response.")
-        except aiohttp.ClientError as e:
-            print(f"HTTP request failed: {e}")
-        except Exception as e:
-            print(f"An error occurred: {e}")
+                    print(f"No market ID found for ticker: {normalized_ticker}")
+            else:
+                print("No market data found in the response.")
+    except aiohttp.ClientError as e:
+        print(f"HTTP request failed: {e}")
+    except Exception as e:
+        print(f"An error occurred: {e}")
     return None
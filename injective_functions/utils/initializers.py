@@ -1,11 +1,31 @@
+import asyncio
+import re
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
 from grpc import RpcError
 from pyinjective.async_client import AsyncClient
+from pyinjective.client.model.pagination import PaginationOption
 from pyinjective.constant import GAS_FEE_BUFFER_AMOUNT, GAS_PRICE
-from pyinjective.core.network import Network
 from pyinjective.core.broadcaster import MsgBroadcasterWithPk
 from pyinjective.transaction import Transaction
 from pyinjective.wallet import PrivateKey
-from injective_functions.utils.helpers import detailed_exception_info
+from injective_functions.utils.helpers import (
+    detailed_exception_info,
+    impute_market_id,
+    impute_market_ids,
+)
+from injective_functions.utils.account_state import (
+    DEFAULT_IDLE_SECONDS,
+    AccountStateCache,
+)
+from injective_functions.utils.market_registry import get_registry
+from injective_functions.utils.network_pool import get_composer, get_network
+from injective_functions.utils.order_context import OrderContext, OrderContextCache
+from injective_functions.utils.order_hash import order_hash
+from injective_functions.utils.signing import signing_executor
+from injective_functions.utils.tx_tracker import tx_tracker
+
+SEQUENCE_MISMATCH = re.compile(r"account sequence mismatch, expected (\d+)")
 
 
 class ChainInteractor:
@@ -15,47 +35,353 @@ class ChainInteractor:
         if not self.private_key:
             raise ValueError("No private key found in environment variables")
 
-        self.network = (
-            Network.testnet() if network_type == "testnet" else Network.mainnet()
-        )
+        # channels and composer are shared with other agents on the same network
+        self.network = get_network(network_type)
         self.client = None
         self.composer = None
         self.message_broadcaster = None
+        # opt-in stream fed cache, see enable_account_state
+        self.account_state = None
+        # next account sequence; the account query only counts committed txs,
+        # so it is fetched once and then advanced locally per accepted tx
+        self.sequence = None
+        self._broadcast_lock = asyncio.Lock()
 
         # Initialize account
         self.priv_key = PrivateKey.from_hex(self.private_key)
         self.pub_key = self.priv_key.to_public_key()
         self.address = self.pub_key.to_address()
+        self.order_contexts = OrderContextCache(self)
 
     async def init_client(self):
         """Initialize the Injective client and required components"""
-        self.client = AsyncClient(self.network)
-        self.composer = await self.client.composer()
+        if self.client is None:
+            self.client = AsyncClient(self.network)
+            self.composer = await get_composer(self.network_type, self.client)
+            self.message_broadcaster = MsgBroadcasterWithPk.new_using_simulation(
+                network=self.network, private_key=self.private_key
+            )
+        # refresh the timeout height before every tx
         await self.client.sync_timeout_height()
-        await self.client.fetch_account(self.address.to_acc_bech32())
-        self.message_broadcaster = MsgBroadcasterWithPk.new_using_simulation(
-            network=self.network, private_key=self.private_key
+        if self.sequence is None:
+            await self.client.fetch_account(self.address.to_acc_bech32())
+            self.sequence = self.client.get_sequence()
+
+    def enable_account_state(
+        self, subaccount_indices: List[int] = None, idle_seconds: float = None
+    ) -> None:
+        """Opt in to serving balance, deposit and position reads from the chain stream"""
+        if self.account_state is None:
+            self.account_state = AccountStateCache(
+                self,
+                subaccount_indices,
+                idle_seconds or DEFAULT_IDLE_SECONDS,
+            )
+        self.account_state.start()
+
+    async def fetch_bank_balances(self) -> Dict:
+        cached = self.account_state.bank_balances() if self.account_state else None
+        if cached is not None:
+            return cached
+        return await self.client.fetch_bank_balances(
+            address=self.address.to_acc_bech32()
+        )
+
+    async def fetch_spendable_balances(self) -> Dict:
+        cached = self.account_state.spendable_balances() if self.account_state else None
+        if cached is not None:
+            return cached
+        return await self.client.fetch_spendable_balances(
+            address=self.address.to_acc_bech32()
+        )
+
+    async def fetch_subaccount_deposits(self, subaccount_id: str) -> Dict:
+        cached = (
+            self.account_state.subaccount_deposits(subaccount_id)
+            if self.account_state
+            else None
+        )
+        if cached is not None:
+            return cached
+        return await self.client.fetch_subaccount_deposits(subaccount_id=subaccount_id)
+
+    async def fetch_subaccount_positions(self, subaccount_id: str) -> Dict:
+        cached = (
+            self.account_state.subaccount_positions(subaccount_id)
+            if self.account_state
+            else None
+        )
+        if cached is not None:
+            return cached
+        return await self.client.fetch_chain_subaccount_positions(
+            subaccount_id=subaccount_id
+        )
+
+    async def fetch_denom_decimals(self) -> Dict[str, int]:
+        """Fetch the denom -> decimals mapping for the network this client is on"""
+        return await get_registry(self.network_type).get_denom_decimals()
+
+    async def resolve_market_id(self, market_id: str) -> str:
+        """Resolve a ticker (e.g. 'btcusdt-perp') or market id to a market id"""
+        return await impute_market_id(market_id, self.network_type)
+
+    async def resolve_market_ids(self, market_ids: List[str]) -> List[str]:
+        """Resolve a list of tickers or market ids to market ids"""
+        return await impute_market_ids(market_ids, self.network_type)
+
+    def market_metadata(self, market_id: str) -> Dict:
+        """OrderContext fields for a market, from the composer's markets"""
+        market = self.composer.spot_markets.get(market_id)
+        is_derivative = market is None
+        if is_derivative:
+            market = self.composer.derivative_markets.get(
+                market_id
+            ) or self.composer.binary_option_markets.get(market_id)
+        if market is None:
+            raise ValueError(f"Market {market_id} is not known to the composer")
+        return {
+            "ticker": market.ticker,
+            "is_derivative": is_derivative,
+            "min_price_tick_size": market.price_from_chain_format(
+                market.min_price_tick_size
+            ),
+            "min_quantity_tick_size": market.quantity_from_chain_format(
+                market.min_quantity_tick_size
+            ),
+            "min_notional": market.notional_from_chain_format(market.min_notional),
+            "base_denom": None if is_derivative else market.base_token.denom,
+            "quote_denom": market.quote_token.denom,
+            "taker_fee_rate": market.taker_fee_rate,
+            "initial_margin_ratio": getattr(market, "initial_margin_ratio", None),
+        }
+
+    def position_to_human(self, market_id: str, position: Dict) -> Dict:
+        """quantity, entry price and margin of a chain position (extended chain
+        format) in human readable units"""
+        market = self.composer.derivative_markets.get(market_id)
+        if market is None:
+            raise ValueError(f"Market {market_id} is not known to the composer")
+        return {
+            "quantity": market.quantity_from_extended_chain_format(
+                Decimal(position.get("quantity", "0"))
+            ),
+            "entry_price": market.price_from_extended_chain_format(
+                Decimal(position.get("entryPrice", "0"))
+            ),
+            "margin": market.notional_from_extended_chain_format(
+                Decimal(position.get("margin", "0"))
+            ),
+        }
+
+    def order_to_human(self, market_id: str, order: Dict) -> Dict:
+        """price, quantity and unfilled quantity of an indexer order (chain
+        format) in human readable units"""
+        market = self.composer.spot_markets.get(
+            market_id
+        ) or self.composer.derivative_markets.get(market_id)
+        if market is None:
+            raise ValueError(f"Market {market_id} is not known to the composer")
+        return {
+            "price": market.price_from_chain_format(Decimal(order.get("price", "0"))),
+            "quantity": market.quantity_from_chain_format(
+                Decimal(order.get("quantity", "0"))
+            ),
+            "unfilled": market.quantity_from_chain_format(
+                Decimal(order.get("unfilledQuantity", "0"))
+            ),
+        }
+
+    async def fetch_orderbook(self, market_id: str, limit: int = None) -> Dict:
+        """Chain orderbook as {"buys": [(price, quantity)], "sells": [...]}, best first,
+        in human readable units"""
+        spot_market = self.composer.spot_markets.get(market_id)
+        market = spot_market or self.composer.derivative_markets.get(market_id)
+        if market is None:
+            raise ValueError(f"Market {market_id} is not known to the composer")
+        fetch = (
+            self.client.fetch_chain_spot_orderbook
+            if spot_market
+            else self.client.fetch_chain_derivative_orderbook
+        )
+        orderbook = await fetch(
+            market_id=market_id, pagination=PaginationOption(limit=limit)
+        )
+
+        def levels(key: str):
+            return [
+                (
+                    market.price_from_extended_chain_format(Decimal(level["p"])),
+                    market.quantity_from_extended_chain_format(Decimal(level["q"])),
+                )
+                for level in orderbook.get(key, [])
+            ]
+
+        return {"buys": levels("buysPriceLevel"), "sells": levels("sellsPriceLevel")}
+
+    async def fetch_trades(
+        self,
+        market_id: str,
+        skip: int = 0,
+        limit: int = 100,
+        start_time: int = None,
+        end_time: int = None,
+    ) -> List[Dict]:
+        """One page of a market's trades from the indexer, newest first.
+
+        Only the taker side is returned so every fill is counted once; times are
+        in milliseconds and prices and quantities in human readable units.
+        """
+        spot_market = self.composer.spot_markets.get(market_id)
+        market = spot_market or self.composer.derivative_markets.get(market_id)
+        if market is None:
+            raise ValueError(f"Market {market_id} is not known to the composer")
+        fetch = (
+            self.client.fetch_spot_trades
+            if spot_market
+            else self.client.fetch_derivative_trades
+        )
+        res = await fetch(
+            market_ids=[market_id],
+            execution_side="taker",
+            pagination=PaginationOption(
+                skip=skip, limit=limit, start_time=start_time, end_time=end_time
+            ),
+        )
+        trades = []
+        for trade in res.get("trades", []):
+            if spot_market:
+                fill = trade["price"]
+                price, quantity = fill["price"], fill["quantity"]
+                direction = trade["tradeDirection"]
+            else:
+                fill = trade["positionDelta"]
+                price, quantity = fill["executionPrice"], fill["executionQuantity"]
+                direction = fill["tradeDirection"]
+            trades.append(
+                {
+                    "trade_id": trade["tradeId"],
+                    "timestamp": int(trade["executedAt"]),
+                    "price": market.price_from_chain_format(Decimal(price)),
+                    "quantity": market.quantity_from_chain_format(Decimal(quantity)),
+                    "is_buy": direction == "buy",
+                }
+            )
+        return trades
+
+    async def fetch_market_volume(self, market_id: str) -> Decimal:
+        """Cumulative traded notional of a market in quote units (taker side)"""
+        market = self.composer.spot_markets.get(
+            market_id
+        ) or self.composer.derivative_markets.get(market_id)
+        if market is None:
+            raise ValueError(f"Market {market_id} is not known to the composer")
+        res = await self.client.fetch_aggregate_market_volumes(market_ids=[market_id])
+        volume = next(
+            (
+                entry["volume"]
+                for entry in res.get("volumes", [])
+                if entry["marketId"] == market_id
+            ),
+            {},
+        )
+        return market.notional_from_extended_chain_format(
+            Decimal(volume.get("takerVolume", "0"))
         )
 
+    async def fetch_order_fill(
+        self, market_id: str, subaccount_idx: int, cid: str
+    ) -> Tuple[Decimal, Decimal]:
+        """Filled quantity and notional of one of our orders, found by its cid,
+        in human readable units"""
+        spot_market = self.composer.spot_markets.get(market_id)
+        market = spot_market or self.composer.derivative_markets.get(market_id)
+        if market is None:
+            raise ValueError(f"Market {market_id} is not known to the composer")
+        fetch = (
+            self.client.fetch_spot_trades
+            if spot_market
+            else self.client.fetch_derivative_trades
+        )
+        res = await fetch(
+            market_ids=[market_id],
+            subaccount_ids=[self.address.get_subaccount_id(subaccount_idx)],
+            cid=cid,
+        )
+        quantity = notional = Decimal(0)
+        for trade in res.get("trades", []):
+            if spot_market:
+                fill = trade["price"]
+                price, filled = fill["price"], fill["quantity"]
+            else:
+                fill = trade["positionDelta"]
+                price, filled = fill["executionPrice"], fill["executionQuantity"]
+            filled = market.quantity_from_chain_format(Decimal(filled))
+            quantity += filled
+            notional += filled * market.price_from_chain_format(Decimal(price))
+        return quantity, notional
+
+    async def get_order_context(
+        self, market_id: str, subaccount_idx: int = 0
+    ) -> OrderContext:
+        """Cached, immutable order inputs for a market (ticker or id) and subaccount"""
+        return await self.order_contexts.get(market_id, subaccount_idx)
+
+    async def compute_order_hashes(
+        self, messages: List, subaccount_idx: int = 0
+    ) -> List[Optional[str]]:
+        """Hashes the chain will give the orders of these create order messages,
+        in order, if they are the subaccount's next orders"""
+        await self.init_client()
+        response = await self.client.fetch_subaccount_trade_nonce(
+            subaccount_id=self.address.get_subaccount_id(subaccount_idx)
+        )
+        nonce = int(response.get("nonce", 0))
+        return [
+            order_hash(msg.order, nonce + offset)
+            for offset, msg in enumerate(messages, start=1)
+        ]
+
     async def build_and_broadcast_tx(self, msg):
-        """Common function to build and broadcast transactions"""
+        """Common function to build and broadcast transactions
+
+        msg is a single message or a list of messages sent in one transaction.
+        Transactions of one account are built one at a time so that each gets
+        the next sequence, even while the previous one is still in the mempool.
+        """
+        async with self._broadcast_lock:
+            return await self._build_and_broadcast_tx(msg)
+
+    def _resync_sequence(self, error: str) -> None:
+        """Take the sequence the chain expects from a mismatch error"""
+        match = SEQUENCE_MISMATCH.search(error)
+        if match:
+            self.sequence = int(match.group(1))
+        elif "sequence" in error:
+            # refetch before the next tx
+            self.sequence = None
+
+    async def _build_and_broadcast_tx(self, msg):
         try:
             await self.init_client()
+            messages = msg if isinstance(msg, list) else [msg]
             tx = (
                 Transaction()
-                .with_messages(msg)
-                .with_sequence(self.client.get_sequence())
+                .with_messages(*messages)
+                .with_sequence(self.sequence)
                 .with_account_num(self.client.get_number())
                 .with_chain_id(self.network.chain_id)
             )
 
             sim_sign_doc = tx.get_sign_doc(self.pub_key)
-            sim_sig = self.priv_key.sign(sim_sign_doc.SerializeToString())
+            sim_sig = await signing_executor.sign(
+                self.private_key, sim_sign_doc.SerializeToString()
+            )
             sim_tx_raw_bytes = tx.get_tx_data(sim_sig, self.pub_key)
 
             try:
                 sim_res = await self.client.simulate(sim_tx_raw_bytes)
             except RpcError as ex:
+                self._resync_sequence(str(ex))
                 return {"error": str(ex)}
 
             gas_price = GAS_PRICE
@@ -80,16 +406,29 @@ class ChainInteractor:
                 .with_timeout_height(self.client.timeout_height)
             )
             sign_doc = tx.get_sign_doc(self.pub_key)
-            sig = self.priv_key.sign(sign_doc.SerializeToString())
+            sig = await signing_executor.sign(
+                self.private_key, sign_doc.SerializeToString()
+            )
             tx_raw_bytes = tx.get_tx_data(sig, self.pub_key)
 
             res = await self.client.broadcast_tx_sync_mode(tx_raw_bytes)
+            tx_response = res.get("txResponse", {})
+            if int(tx_response.get("code") or 0) == 0:
+                self.sequence += 1
+            else:
+                self._resync_sequence(tx_response.get("rawLog", ""))
+            # inclusion is confirmed in the background, callers get a job id now
+            job = tx_tracker.submit(
+                self.client, res, self.address.to_acc_bech32(), self.network_type
+            )
             # standardized return arguments
             return {
                 "success": True,
                 "result": res,
+                "job_id": job.job_id if job else None,
                 "gas_wanted": gas_limit,
                 "gas_fee": f"{gas_fee} INJ",
             }
         except Exception as e:
+            self._resync_sequence(str(e))
             return {"success": False, "error": detailed_exception_info(e)}
@@ -0,0 +1,93 @@
+"""Price levels and sizes for a ladder (grid) of limit orders."""
+
+import base64
+import json
+from decimal import Decimal
+from typing import Dict, List, Tuple
+
+from injective_functions.utils.order_context import to_decimal
+from injective_functions.utils.quantization import Number, OrderRejected
+
+# level i gets: the same size, a size proportional to i + 1, size_ratio ** i
+DISTRIBUTIONS = ("flat", "linear", "geometric")
+MAX_LADDER_LEVELS = 100
+MAX_ORDERS_PER_TX = 20
+NEW_ORDER_EVENTS = (
+    "injective.exchange.v1beta1.EventNewSpotOrders",
+    "injective.exchange.v1beta1.EventNewDerivativeOrders",
+)
+
+
+def ladder_levels(
+    price_from: Number,
+    price_to: Number,
+    levels: int,
+    total_quantity: Number,
+    distribution: str = "flat",
+    size_ratio: Number = 1.5,
+) -> Tuple[List[Decimal], List[Decimal]]:
+    """Prices and quantities of each level, before quantization"""
+    import numpy as np
+
+    price_from, price_to = to_decimal(price_from), to_decimal(price_to)
+    total_quantity, size_ratio = to_decimal(total_quantity), to_decimal(size_ratio)
+    if distribution not in DISTRIBUTIONS:
+        raise OrderRejected(
+            "invalid_ladder",
+            f"Unknown size distribution {distribution!r}, use one of "
+            f"{', '.join(DISTRIBUTIONS)}",
+            distribution=distribution,
+        )
+    if not 1 <= levels <= MAX_LADDER_LEVELS:
+        raise OrderRejected(
+            "invalid_ladder",
+            f"A ladder needs between 1 and {MAX_LADDER_LEVELS} levels",
+            levels=levels,
+        )
+    if price_from <= 0 or price_to <= 0 or total_quantity <= 0 or size_ratio <= 0:
+        raise OrderRejected(
+            "non_positive",
+            "Prices, total quantity and size ratio must be positive",
+            price_from=price_from,
+            price_to=price_to,
+            total_quantity=total_quantity,
+            size_ratio=size_ratio,
+        )
+
+    prices = np.linspace(float(price_from), float(price_to), levels)
+    steps = np.arange(levels, dtype=float)
+    weights: Dict[str, "np.ndarray"] = {
+        "flat": np.ones(levels),
+        "linear": steps + 1,
+        "geometric": float(size_ratio) ** steps,
+    }
+    sizes = weights[distribution] / weights[distribution].sum() * float(total_quantity)
+    # str() keeps the shortest repr, quantize_ladder snaps to ticks anyway
+    return (
+        [Decimal(str(price)) for price in prices],
+        [Decimal(str(size)) for size in sizes],
+    )
+
+
+def order_hashes_by_cid(events: List[Dict]) -> Dict[str, str]:
+    """cid -> order hash from the EventNew*Orders events of an included tx"""
+    hashes = {}
+    for event in events:
+        if event.get("type") not in NEW_ORDER_EVENTS:
+            continue
+        for attribute in event.get("attributes", []):
+            if attribute.get("key") not in ("buy_orders", "sell_orders"):
+                continue
+            for order in json.loads(attribute.get("value") or "[]"):
+                cid = order.get("order_info", {}).get("cid")
+                order_hash = order.get("order_hash")
+                if cid and order_hash:
+                    hashes[cid] = _hex_hash(order_hash)
+    return hashes
+
+
+def _hex_hash(order_hash: str) -> str:
+    # the chain encodes hash bytes as base64 in events
+    if order_hash.startswith("0x"):
+        return order_hash
+    return "0x" + base64.b64decode(order_hash).hex()
@@ -0,0 +1,104 @@
+"""Per network cache of market tickers and denom decimals."""
+
+import asyncio
+import time
+from typing import Dict, Optional
+
+import aiohttp
+
+from injective_functions.utils.indexer_requests import (
+    fetch_decimal_denoms,
+    get_http_session,
+    normalize_ticker,
+)
+
+LCD_ENDPOINTS = {
+    "mainnet": "https://sentry.lcd.injective.network",
+    "testnet": "https://testnet.sentry.lcd.injective.network",
+}
+DEFAULT_TTL_SECONDS = 600
+
+
+class MarketRegistry:
+    """Ticker -> market id and denom -> decimals for one network"""
+
+    def __init__(
+        self, network_type: str = "mainnet", ttl_seconds: int = DEFAULT_TTL_SECONDS
+    ) -> None:
+        self.network_type = network_type
+        self.ttl_seconds = ttl_seconds
+        self.market_ids: Dict[str, str] = {}
+        self.denom_decimals: Dict[str, int] = {}
+        self.loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.loaded_at is not None
+
+    @property
+    def is_stale(self) -> bool:
+        return not self.is_loaded or time.time() - self.loaded_at > self.ttl_seconds
+
+    async def _fetch_markets(self, kind: str) -> Dict[str, str]:
+        url = f"{LCD_ENDPOINTS[self.network_type]}/injective/exchange/v1beta1/{kind}/markets"
+        try:
+            async with get_http_session().get(url) as response:
+                data = await response.json()
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            print(f"Failed to load {kind} markets for {self.network_type}: {e}")
+            return {}
+        markets = {}
+        for market_info in data.get("markets", []):
+            # derivative markets are wrapped in {"market": {...}}, spot ones are not
+            market = market_info.get("market", market_info)
+            ticker = market.get("ticker", "").upper()
+            market_id = market.get("market_id")
+            if isinstance(market_id, str):
+                market_id = market_id.strip("'\"")
+            if ticker and market_id:
+                markets[ticker] = market_id
+        return markets
+
+    async def load(self, force: bool = False) -> "MarketRegistry":
+        """Download markets and denoms unless a fresh copy is already loaded"""
+        async with self._lock:
+            if not force and not self.is_stale:
+                return self
+            spot, derivative, denoms = await asyncio.gather(
+                self._fetch_markets("spot"),
+                self._fetch_markets("derivative"),
+                fetch_decimal_denoms(self.network_type == "mainnet"),
+            )
+            # keep the previous copy if a download came back empty
+            if spot or derivative:
+                self.market_ids = {**spot, **derivative}
+            if denoms:
+                self.denom_decimals = denoms
+            # an empty download is retried on the next lookup instead of cached
+            if self.market_ids or self.denom_decimals:
+                self.loaded_at = time.time()
+            print(
+                f"Loaded {len(self.market_ids)} markets and "
+                f"{len(self.denom_decimals)} denoms for {self.network_type}"
+            )
+            return self
+
+    async def get_market_id(self, ticker_symbol: str) -> Optional[str]:
+        await self.load()
+        return self.market_ids.get(normalize_ticker(ticker_symbol))
+
+    async def get_denom_decimals(self) -> Dict[str, int]:
+        await self.load()
+        return self.denom_decimals
+
+
+_registries: Dict[str, MarketRegistry] = {}
+
+
+def get_registry(network_type: str = "mainnet") -> MarketRegistry:
+    if network_type not in LCD_ENDPOINTS:
+        raise ValueError(f"No market registry for network {network_type}")
+    if network_type not in _registries:
+        _registries[network_type] = MarketRegistry(network_type)
+    return _registries[network_type]
@@ -0,0 +1,39 @@
+"""gRPC channels and composers shared by all agents on a network."""
+
+import asyncio
+from typing import Dict
+
+from pyinjective.core.network import Network
+
+
+class SharedChannelNetwork(Network):
+    """Network whose gRPC channels are created once and handed to every client"""
+
+    def _create_grpc_channel(self, endpoint, credentials):
+        channels = self.__dict__.setdefault("_shared_channels", {})
+        if endpoint not in channels:
+            channels[endpoint] = super()._create_grpc_channel(endpoint, credentials)
+        return channels[endpoint]
+
+
+_networks: Dict[str, Network] = {}
+_composers: Dict[str, asyncio.Task] = {}
+
+
+def get_network(network_type: str) -> Network:
+    if network_type not in _networks:
+        _networks[network_type] = (
+            SharedChannelNetwork.testnet()
+            if network_type == "testnet"
+            else SharedChannelNetwork.mainnet()
+        )
+    return _networks[network_type]
+
+
+async def get_composer(network_type: str, client):
+    """The network's Composer, built by the first client that asks for it"""
+    task = _composers.get(network_type)
+    if task is None or (task.done() and task.exception() is not None):
+        task = asyncio.ensure_future(client.composer())
+        _composers[network_type] = task
+    return await asyncio.shield(task)
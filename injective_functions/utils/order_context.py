@@ -0,0 +1,66 @@
+"""Precomputed, immutable inputs for building order messages."""
+
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Dict, Optional, Tuple, Union
+
+
+@dataclass(frozen=True)
+class OrderContext:
+    market_id: str
+    ticker: str
+    is_derivative: bool
+    sender: str  # bech32 address, also used as the fee recipient
+    subaccount_id: str
+    # human readable units, e.g. 0.001 USDT and 0.01 BTC
+    min_price_tick_size: Decimal
+    min_quantity_tick_size: Decimal
+    min_notional: Decimal
+    base_denom: Optional[str]  # None for derivatives
+    quote_denom: str
+    taker_fee_rate: Decimal
+    initial_margin_ratio: Optional[Decimal]  # None for spot markets
+
+
+def to_decimal(value: Union[Decimal, float, int, str]) -> Decimal:
+    """Decimal from a tool argument; floats go through str to avoid binary noise"""
+    return value if isinstance(value, Decimal) else Decimal(str(value))
+
+
+class OrderContextCache:
+    """OrderContext per (market, subaccount index) for one chain client.
+
+    The chain client provides resolve_market_id(market) and a synchronous
+    market_metadata(market_id) returning the remaining OrderContext fields
+    (ticker, type, tick sizes in human readable units, denoms and fee/margin
+    parameters).
+    """
+
+    def __init__(self, chain_client) -> None:
+        self.chain_client = chain_client
+        self.sender = chain_client.address.to_acc_bech32()
+        self._contexts: Dict[Tuple[str, int], OrderContext] = {}
+
+    async def get(self, market: str, subaccount_idx: int = 0) -> OrderContext:
+        context = self._contexts.get((market, subaccount_idx))
+        if context is not None:
+            return context
+        market_id = await self.chain_client.resolve_market_id(market)
+        context = self._contexts.get((market_id, subaccount_idx))
+        if context is None:
+            metadata = self.chain_client.market_metadata(market_id)
+            context = OrderContext(
+                market_id=market_id,
+                sender=self.sender,
+                subaccount_id=self.chain_client.address.get_subaccount_id(
+                    subaccount_idx
+                ),
+                **metadata,
+            )
+        # cache under both the ticker the caller used and the market id
+        self._contexts[(market, subaccount_idx)] = context
+        self._contexts[(market_id, subaccount_idx)] = context
+        return context
+
+    def clear(self) -> None:
+        self._contexts.clear()
@@ -0,0 +1,81 @@
+"""Order hashes as the exchange module derives them, before an order is sent."""
+
+from decimal import Decimal
+
+# the EIP-712 layout of pyinjective.orderhash, whose eip712 models don't
+# build with current eip712 releases
+DOMAIN = {
+    "name": "Injective Protocol",
+    "version": "2.0.0",
+    "chainId": 888,
+    "verifyingContract": "0xCcCCccccCCCCcCCCCCCcCcCccCcCCCcCcccccccC",
+    "salt": b"\x00" * 32,
+}
+TYPES = {
+    "EIP712Domain": [
+        {"name": "name", "type": "string"},
+        {"name": "version", "type": "string"},
+        {"name": "chainId", "type": "uint256"},
+        {"name": "verifyingContract", "type": "address"},
+        {"name": "salt", "type": "bytes32"},
+    ],
+    "OrderInfo": [
+        {"name": "SubaccountId", "type": "string"},
+        {"name": "FeeRecipient", "type": "string"},
+        {"name": "Price", "type": "string"},
+        {"name": "Quantity", "type": "string"},
+    ],
+    "SpotOrder": [
+        {"name": "MarketId", "type": "string"},
+        {"name": "OrderInfo", "type": "OrderInfo"},
+        {"name": "Salt", "type": "string"},
+        {"name": "OrderType", "type": "string"},
+        {"name": "TriggerPrice", "type": "string"},
+    ],
+    "DerivativeOrder": [
+        {"name": "MarketId", "type": "string"},
+        {"name": "OrderInfo", "type": "OrderInfo"},
+        {"name": "OrderType", "type": "string"},
+        {"name": "Margin", "type": "string"},
+        {"name": "TriggerPrice", "type": "string"},
+        {"name": "Salt", "type": "string"},
+    ],
+}
+
+
+def _go_decimal(value: str) -> str:
+    # message values are in extended (1e18) chain format, the hash uses Go's
+    # 18 decimal rendering of the chain format value
+    return f"{(Decimal(value or '0') / Decimal(10) ** 18).normalize():.18f}"
+
+
+def order_hash(order, nonce: int) -> str:
+    """0x hash of a SpotOrder or DerivativeOrder proto placed with this nonce"""
+    from eth_account.messages import _hash_eip191_message, encode_typed_data
+
+    kind = type(order).__name__
+    message = {
+        "MarketId": order.market_id,
+        "OrderInfo": {
+            "SubaccountId": order.order_info.subaccount_id,
+            "FeeRecipient": order.order_info.fee_recipient,
+            "Price": _go_decimal(order.order_info.price),
+            "Quantity": _go_decimal(order.order_info.quantity),
+        },
+        "Salt": str(nonce),
+        "OrderType": chr(order.order_type),
+        "TriggerPrice": _go_decimal(order.trigger_price),
+    }
+    if kind == "DerivativeOrder":
+        message["Margin"] = _go_decimal(order.margin)
+    signable = encode_typed_data(
+        full_message={
+            "types": {
+                name: TYPES[name] for name in ("EIP712Domain", "OrderInfo", kind)
+            },
+            "primaryType": kind,
+            "domain": DOMAIN,
+            "message": message,
+        }
+    )
+    return "0x" + _hash_eip191_message(signable).hex()
@@ -0,0 +1,162 @@
+"""Round orders to the market's tick sizes before a tx is built."""
+
+from dataclasses import dataclass, field
+from decimal import ROUND_CEILING, ROUND_FLOOR, Decimal
+from typing import Dict, List, Sequence, Union
+
+from injective_functions.utils.order_context import OrderContext, to_decimal
+
+Number = Union[Decimal, float, int, str]
+
+
+class OrderRejected(ValueError):
+    """An order that can't succeed, with a machine readable reason"""
+
+    def __init__(self, reason: str, message: str, **details) -> None:
+        super().__init__(message)
+        self.reason = reason
+        self.details = details
+
+    def to_dict(self) -> Dict:
+        return {
+            "success": False,
+            "error": str(self),
+            "reason": self.reason,
+            "details": {key: str(value) for key, value in self.details.items()},
+        }
+
+
+@dataclass(frozen=True)
+class QuantizedOrder:
+    price: Decimal
+    quantity: Decimal
+    # the requested values that had to be rounded, for reporting back
+    adjusted: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def notional(self) -> Decimal:
+        return self.price * self.quantity
+
+
+def is_buy_side(side: str) -> bool:
+    """BUY, buy_po, BUY_ATOMIC, ... are buys; everything else sells"""
+    return side.upper().startswith("BUY")
+
+
+def round_to_tick(value: Decimal, tick: Decimal, up: bool) -> Decimal:
+    if tick <= 0:
+        return value
+    steps = (value / tick).to_integral_value(ROUND_CEILING if up else ROUND_FLOOR)
+    return steps * tick
+
+
+def _price_rounds_up(is_buy: bool, is_market: bool) -> bool:
+    # limit orders move away from the spread, market orders towards it
+    return is_buy == is_market
+
+
+def quantize_order(
+    ctx: OrderContext,
+    price: Number,
+    quantity: Number,
+    side: str,
+    is_market: bool = False,
+) -> QuantizedOrder:
+    requested_price, requested_quantity = to_decimal(price), to_decimal(quantity)
+    if requested_price <= 0 or requested_quantity <= 0:
+        raise OrderRejected(
+            "non_positive",
+            "Price and quantity must be positive",
+            price=requested_price,
+            quantity=requested_quantity,
+        )
+    is_buy = is_buy_side(side)
+    price = round_to_tick(
+        requested_price, ctx.min_price_tick_size, _price_rounds_up(is_buy, is_market)
+    )
+    quantity = round_to_tick(requested_quantity, ctx.min_quantity_tick_size, False)
+    if price <= 0:
+        raise OrderRejected(
+            "below_price_tick",
+            f"Price {requested_price} is below the tick size of {ctx.ticker}",
+            price=requested_price,
+            min_price_tick_size=ctx.min_price_tick_size,
+        )
+    if quantity <= 0:
+        raise OrderRejected(
+            "below_quantity_tick",
+            f"Quantity {requested_quantity} is below the minimum of {ctx.ticker}",
+            quantity=requested_quantity,
+            min_quantity_tick_size=ctx.min_quantity_tick_size,
+        )
+    if price * quantity < ctx.min_notional:
+        raise OrderRejected(
+            "below_min_notional",
+            f"Order value {price * quantity} is below the minimum of "
+            f"{ctx.min_notional} for {ctx.ticker}",
+            notional=price * quantity,
+            min_notional=ctx.min_notional,
+        )
+    adjusted = {}
+    # a market order's price is a derived worst price, not something the user asked for
+    if price != requested_price and not is_market:
+        adjusted["price"] = str(requested_price)
+    if quantity != requested_quantity:
+        adjusted["quantity"] = str(requested_quantity)
+    return QuantizedOrder(price=price, quantity=quantity, adjusted=adjusted)
+
+
+def quantize_ladder(
+    ctx: OrderContext,
+    prices: Sequence[Number],
+    quantities: Sequence[Number],
+    side: str,
+) -> List[QuantizedOrder]:
+    """Quantize many limit orders on one side of a market in one pass.
+
+    Levels that round to zero or fall below min notional are dropped; levels
+    that land on the same price tick are merged. Raises OrderRejected when no
+    level is left.
+    """
+    import numpy as np
+
+    if len(prices) != len(quantities):
+        raise OrderRejected(
+            "ladder_mismatch",
+            "Every ladder level needs a price and a quantity",
+            prices=len(prices),
+            quantities=len(quantities),
+        )
+    is_buy = is_buy_side(side)
+    price_tick = float(ctx.min_price_tick_size)
+    quantity_tick = float(ctx.min_quantity_tick_size)
+    # work in whole ticks; the epsilon keeps values already on a tick there
+    price_steps = np.asarray([float(p) for p in prices]) / price_tick
+    price_steps = (
+        np.floor(price_steps + 1e-9) if is_buy else np.ceil(price_steps - 1e-9)
+    )
+    quantity_steps = np.floor(
+        np.asarray([float(q) for q in quantities]) / quantity_tick + 1e-9
+    )
+    notional = price_steps * price_tick * quantity_steps * quantity_tick
+    valid = (
+        (price_steps > 0) & (quantity_steps > 0) & (notional >= float(ctx.min_notional))
+    )
+    if not valid.any():
+        raise OrderRejected(
+            "empty_ladder",
+            f"No ladder level is a valid order on {ctx.ticker}",
+            levels=len(prices),
+            min_notional=ctx.min_notional,
+        )
+
+    merged: Dict[int, int] = {}
+    for steps, size in zip(price_steps[valid], quantity_steps[valid]):
+        merged[int(steps)] = merged.get(int(steps), 0) + int(size)
+    return [
+        QuantizedOrder(
+            price=Decimal(steps) * ctx.min_price_tick_size,
+            quantity=Decimal(size) * ctx.min_quantity_tick_size,
+        )
+        for steps, size in sorted(merged.items(), reverse=is_buy)
+    ]
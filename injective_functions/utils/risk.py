@@ -0,0 +1,113 @@
+"""Local pre-trade checks that reject orders the chain would reject."""
+
+import asyncio
+from decimal import Decimal
+from typing import Dict, Optional, Tuple
+
+from injective_functions.utils.order_context import OrderContext
+from injective_functions.utils.quantization import (
+    OrderRejected,
+    QuantizedOrder,
+    is_buy_side,
+)
+
+
+def required_funds(
+    ctx: OrderContext,
+    order: QuantizedOrder,
+    is_buy: bool,
+    leverage: Optional[Decimal],
+    reduce_only: bool = False,
+) -> Tuple[str, Decimal]:
+    """Denom and amount the order locks, computed like calculate_margin plus taker fee"""
+    fee = order.notional * max(ctx.taker_fee_rate, Decimal(0))
+    if ctx.is_derivative:
+        margin = Decimal(0) if reduce_only else order.notional / leverage
+        return ctx.quote_denom, margin + fee
+    if is_buy:
+        return ctx.quote_denom, order.notional + fee
+    return ctx.base_denom, order.quantity
+
+
+async def check_order(
+    chain_client,
+    ctx: OrderContext,
+    order: QuantizedOrder,
+    side: str,
+    leverage=None,
+    reduce_only: bool = False,
+) -> None:
+    """Raise OrderRejected when the order is certain to fail on chain"""
+    is_buy = is_buy_side(side)
+    if ctx.is_derivative:
+        leverage = Decimal(str(leverage)) if leverage is not None else Decimal(1)
+        if leverage <= 0:
+            raise OrderRejected(
+                "invalid_leverage",
+                f"Leverage must be positive, got {leverage}",
+                leverage=leverage,
+            )
+        if ctx.initial_margin_ratio and leverage > 1 / ctx.initial_margin_ratio:
+            max_leverage = 1 / ctx.initial_margin_ratio
+            raise OrderRejected(
+                "leverage_above_max",
+                f"Leverage {leverage} is above the maximum of "
+                f"{max_leverage:.2f} for {ctx.ticker}",
+                leverage=leverage,
+                max_leverage=f"{max_leverage:.2f}",
+            )
+
+    check_position = ctx.is_derivative and reduce_only
+    deposits, decimals, positions = await asyncio.gather(
+        chain_client.fetch_subaccount_deposits(ctx.subaccount_id),
+        chain_client.fetch_denom_decimals(),
+        (
+            chain_client.fetch_subaccount_positions(ctx.subaccount_id)
+            if check_position
+            else asyncio.sleep(0, {})
+        ),
+        return_exceptions=True,
+    )
+
+    if check_position and not isinstance(positions, Exception):
+        position = next(
+            (
+                entry["position"]
+                for entry in positions.get("state", [])
+                if entry["marketId"] == ctx.market_id
+            ),
+            None,
+        )
+        if position is None:
+            raise OrderRejected(
+                "reduce_only_without_position",
+                f"There is no open position in {ctx.ticker} to reduce",
+                market=ctx.ticker,
+            )
+        if bool(position.get("isLong")) == is_buy:
+            raise OrderRejected(
+                "reduce_only_same_direction",
+                f"A reduce-only {'buy' if is_buy else 'sell'} would add to the "
+                f"{'long' if position.get('isLong') else 'short'} position in {ctx.ticker}",
+                market=ctx.ticker,
+            )
+
+    if isinstance(deposits, Exception) or isinstance(decimals, Exception):
+        print(f"Skipping the funds check for {ctx.ticker}: deposits unavailable")
+        return
+    denom, required = required_funds(ctx, order, is_buy, leverage, reduce_only)
+    deposit: Dict = deposits.get("deposits", {}).get(denom)
+    available = (
+        Decimal(deposit["availableBalance"]) / Decimal(10) ** decimals.get(denom, 0)
+        if deposit
+        else Decimal(0)
+    )
+    if available < required:
+        raise OrderRejected(
+            "insufficient_funds",
+            f"Order needs {required:f} {denom} but only {available:f} is available "
+            f"in subaccount {ctx.subaccount_id}",
+            denom=denom,
+            required=f"{required:f}",
+            available=f"{available:f}",
+        )
@@ -0,0 +1,120 @@
+"""Transaction signing off the event loop."""
+
+import asyncio
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+# inline signs on the loop thread; thread only helps a signer that releases the GIL
+SIGNING_MODES = ("inline", "thread", "process")
+
+
+@lru_cache(maxsize=1024)
+def _private_key(private_key_hex: str):
+    from pyinjective.wallet import PrivateKey
+
+    return PrivateKey.from_hex(private_key_hex)
+
+
+def sign_bytes(private_key_hex: str, sign_doc: bytes) -> bytes:
+    """Sign one serialized sign doc (module level so process workers can run it)"""
+    return _private_key(private_key_hex).sign(sign_doc)
+
+
+def sign_batch(requests: List[Tuple[str, bytes]]) -> List[bytes]:
+    return [sign_bytes(private_key_hex, doc) for private_key_hex, doc in requests]
+
+
+class SigningExecutor:
+    def __init__(self, mode: str = "inline", max_workers: int = None) -> None:
+        if mode not in SIGNING_MODES:
+            raise ValueError(f"Signing mode must be one of {', '.join(SIGNING_MODES)}")
+        self.mode = mode
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._pool: Optional[Executor] = None
+        self._pending: List[Tuple[str, bytes, asyncio.Future]] = []
+
+    @classmethod
+    def from_env(cls) -> "SigningExecutor":
+        workers = os.getenv("SIGNING_WORKERS")
+        return cls(
+            mode=os.getenv("SIGNING_EXECUTOR", "inline").strip().lower(),
+            max_workers=int(workers) if workers else None,
+        )
+
+    @property
+    def pool(self) -> Executor:
+        if self._pool is None:
+            if self.mode == "process":
+                # spawn, not fork: forking a process with live gRPC channels can hang
+                import multiprocessing
+
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            else:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="signer"
+                )
+        return self._pool
+
+    async def sign(self, private_key_hex: str, sign_doc: bytes) -> bytes:
+        if self.mode == "inline":
+            return sign_bytes(private_key_hex, sign_doc)
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        if not self._pending:
+            loop.call_soon(self._flush)
+        self._pending.append((private_key_hex, sign_doc, future))
+        return await future
+
+    async def sign_many(self, requests: List[Tuple[str, bytes]]) -> List[bytes]:
+        """Sign [(private_key_hex, sign_doc)] and return the signatures in order"""
+        if not requests:
+            return []
+        if self.mode == "inline":
+            return sign_batch(requests)
+        # one chunk per worker keeps the pickling/IPC overhead per batch, not per doc
+        size = -(-len(requests) // self.max_workers)
+        loop = asyncio.get_running_loop()
+        chunks = await asyncio.gather(
+            *[
+                loop.run_in_executor(self.pool, sign_batch, requests[i : i + size])
+                for i in range(0, len(requests), size)
+            ]
+        )
+        return [signature for chunk in chunks for signature in chunk]
+
+    def _flush(self) -> None:
+        pending, self._pending = self._pending, []
+
+        async def run() -> None:
+            try:
+                signatures = await self.sign_many(
+                    [(key, doc) for key, doc, _ in pending]
+                )
+            except Exception as e:
+                for *_, future in pending:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+            for (*_, future), signature in zip(pending, signatures):
+                if not future.done():
+                    future.set_result(signature)
+
+        asyncio.ensure_future(run())
+
+    async def warm_up(self) -> None:
+        """Start the workers (and their pyinjective import) before the first tx"""
+        if self.mode != "inline":
+            await self.sign_many([("01" * 32, b"warm-up")] * self.max_workers)
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+signing_executor = SigningExecutor.from_env()
@@ -0,0 +1,95 @@
+"""Depth-aware fill estimates and worst prices for market orders."""
+
+from dataclasses import asdict, dataclass
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+from injective_functions.utils.quantization import OrderRejected
+
+Level = Tuple[Decimal, Decimal]
+
+
+@dataclass(frozen=True)
+class FillEstimate:
+    side: str  # "buy" or "sell"
+    quantity: Decimal
+    filled_quantity: Decimal
+    best_price: Decimal
+    mid_price: Decimal
+    average_price: Decimal
+    worst_price: Decimal
+    slippage_bps: Decimal  # average price vs mid, positive means worse
+    levels_used: int
+
+    @property
+    def fully_filled(self) -> bool:
+        return self.filled_quantity >= self.quantity
+
+    def to_dict(self) -> Dict:
+        result = {
+            key: f"{value:f}" if isinstance(value, Decimal) else value
+            for key, value in asdict(self).items()
+        }
+        result["fully_filled"] = self.fully_filled
+        return result
+
+
+def estimate_fill(
+    orderbook: Dict[str, List[Level]], quantity: Decimal, is_buy: bool
+) -> FillEstimate:
+    """Walk the asks (for a buy) or bids (for a sell) until quantity is filled"""
+    import numpy as np
+
+    if not quantity.is_finite() or quantity <= 0:
+        raise OrderRejected(
+            "non_positive", "Quantity must be a positive number", quantity=quantity
+        )
+    levels = orderbook["sells"] if is_buy else orderbook["buys"]
+    if not levels:
+        raise OrderRejected(
+            "no_liquidity",
+            f"There are no {'asks' if is_buy else 'bids'} to fill a market order",
+            side="buy" if is_buy else "sell",
+        )
+    prices = np.array([float(price) for price, _ in levels])
+    sizes = np.array([float(size) for _, size in levels])
+    wanted = float(quantity)
+
+    # fill of each level: what is left of the order once the better levels are used
+    depth_before = np.concatenate(([0.0], np.cumsum(sizes)[:-1]))
+    fills = np.clip(wanted - depth_before, 0.0, sizes)
+    used = int(np.count_nonzero(fills))
+    filled = float(fills.sum())
+    average = float((prices * fills).sum() / filled)
+
+    best_price = levels[0][0]
+    opposite = orderbook["buys"] if is_buy else orderbook["sells"]
+    mid = (best_price + opposite[0][0]) / 2 if opposite else best_price
+    direction = 1 if is_buy else -1
+    slippage = direction * (average - float(mid)) / float(mid) * 10_000
+    return FillEstimate(
+        side="buy" if is_buy else "sell",
+        quantity=quantity,
+        filled_quantity=Decimal(str(round(filled, 12))),
+        best_price=best_price,
+        mid_price=mid,
+        average_price=Decimal(str(round(average, 12))),
+        # an exact price from the book, not a float
+        worst_price=levels[used - 1][0],
+        slippage_bps=Decimal(str(round(slippage, 2))),
+        levels_used=used,
+    )
+
+
+def check_slippage(estimate: FillEstimate, max_slippage_bps: Optional[float]) -> None:
+    if max_slippage_bps is None:
+        return
+    if estimate.slippage_bps > Decimal(str(max_slippage_bps)):
+        raise OrderRejected(
+            "slippage_above_limit",
+            f"Expected slippage of {estimate.slippage_bps} bps is above the "
+            f"limit of {max_slippage_bps} bps",
+            slippage_bps=estimate.slippage_bps,
+            max_slippage_bps=max_slippage_bps,
+            average_price=estimate.average_price,
+        )
@@ -0,0 +1,262 @@
+"""Local, incrementally synced trade history per market, one file per column."""
+
+import asyncio
+import json
+import os
+import time
+from decimal import Decimal
+from typing import AsyncIterator, Dict, List, Optional
+
+DEFAULT_ROOT = os.getenv("TRADE_STORE_PATH", ".cache/trades")
+PAGE_SIZE = 100
+DEFAULT_MAX_PAGES = 50
+TRUNCATED_WARNING = (
+    "The stored history is incomplete: the first sync kept only the newest "
+    "max_pages pages of trades, older ones are missing"
+)
+COLUMNS = {"timestamp": "<i8", "price": "<f8", "quantity": "<f8", "side": "i1"}
+MARKET_DECIMALS = (
+    "min_price_tick_size",
+    "min_quantity_tick_size",
+    "min_notional",
+    "taker_fee_rate",
+    "initial_margin_ratio",
+)
+
+_locks: Dict[str, asyncio.Lock] = {}
+
+
+def _empty_columns() -> Dict:
+    import numpy as np
+
+    return {name: np.empty(0, dtype=dtype) for name, dtype in COLUMNS.items()}
+
+
+def trades_to_columns(trades: List[Dict]) -> Dict:
+    """fetch_trades records as numpy columns, in the order given"""
+    import numpy as np
+
+    return {
+        "timestamp": np.array(
+            [t["timestamp"] for t in trades], dtype=COLUMNS["timestamp"]
+        ),
+        "price": np.array([float(t["price"]) for t in trades], dtype=COLUMNS["price"]),
+        "quantity": np.array(
+            [float(t["quantity"]) for t in trades], dtype=COLUMNS["quantity"]
+        ),
+        # +1 for a buy taker, -1 for a sell taker
+        "side": np.array(
+            [1 if t["is_buy"] else -1 for t in trades], dtype=COLUMNS["side"]
+        ),
+    }
+
+
+class TradeStore:
+    """Columnar trade history of one market, oldest first"""
+
+    def __init__(self, network_type: str, market_id: str, root: str = DEFAULT_ROOT):
+        self.market_id = market_id
+        self.path = os.path.join(root, network_type, market_id)
+        os.makedirs(self.path, exist_ok=True)
+        self.meta = self._load_meta()
+
+    def _load_meta(self) -> Dict:
+        try:
+            with open(os.path.join(self.path, "meta.json")) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {
+                "count": 0,
+                "first_timestamp": None,
+                "last_timestamp": None,
+                # ids of stored trades at last_timestamp, to drop them on the next sync
+                "boundary_ids": [],
+                "last_added": 0,
+                "synced_at": None,
+                # the first sync stopped at max_pages, older trades are missing
+                "truncated": False,
+            }
+
+    def _save_meta(self) -> None:
+        tmp = os.path.join(self.path, "meta.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(self.meta, f)
+        os.replace(tmp, os.path.join(self.path, "meta.json"))
+
+    def save_market(self, metadata: Dict) -> None:
+        """Keep chain_client.market_metadata(market_id) for offline use"""
+        tmp = os.path.join(self.path, "market.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(
+                {
+                    key: str(value) if isinstance(value, Decimal) else value
+                    for key, value in metadata.items()
+                },
+                f,
+            )
+        os.replace(tmp, os.path.join(self.path, "market.json"))
+
+    def market(self) -> Optional[Dict]:
+        """The saved market metadata with Decimals restored, None if never synced"""
+        try:
+            with open(os.path.join(self.path, "market.json")) as f:
+                metadata = json.load(f)
+        except FileNotFoundError:
+            return None
+        return {
+            key: (
+                Decimal(value)
+                if key in MARKET_DECIMALS and value is not None
+                else value
+            )
+            for key, value in metadata.items()
+        }
+
+    def _file(self, column: str, staging: bool = False) -> str:
+        return os.path.join(self.path, f"{column}{'.staging' if staging else ''}.bin")
+
+    def __len__(self) -> int:
+        return self.meta["count"]
+
+    @property
+    def truncated(self) -> bool:
+        """Older trades than the first stored one exist but were never fetched"""
+        return bool(self.meta.get("truncated"))
+
+    def read(self, start_time: int = None, end_time: int = None) -> Dict:
+        """Memory-mapped columns, optionally limited to [start_time, end_time] in ms"""
+        import numpy as np
+
+        count = self.meta["count"]
+        if count == 0:
+            return _empty_columns()
+        columns = {
+            name: np.memmap(self._file(name), dtype=dtype, mode="r", shape=(count,))
+            for name, dtype in COLUMNS.items()
+        }
+        if start_time is None and end_time is None:
+            return columns
+        timestamps = columns["timestamp"]
+        lo = (
+            0 if start_time is None else np.searchsorted(timestamps, start_time, "left")
+        )
+        hi = (
+            count
+            if end_time is None
+            else np.searchsorted(timestamps, end_time, "right")
+        )
+        return {name: values[lo:hi] for name, values in columns.items()}
+
+    def begin(self) -> None:
+        for column in COLUMNS:
+            open(self._file(column, staging=True), "wb").close()
+
+    def stage(self, page: Dict) -> None:
+        """Append a page (newest first, like the indexer returns it) to staging"""
+        for column in COLUMNS:
+            with open(self._file(column, staging=True), "ab") as f:
+                f.write(page[column].tobytes())
+
+    def commit(self, boundary_ids: List[str]) -> int:
+        """Move staged trades into the store in time order; returns how many"""
+        import numpy as np
+
+        count = self.meta["count"]
+        added = 0
+        for column, dtype in COLUMNS.items():
+            staged = np.fromfile(self._file(column, staging=True), dtype=dtype)[::-1]
+            added = len(staged)
+            with open(self._file(column), "ab") as f:
+                # drop whatever a crashed commit appended past the recorded count
+                f.truncate(count * np.dtype(dtype).itemsize)
+                f.write(staged.tobytes())
+            os.remove(self._file(column, staging=True))
+        if added:
+            self.meta["count"] = count + added
+            timestamps = self.read()["timestamp"]
+            self.meta.update(
+                first_timestamp=int(timestamps[0]),
+                last_timestamp=int(timestamps[-1]),
+                boundary_ids=boundary_ids,
+            )
+        self.meta["last_added"] = added
+        self.meta["synced_at"] = int(time.time() * 1000)
+        self._save_meta()
+        return added
+
+
+async def iter_trade_pages(
+    chain_client,
+    market_id: str,
+    start_time: int = None,
+    end_time: int = None,
+    page_size: int = PAGE_SIZE,
+) -> AsyncIterator[List[Dict]]:
+    """Every trade of a market between start_time and end_time (ms), a page at a
+    time and newest first; end_time defaults to now so the pages stay stable"""
+    end_time = end_time if end_time is not None else int(time.time() * 1000)
+    skip = 0
+    while True:
+        page = await chain_client.fetch_trades(
+            market_id,
+            skip=skip,
+            limit=page_size,
+            start_time=start_time,
+            end_time=end_time,
+        )
+        if page:
+            yield page
+        if len(page) < page_size:
+            return
+        skip += len(page)
+
+
+async def sync_trades(
+    chain_client,
+    market_id: str,
+    max_pages: Optional[int] = DEFAULT_MAX_PAGES,
+    root: str = DEFAULT_ROOT,
+) -> TradeStore:
+    """Fetch the trades newer than the store's and append them.
+
+    A first sync keeps the newest max_pages pages and marks the store as
+    truncated if the indexer had more. A later sync that finds
+    more than max_pages new pages raises ValueError and leaves the store
+    unchanged, since storing only the newest part would leave a gap.
+    """
+    async with _locks.setdefault(
+        f"{chain_client.network_type}/{market_id}", asyncio.Lock()
+    ):
+        store = TradeStore(chain_client.network_type, market_id, root)
+        known = set(store.meta["boundary_ids"])
+        store.begin()
+        newest_ids: List[str] = []
+        newest_timestamp = store.meta["last_timestamp"]
+        pages = 0
+        async for page in iter_trade_pages(
+            chain_client, market_id, start_time=store.meta["last_timestamp"]
+        ):
+            if pages == 0:
+                newest_timestamp = page[0]["timestamp"]
+            newest_ids.extend(
+                t["trade_id"] for t in page if t["timestamp"] == newest_timestamp
+            )
+            fresh = [t for t in page if t["trade_id"] not in known]
+            if fresh:
+                store.stage(trades_to_columns(fresh))
+            pages += 1
+            if max_pages is not None and pages >= max_pages and len(page) == PAGE_SIZE:
+                if len(store):
+                    raise ValueError(
+                        f"More than {max_pages} pages of new trades in {market_id}, "
+                        "sync again with a larger max_pages"
+                    )
+                store.meta["truncated"] = True
+                break
+        if newest_timestamp != store.meta["last_timestamp"]:
+            known = set(newest_ids)
+        elif newest_ids:
+            known.update(newest_ids)
+        store.commit(sorted(known))
+        store.save_market(chain_client.market_metadata(market_id))
+        return store
@@ -0,0 +1,159 @@
+"""Background confirmation tracking for broadcast transactions."""
+
+import asyncio
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+DEFAULT_POLL_INTERVAL = 1.0
+DEFAULT_TIMEOUT_SECONDS = 120
+MAX_FINISHED_JOBS = 1000
+
+
+@dataclass
+class TxJob:
+    job_id: str
+    tx_hash: str
+    owner: str
+    network_type: str
+    submitted_at: float
+    status: str = "pending"  # pending, confirmed, failed, timeout
+    height: Optional[int] = None
+    code: Optional[int] = None
+    raw_log: str = ""
+    gas_wanted: Optional[int] = None
+    gas_used: Optional[int] = None
+    events: List[Dict] = field(default_factory=list)
+    finished_at: Optional[float] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status != "pending"
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+def _int_or_none(value: Any) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class TxTracker:
+    def __init__(
+        self,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        timeout_seconds: float = DEFAULT_TIMEOUT_SECONDS,
+    ) -> None:
+        self.poll_interval = poll_interval
+        self.timeout_seconds = timeout_seconds
+        self.jobs: Dict[str, TxJob] = {}
+        self._by_hash: Dict[str, str] = {}
+        self._clients: Dict[str, Any] = {}
+        self._done_events: Dict[str, asyncio.Event] = {}
+        self._listeners: List[Callable[[TxJob], None]] = []
+        self._poller: Optional[asyncio.Task] = None
+
+    def add_listener(self, listener: Callable[[TxJob], None]) -> None:
+        """listener(job) is called once per job when it reaches a final status"""
+        self._listeners.append(listener)
+
+    def submit(
+        self, client, broadcast_response: Dict, owner: str, network_type: str
+    ) -> Optional[TxJob]:
+        """Track the tx from a broadcast_tx_sync_mode response; None if it has no hash"""
+        tx_response = broadcast_response.get("txResponse", {})
+        tx_hash = tx_response.get("txhash")
+        if not tx_hash:
+            return None
+        job = TxJob(
+            job_id=f"tx_{uuid.uuid4().hex[:12]}",
+            tx_hash=tx_hash.upper(),
+            owner=owner,
+            network_type=network_type,
+            submitted_at=time.time(),
+        )
+        self.jobs[job.job_id] = job
+        self._by_hash[job.tx_hash] = job.job_id
+        self._done_events[job.job_id] = asyncio.Event()
+        code = _int_or_none(tx_response.get("code")) or 0
+        if code != 0:
+            # rejected by CheckTx, it will never be included
+            self._finish(job, "failed", tx_response)
+            return job
+        self._clients[job.job_id] = client
+        if self._poller is None or self._poller.done():
+            self._poller = asyncio.create_task(self._poll_loop())
+        return job
+
+    def get(self, job_id_or_hash: str) -> Optional[TxJob]:
+        job_id = self._by_hash.get(job_id_or_hash.upper(), job_id_or_hash)
+        return self.jobs.get(job_id)
+
+    async def wait(self, job_id_or_hash: str, timeout: float = None) -> Optional[TxJob]:
+        """Wait until the job is final (or the timeout passes) and return it"""
+        job = self.get(job_id_or_hash)
+        if job is None or job.done:
+            return job
+        try:
+            await asyncio.wait_for(self._done_events[job.job_id].wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return job
+
+    async def poll_once(self) -> None:
+        """Fetch every pending tx concurrently and settle the ones that landed"""
+        pending = [job for job in self.jobs.values() if not job.done]
+        results = await asyncio.gather(
+            *[self._clients[job.job_id].fetch_tx(hash=job.tx_hash) for job in pending],
+            return_exceptions=True,
+        )
+        now = time.time()
+        for job, result in zip(pending, results):
+            if isinstance(result, Exception):
+                # not indexed yet (NOT_FOUND) or a transient error, retry next tick
+                if now - job.submitted_at > self.timeout_seconds:
+                    self._finish(job, "timeout", {"rawLog": str(result)})
+                continue
+            tx_response = result.get("txResponse", {})
+            code = _int_or_none(tx_response.get("code")) or 0
+            self._finish(job, "confirmed" if code == 0 else "failed", tx_response)
+
+    async def _poll_loop(self) -> None:
+        while any(not job.done for job in self.jobs.values()):
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await self.poll_once()
+            except Exception as e:
+                print(f"Tx polling failed: {e}")
+
+    def _finish(self, job: TxJob, status: str, tx_response: Dict) -> None:
+        job.status = status
+        job.height = _int_or_none(tx_response.get("height"))
+        job.code = _int_or_none(tx_response.get("code"))
+        job.raw_log = tx_response.get("rawLog", "")
+        job.gas_wanted = _int_or_none(tx_response.get("gasWanted"))
+        job.gas_used = _int_or_none(tx_response.get("gasUsed"))
+        job.events = tx_response.get("events", [])
+        job.finished_at = time.time()
+        self._clients.pop(job.job_id, None)
+        self._done_events[job.job_id].set()
+        for listener in self._listeners:
+            try:
+                listener(job)
+            except Exception as e:
+                print(f"Tx listener failed: {e}")
+        self._prune()
+
+    def _prune(self) -> None:
+        finished = [job for job in self.jobs.values() if job.done]
+        for job in finished[: max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self.jobs[job.job_id]
+            self._by_hash.pop(job.tx_hash, None)
+            self._done_events.pop(job.job_id, None)
+
+
+tx_tracker = TxTracker()
@@ -7,22 +7,104 @@ import colorama
 from colorama import Fore, Style, Back
 import requests
 import argparse
+import itertools
 import json
+import queue
 from decimal import Decimal
 from typing import Dict, Optional
 from app.agent_manager import AgentManager
 
-
 # Initialize colorama for cross-platform colored output
 colorama.init()
 
 
+class WebSocketChat:
+    """Persistent /ws connection: the agent is bound once, then only messages are sent"""
+
+    def __init__(self, api_url: str, on_event=None):
+        self.ws_url = api_url.rstrip("/").replace("http", "ws", 1) + "/ws"
+        self.on_event = on_event
+        self.connection = None
+        self.binding = None
+        self.responses: Dict[str, queue.Queue] = {}
+        self.message_ids = itertools.count(1)
+
+    def bind(self, session_id: str, agent: dict, environment: str):
+        """(Re)connect if the session, agent or network changed"""
+        binding = (session_id, agent["address"], environment)
+        if self.connection is not None and self.binding == binding:
+            return
+        self.close()
+        # only needed for this transport, so imported here
+        from websockets.sync.client import connect
+
+        self.connection = connect(self.ws_url)
+        self.connection.send(
+            json.dumps(
+                {
+                    "type": "bind",
+                    "session_id": session_id,
+                    "agent_id": agent["address"],
+                    "agent_key": agent["private_key"],
+                    "environment": environment,
+                }
+            )
+        )
+        bound = json.loads(self.connection.recv(timeout=60))
+        if bound.get("type") != "bound":
+            self.close()
+            raise Exception(bound.get("error", "Could not bind the WebSocket session"))
+        self.binding = binding
+        reader = threading.Thread(target=self._read, args=(self.connection,))
+        reader.daemon = True
+        reader.start()
+
+    def _read(self, connection):
+        try:
+            for raw in connection:
+                frame = json.loads(raw)
+                if frame.get("type") == "response":
+                    waiting = self.responses.get(frame.get("id"))
+                    if waiting is not None:
+                        waiting.put(frame)
+                elif frame.get("type") == "event" and self.on_event:
+                    self.on_event(frame)
+        except Exception:
+            pass  # connection closed, the next chat reconnects
+        if self.connection is connection:
+            self.connection = None
+
+    def chat(self, message: str, timeout: int = 60) -> dict:
+        message_id = str(next(self.message_ids))
+        self.responses[message_id] = queue.Queue()
+        try:
+            self.connection.send(
+                json.dumps({"type": "chat", "id": message_id, "message": message})
+            )
+            return self.responses[message_id].get(timeout=timeout)
+        except queue.Empty:
+            raise Exception(f"No response within {timeout} seconds")
+        finally:
+            del self.responses[message_id]
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+        self.connection = None
+        self.binding = None
+
+
 class InjectiveCLI:
     """Enhanced CLI interface with agent management"""
 
-    def __init__(self, api_url: str, debug: bool = False):
+    def __init__(self, api_url: str, debug: bool = False, transport: str = "http"):
         self.api_url = api_url
         self.debug = debug
+        self.websocket = (
+            WebSocketChat(api_url, on_event=self.display_event)
+            if transport == "ws"
+            else None
+        )
         self.session_id = datetime.now().strftime("%Y%m%d-%H%M%S")
         self.animation_stop = False
         self.agent_manager = AgentManager()
@@ -172,6 +254,11 @@ class InjectiveCLI:
         print(f"{Fore.BLUE}Response: {formatted_response}{Style.RESET_ALL}")
         print()
 
+    def display_event(self, event):
+        """Print an event pushed by the server (e.g. a tx confirmation)"""
+        text = event.get("message") or json.dumps(event)
+        print(f"\n{Fore.MAGENTA}Event: {text}{Style.RESET_ALL}")
+
     def display_banner(self):
         """Display welcome banner with agent information"""
         self.clear_screen()
@@ -348,16 +435,24 @@ class InjectiveCLI:
 
                 try:
                     agent = self.agent_manager.get_current_agent()
-                    result = self.make_request(
-                        "/chat",
-                        {
-                            "message": user_input,
-                            "session_id": self.session_id,
-                            "agent_id": agent["address"],
-                            "agent_key": agent["private_key"],
-                            "environment": self.agent_manager.get_current_network(),
-                        },
-                    )
+                    if self.websocket is not None:
+                        self.websocket.bind(
+                            self.session_id,
+                            agent,
+                            self.agent_manager.get_current_network(),
+                        )
+                        result = self.websocket.chat(user_input)
+                    else:
+                        result = self.make_request(
+                            "/chat",
+                            {
+                                "message": user_input,
+                                "session_id": self.session_id,
+                                "agent_id": agent["address"],
+                                "agent_key": agent["private_key"],
+                                "environment": self.agent_manager.get_current_network(),
+                            },
+                        )
 
                     # Stop animation before displaying response
                     self.stop_animation()
@@ -384,10 +479,16 @@ def main():
     parser = argparse.ArgumentParser(description="Injective Chain CLI Client")
     parser.add_argument("--url", default="http://localhost:5000", help="API URL")
     parser.add_argument("--debug", action="store_true", help="Enable debug mode")
+    parser.add_argument(
+        "--transport",
+        choices=["http", "ws"],
+        default="http",
+        help="http posts every message to /chat, ws keeps one WebSocket session open",
+    )
     args = parser.parse_args()
 
     try:
-        cli = InjectiveCLI(args.url, args.debug)
+        cli = InjectiveCLI(args.url, args.debug, args.transport)
         cli.run()
     except Exception as e:
         print(f"{Fore.RED}Failed to start CLI: {str(e)}{Style.RESET_ALL}")